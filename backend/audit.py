@@ -0,0 +1,395 @@
+"""
+Pipeline asincron pentru jurnalul de audit
+
+Evenimentele sunt puse într-o coadă în memorie cu dimensiune limitată și
+scrise în audit_logs de un task de fundal, în loturi multi-rând (executemany).
+Handler-ele nu mai așteaptă o conexiune și un commit pentru fiecare eveniment.
+Când coada este plină, producătorul așteaptă cel mult AUDIT_ENQUEUE_TIMEOUT
+secunde (backpressure), apoi evenimentul este respins și numărat ca overflow.
+La oprire, coada este golită complet înainte de închiderea pool-ului.
+
+Un lot care eșuează de AUDIT_MAX_BATCH_RETRIES ori la rând nu mai blochează
+coada: user_id-urile șterse între timp devin NULL (ca ON DELETE SET NULL),
+apoi rândurile se scriu unul câte unul, iar cele care tot eșuează, cu baza de
+date disponibilă, sunt scrise în log (dead letter) și scoase din coadă.
+
+Fiecare lot actualizează în aceeași tranzacție contoarele audit_action_counts
+și audit_user_counts, din care se servesc statisticile. Evenimentele mai vechi
+de AUDIT_RETENTION_DAYS sunt mutate periodic în audit_logs_archive.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import time
+from collections import Counter
+
+import repository
+import serialization
+from conditional import resource_versions
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', 10000))
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 500))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0))
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv('AUDIT_ENQUEUE_TIMEOUT', 0.1))
+# După atâtea eșecuri consecutive, lotul este scris rând cu rând
+AUDIT_MAX_BATCH_RETRIES = int(os.getenv('AUDIT_MAX_BATCH_RETRIES', 3))
+AUDIT_RETENTION_DAYS = int(os.getenv('AUDIT_RETENTION_DAYS', 90))
+AUDIT_ARCHIVE_INTERVAL = int(os.getenv('AUDIT_ARCHIVE_INTERVAL', 86400))
+AUDIT_ARCHIVE_BATCH_SIZE = int(os.getenv('AUDIT_ARCHIVE_BATCH_SIZE', 5000))
+
+AUDIT_COLUMNS = "id, user_id, action, entity_type, entity_id, old_values, new_values, ip_address, user_agent, created_at"
+
+# Fără cheie străină: arhiva păstrează user_id și după ștergerea utilizatorului
+CREATE_AUDIT_ARCHIVE_SQL = """
+    CREATE TABLE IF NOT EXISTS audit_logs_archive (
+        id INT PRIMARY KEY,
+        user_id INT,
+        action VARCHAR(100) NOT NULL,
+        entity_type VARCHAR(50) NOT NULL,
+        entity_id INT,
+        old_values JSON,
+        new_values JSON,
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        created_at TIMESTAMP NOT NULL,
+        KEY idx_audit_archive_created (created_at, id),
+        KEY idx_audit_archive_user_created (user_id, created_at)
+    )
+"""
+
+CREATE_AUDIT_ACTION_COUNTS_SQL = """
+    CREATE TABLE IF NOT EXISTS audit_action_counts (
+        action VARCHAR(100) PRIMARY KEY,
+        count BIGINT NOT NULL DEFAULT 0
+    )
+"""
+
+# user_id 0 = evenimente fără utilizator
+CREATE_AUDIT_USER_COUNTS_SQL = """
+    CREATE TABLE IF NOT EXISTS audit_user_counts (
+        user_id INT PRIMARY KEY,
+        count BIGINT NOT NULL DEFAULT 0,
+        KEY idx_audit_user_counts_count (count)
+    )
+"""
+
+INSERT_AUDIT_SQL = """
+    INSERT INTO audit_logs (user_id, action, entity_type, entity_id, old_values, new_values,
+                            ip_address, user_agent, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _dump(values):
+    return serialization.dumps(values).decode('utf-8') if values else None
+
+
+def count_events(cursor, rows):
+    """Incrementează contoarele de statistici pentru rândurile scrise, în tranzacția curentă"""
+    actions = Counter(row[1] for row in rows)
+    users = Counter(row[0] or 0 for row in rows)
+    cursor.executemany("""
+        INSERT INTO audit_action_counts (action, count) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+    """, list(actions.items()))
+    cursor.executemany("""
+        INSERT INTO audit_user_counts (user_id, count) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+    """, list(users.items()))
+
+
+def fold_user_counts(cursor, user_id):
+    """Înaintea ștergerii unui utilizator: contorul lui trece la user_id 0, ca evenimentele lui (user_id NULL)"""
+    cursor.execute("SELECT count FROM audit_user_counts WHERE user_id = %s FOR UPDATE", (user_id,))
+    row = cursor.fetchone()
+    if not row:
+        return
+    cursor.execute("""
+        INSERT INTO audit_user_counts (user_id, count) VALUES (0, %s)
+        ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+    """, (row['count'],))
+    cursor.execute("DELETE FROM audit_user_counts WHERE user_id = %s", (user_id,))
+
+
+def _write_rows(cursor, rows):
+    cursor.executemany(INSERT_AUDIT_SQL, rows)
+    count_events(cursor, rows)
+    resource_versions.bump(cursor, "audit_logs")
+
+
+def _clear_missing_users(cursor, rows):
+    """Rândurile cu user_id șters între timp primesc user_id NULL; întoarce (rânduri, câte au fost modificate)"""
+    user_ids = {row[0] for row in rows if row[0] is not None}
+    if not user_ids:
+        return rows, 0
+    cursor.execute(f"SELECT id FROM users WHERE id IN ({', '.join(['%s'] * len(user_ids))})", list(user_ids))
+    existing = {row['id'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+    missing = user_ids - existing
+    if not missing:
+        return rows, 0
+    cleared = [(None,) + row[1:] if row[0] in missing else row for row in rows]
+    return cleared, sum(1 for row in rows if row[0] in missing)
+
+
+def _write_salvaged(cursor, rows):
+    rows, cleared = _clear_missing_users(cursor, rows)
+    _write_rows(cursor, rows)
+    return cleared
+
+
+async def _database_available():
+    try:
+        await repository.fetch_value("SELECT 1")
+        return True
+    except Exception:
+        return False
+
+
+def backfill_counters(cursor):
+    """Reconstruiește contoarele din audit_logs și audit_logs_archive"""
+    cursor.execute("DELETE FROM audit_action_counts")
+    cursor.execute("DELETE FROM audit_user_counts")
+    cursor.execute("""
+        INSERT INTO audit_action_counts (action, count)
+        SELECT action, COUNT(*) FROM (
+            SELECT action FROM audit_logs UNION ALL SELECT action FROM audit_logs_archive
+        ) logs GROUP BY action
+    """)
+    # Arhiva păstrează id-urile utilizatorilor șterși; evenimentele lor intră la user_id 0
+    cursor.execute("""
+        INSERT INTO audit_user_counts (user_id, count)
+        SELECT COALESCE(u.id, 0), COUNT(*) FROM (
+            SELECT user_id FROM audit_logs UNION ALL SELECT user_id FROM audit_logs_archive
+        ) logs LEFT JOIN users u ON u.id = logs.user_id
+        GROUP BY COALESCE(u.id, 0)
+    """)
+
+
+ARCHIVE_LOCK = "kpi:audit_archive"
+
+
+def archive_audit_logs(retention_days=AUDIT_RETENTION_DAYS, batch_size=AUDIT_ARCHIVE_BATCH_SIZE):
+    """Mută în audit_logs_archive evenimentele mai vechi de retention_days, în loturi
+
+    Rulează în executorul bazei de date; fiecare lot are propria tranzacție,
+    ca tabelul principal să nu fie blocat pe durata rotației. Cu mai mulți
+    worker-i, doar cel care obține lock-ul rulează rotația; ceilalți întorc 0.
+    """
+    with repository.named_lock(ARCHIVE_LOCK) as acquired:
+        if not acquired:
+            logger.info("Audit archiving already running in another worker")
+            return 0
+        return _archive_batches(retention_days, batch_size)
+
+
+def _archive_batches(retention_days, batch_size):
+    before = datetime.datetime.now() - datetime.timedelta(days=retention_days)
+
+    def move_batch(cursor):
+        cursor.execute("SELECT id FROM audit_logs WHERE created_at < %s ORDER BY created_at, id LIMIT %s",
+                       (before, batch_size))
+        ids = [row['id'] for row in cursor.fetchall()]
+        if not ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"INSERT IGNORE INTO audit_logs_archive ({AUDIT_COLUMNS}) "
+                       f"SELECT {AUDIT_COLUMNS} FROM audit_logs WHERE id IN ({placeholders})", ids)
+        cursor.execute(f"DELETE FROM audit_logs WHERE id IN ({placeholders})", ids)
+        resource_versions.bump(cursor, "audit_logs")
+        return len(ids)
+
+    moved = 0
+    while True:
+        count = repository.transaction_sync(move_batch)
+        moved += count
+        if count < batch_size:
+            break
+    if moved:
+        logger.info(f"Archived {moved} audit events older than {before:%Y-%m-%d}")
+    return moved
+
+
+class AuditPipeline:
+    """Coadă limitată + scriere în loturi a evenimentelor de audit"""
+
+    def __init__(self, queue_size=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL, enqueue_timeout=AUDIT_ENQUEUE_TIMEOUT):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.on_flush = None
+        self._queue = None
+        self._wake = None
+        self._stopping = None
+        self._task = None
+        # Lot eșuat, reîncercat la următoarea golire
+        self._retry = []
+        self._retry_attempts = 0
+        self._stats = {
+            'enqueued': 0, 'written': 0, 'batches': 0, 'backpressure_waits': 0,
+            'overflow': 0, 'flush_failures': 0, 'salvaged_batches': 0, 'user_ids_cleared': 0,
+            'dead_letters': 0, 'peak_queue_depth': 0, 'last_flush_ms': 0.0
+        }
+
+    def start(self, on_flush=None):
+        """Pornește task-ul de scriere; on_flush(rows) (funcție sau corutină) este apelat după fiecare lot scris"""
+        self.on_flush = on_flush
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Audit pipeline started (batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    async def stop(self):
+        """Oprește task-ul după ce scrie toate evenimentele rămase în coadă"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        await self._task
+        self._task = None
+        if self._retry:
+            await self._salvage(self._retry)
+        if self._retry or not self._queue.empty():
+            # Baza de date nu mai acceptă scrieri: păstrăm evenimentele în log
+            for row in self._retry + self._drain_queue():
+                logger.error(f"Audit event lost on shutdown: {row}")
+            self._retry = []
+        logger.info("Audit pipeline drained")
+
+    async def record(self, user_id, action, entity_type, entity_id=None, old_values=None,
+                     new_values=None, ip_address=None, user_agent=None):
+        """Pune un eveniment în coadă fără a aștepta scrierea în baza de date"""
+        row = (user_id, action, entity_type, entity_id, _dump(old_values), _dump(new_values),
+               ip_address, user_agent, datetime.datetime.now())
+        if self._queue is None:
+            # Pipeline oprit (ex. scripturi): scriere directă
+            await repository.transaction(lambda cursor: _write_rows(cursor, [row]))
+            await self._notify([row])
+            return
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._stats['backpressure_waits'] += 1
+            try:
+                await asyncio.wait_for(self._queue.put(row), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self._stats['overflow'] += 1
+                logger.warning(f"Audit queue full, event dropped: {action} {entity_type} {entity_id}")
+                return
+        self._stats['enqueued'] += 1
+        self._wake.set()
+        self._stats['peak_queue_depth'] = max(self._stats['peak_queue_depth'], self._queue.qsize())
+
+    def _drain_queue(self, limit=None):
+        rows = []
+        while not self._queue.empty() and (limit is None or len(rows) < limit):
+            rows.append(self._queue.get_nowait())
+        return rows
+
+    async def _flush(self):
+        """Scrie un lot; întoarce False dacă scrierea a eșuat"""
+        rows = self._retry or self._drain_queue(self.batch_size)
+        if not rows:
+            return True
+        started = time.perf_counter()
+        try:
+            await repository.transaction(lambda cursor: _write_rows(cursor, rows))
+        except Exception as e:
+            self._stats['flush_failures'] += 1
+            self._retry = rows
+            self._retry_attempts += 1
+            logger.error(f"Audit flush of {len(rows)} events failed ({self._retry_attempts}): {e}")
+            if self._retry_attempts < AUDIT_MAX_BATCH_RETRIES:
+                return False
+            return await self._salvage(rows)
+        self._retry = []
+        self._retry_attempts = 0
+        self._stats['written'] += len(rows)
+        self._stats['batches'] += 1
+        self._stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        await self._notify(rows)
+        return True
+
+    async def _salvage(self, rows):
+        """Lot care eșuează repetat: fără user_id-urile șterse, apoi rând cu rând; întoarce False la pană de bază de date"""
+        if not await _database_available():
+            return False
+        self._stats['salvaged_batches'] += 1
+        try:
+            cleared = await repository.transaction(lambda cursor: _write_salvaged(cursor, rows))
+            self._stats['user_ids_cleared'] += cleared
+            written = rows
+        except Exception:
+            written = []
+            for index, row in enumerate(rows):
+                try:
+                    cleared = await repository.transaction(lambda cursor, row=row: _write_salvaged(cursor, [row]))
+                    self._stats['user_ids_cleared'] += cleared
+                    written.append(row)
+                except Exception as e:
+                    if not await _database_available():
+                        # Nu rândul este problema: restul lotului rămâne de reîncercat
+                        self._retry = rows[index:]
+                        self._stats['written'] += len(written)
+                        if written:
+                            await self._notify(written)
+                        return False
+                    self._stats['dead_letters'] += 1
+                    logger.error(f"Audit event dropped after {self._retry_attempts} failed batches: {row} ({e})")
+        self._retry = []
+        self._retry_attempts = 0
+        self._stats['written'] += len(written)
+        self._stats['batches'] += 1
+        if written:
+            await self._notify(written)
+        return True
+
+    async def _notify(self, rows):
+        if self.on_flush is not None:
+            try:
+                result = self.on_flush(rows)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Audit on_flush callback failed: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                # Așteaptă primul eveniment, apoi lasă lotul să se umple până la intervalul de golire
+                if not self._retry:
+                    await self._wake.wait()
+                self._wake.clear()
+                stopping = self._stopping.is_set()
+                if not stopping and (self._retry or self._queue.qsize() < self.batch_size):
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+                        stopping = True
+                    except asyncio.TimeoutError:
+                        pass
+                while self._retry or not self._queue.empty():
+                    if not await self._flush():
+                        break
+                if stopping:
+                    return
+            except Exception as e:
+                logger.error(f"Audit pipeline error: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    def get_stats(self):
+        stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        stats['pending_retry'] = len(self._retry)
+        stats['queue_size'] = self.queue_size
+        stats['batch_size'] = self.batch_size
+        stats['flush_interval'] = self.flush_interval
+        return stats
+
+
+audit_pipeline = AuditPipeline()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark evenimente de modificare (SSE): distribuirea către --subscribers abonați
+
+Implicit rulează în proces, fără server și fără bază de date: un EventBus cu
+abonați pe toate canalele (toate evenimentele, departament, utilizator), câte
+un consumator asyncio per abonat, și --events evenimente trimise cu --rate pe
+secundă. Raportează costul distribuirii unui eveniment, latența până la
+consumator (p50/p95/p99), livrările, resync-urile și memoria per abonat.
+
+Cu --base-url deschide --subscribers conexiuni SSE reale la server, declanșează
+--events scrieri (PUT pe un utilizator existent, cu aceleași valori) și
+măsoară latența de la răspunsul scrierii până la primirea evenimentului de
+fiecare conexiune. Se afișează și numărul de cereri pe secundă pe care
+l-ar genera aceiași clienți cu polling la --poll-interval secunde.
+
+Utilizare (din directorul backend):
+    python benchmarks/events_fanout.py --subscribers 1000 --events 500
+    python benchmarks/events_fanout.py --base-url http://localhost:8000 --subscribers 1000 --events 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import urllib.request
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+API = "/time-monitoring/api"
+DEPARTMENTS = ["IT", "HR", "Finance", "Sales", "Operations", "Marketing", "Legal", "Support"]
+
+
+def percentile(sorted_values, fraction):
+    """Percentilă nearest-rank pe o listă deja sortată"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def print_latencies(label, latencies_ms):
+    latencies_ms.sort()
+    print(f"{label}: p50 {percentile(latencies_ms, 0.50):.2f} ms, p95 {percentile(latencies_ms, 0.95):.2f} ms, "
+          f"p99 {percentile(latencies_ms, 0.99):.2f} ms, max {latencies_ms[-1] if latencies_ms else 0:.2f} ms")
+
+
+def channel_for(index, users):
+    """Amestecul de canale: 10% toate evenimentele, 60% departament, 30% utilizator"""
+    bucket = index % 10
+    if bucket == 0:
+        return None, None
+    if bucket < 7:
+        return DEPARTMENTS[index % len(DEPARTMENTS)], None
+    return None, index % users + 1
+
+
+async def run_in_process(args):
+    import events
+
+    bus = events.EventBus()
+    bus.last_id = 0
+    rng = random.Random(42)
+    sent_at = {}
+    latencies_ms = []
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    subscribers = [bus.subscribe(*channel_for(i, args.users)) for i in range(args.subscribers)]
+    after, _ = tracemalloc.get_traced_memory()
+
+    async def consume(subscriber):
+        while True:
+            frame = await subscriber.queue.get()
+            if frame.startswith(b"id: "):
+                event_id = int(frame[4:frame.index(b"\n")])
+                latencies_ms.append((time.perf_counter() - sent_at[event_id]) * 1000)
+
+    consumers = [asyncio.create_task(consume(subscriber)) for subscriber in subscribers]
+    dispatch_us = []
+    started = time.perf_counter()
+    for event_id in range(1, args.events + 1):
+        user_id = rng.randint(1, args.users)
+        broadcast = rng.random() < 0.05
+        row = {
+            "id": event_id,
+            "resources": "projects" if broadcast else "tasks",
+            "action": "updated",
+            "entity_id": rng.randint(1, 100000),
+            "user_id": None if broadcast else user_id,
+            "department": None if broadcast else DEPARTMENTS[user_id % len(DEPARTMENTS)],
+        }
+        sent_at[event_id] = time.perf_counter()
+        bus.dispatch([row])
+        dispatch_us.append((time.perf_counter() - sent_at[event_id]) * 1_000_000)
+        await asyncio.sleep(1 / args.rate if args.rate else 0)
+    while any(not subscriber.queue.empty() for subscriber in subscribers):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    for consumer in consumers:
+        consumer.cancel()
+    tracemalloc.stop()
+
+    stats = bus.get_stats()
+    dispatch_us.sort()
+    print(f"{args.subscribers} abonați, {args.events} evenimente în {elapsed:.2f}s")
+    print(f"distribuire: p50 {percentile(dispatch_us, 0.50):.0f} µs, p99 {percentile(dispatch_us, 0.99):.0f} µs "
+          f"per eveniment; {stats['delivered']} livrări ({stats['delivered'] / args.events:.0f} per eveniment), "
+          f"{stats['resyncs']} resync")
+    print_latencies("latență până la consumator", latencies_ms)
+    print(f"memorie: {(after - before) / args.subscribers / 1024:.1f} KB per abonat")
+    return stats['resyncs'] == 0
+
+
+async def open_stream(base_url, subscriber_index, users, received, ready):
+    """O conexiune SSE brută (fără dependențe); înregistrează momentul primirii fiecărui eveniment"""
+    parts = urlsplit(base_url)
+    department, user_id = channel_for(subscriber_index, users)
+    query = f"department={department}" if department else (f"user_id={user_id}" if user_id else "")
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    writer.write(f"GET {API}/events?{query} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                 f"Accept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    ready.set()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b"data: {\"resources\""):
+                payload = json.loads(line[6:])
+                received.append((time.perf_counter(), payload.get("id")))
+    finally:
+        writer.close()
+
+
+def http_json(base_url, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+async def run_against_server(args):
+    base_url = args.base_url.rstrip("/")
+    users = http_json(base_url, "GET", f"{API}/users")
+    if not users:
+        raise SystemExit("Serverul nu are utilizatori (rulați benchmarks/seed.py)")
+
+    received = []
+    ready_events = [asyncio.Event() for _ in range(args.subscribers)]
+    streams = [asyncio.create_task(open_stream(base_url, i, len(users), received, ready_events[i]))
+               for i in range(args.subscribers)]
+    await asyncio.gather(*(ready.wait() for ready in ready_events))
+    # Poller-ul fiecărui worker trebuie să fi citit ultimul id înainte de prima scriere
+    await asyncio.sleep(2)
+    failed = sum(1 for stream in streams if stream.done())
+
+    latencies_ms = []
+    loop = asyncio.get_running_loop()
+    for _ in range(args.events):
+        user = random.choice(users)
+        body = {key: user[key] for key in ("name", "email", "role", "department")}
+        mark = len(received)
+        await loop.run_in_executor(None, http_json, base_url, "PUT", f"{API}/users/{user['id']}", body)
+        written = time.perf_counter()
+        await asyncio.sleep(args.settle)
+        latencies_ms.extend((at - written) * 1000 for at, entity_id in received[mark:] if entity_id == user['id'])
+
+    for stream in streams:
+        stream.cancel()
+    print(f"{args.subscribers} conexiuni SSE ({failed} eșuate), {args.events} scrieri, {len(latencies_ms)} livrări")
+    if latencies_ms:
+        print_latencies("latență scriere -> client", latencies_ms)
+    print(f"polling echivalent la {args.poll_interval}s: {args.subscribers / args.poll_interval:.0f} cereri/s "
+          f"(SSE: o interogare per worker la fiecare EVENTS_POLL_INTERVAL)")
+    return failed == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark evenimente SSE KPI Time Tracker API")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=200.0, help="Evenimente pe secundă (în proces)")
+    parser.add_argument("--users", type=int, default=200, help="Utilizatori distincți (în proces)")
+    parser.add_argument("--base-url", help="Măsoară pe un server pornit, prin conexiuni SSE reale")
+    parser.add_argument("--settle", type=float, default=1.5,
+                        help="Așteptarea după fiecare scriere pentru livrare (cu --base-url)")
+    parser.add_argument("--poll-interval", type=float, default=10.0,
+                        help="Intervalul de polling cu care se compară (cu --base-url)")
+    args = parser.parse_args()
+
+    ok = asyncio.run(run_against_server(args) if args.base_url else run_in_process(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark timp de pornire: importul aplicației (main) într-un proces nou
+
+Rulează `python -X importtime -c "import main"` de --repeat ori și raportează
+mediana timpului total de import, modulele cu cel mai mare cost cumulativ și
+RSS-ul procesului după import. Dependențele grele folosite doar de exporturi
+(HEAVY_MODULES) nu trebuie încărcate la pornire: dacă apar, codul de ieșire
+este 1.
+
+Rezultatele se scriu în JSON (--output); cu --compare, o creștere a timpului
+de import sau a RSS-ului peste --threshold procente este tot o regresie.
+
+Utilizare (din directorul backend):
+    python benchmarks/import_time.py --output import_before.json
+    python benchmarks/import_time.py --compare import_before.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Încărcate la nevoie (exporturi, server multi-worker), niciodată la importul aplicației
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "gunicorn", "xml.sax")
+
+PROBE = """
+import main
+import json, resource, sys
+print(json.dumps({
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "heavy": sorted(name for name in sys.modules if any(name == m or name.startswith(m + '.') for m in %r)),
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Liniile -X importtime: (modul, self µs, cumulativ µs, nivel de imbricare)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), level))
+    return entries
+
+
+def measure_once():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE % (HEAVY_MODULES,)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importul aplicației a eșuat:\n{result.stderr[-2000:]}")
+    entries = parse_importtime(result.stderr)
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    # Costul cumulativ al lui main include toate modulele importate de aplicație
+    total_us = next(cumulative for name, _, cumulative, level in entries if name == "main" and level == 0)
+    return total_us, entries, probe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark timp de import KPI Time Tracker API")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Câte module să afișeze")
+    parser.add_argument("--output", help="Fișierul JSON cu rezultatele")
+    parser.add_argument("--compare", help="Rezultatele unei rulări anterioare (JSON)")
+    parser.add_argument("--threshold", type=float, default=15.0, help="Prag de regresie în procente")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.repeat)]
+    totals = sorted(total for total, _, _ in runs)
+    median_us = statistics.median(totals)
+    # Detaliile provin din rularea cea mai apropiată de mediană
+    _, entries, probe = min(runs, key=lambda run: abs(run[0] - median_us))
+
+    top = sorted(entries, key=lambda entry: entry[2], reverse=True)[:args.top]
+    results = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "import_ms": round(median_us / 1000, 1),
+        "import_ms_min": round(totals[0] / 1000, 1),
+        "import_ms_max": round(totals[-1] / 1000, 1),
+        "rss_kb": probe["rss_kb"],
+        "modules": probe["modules"],
+        "heavy_modules": probe["heavy"],
+        "top": [{"module": name, "self_ms": round(self_us / 1000, 2), "cumulative_ms": round(cumulative_us / 1000, 2)}
+                for name, self_us, cumulative_us, _ in top],
+    }
+
+    print(f"import main: {results['import_ms']} ms (min {results['import_ms_min']}, max {results['import_ms_max']}), "
+          f"RSS {results['rss_kb'] / 1024:.1f} MB, {results['modules']} module")
+    print(f"\n{'modul':<48}{'self ms':>10}{'cumulativ ms':>14}")
+    for entry in results["top"]:
+        print(f"{entry['module']:<48}{entry['self_ms']:>10}{entry['cumulative_ms']:>14}")
+
+    failed = False
+    if results["heavy_modules"]:
+        print(f"\n⚠️  Module grele încărcate la pornire: {', '.join(results['heavy_modules'])}")
+        failed = True
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        for key, label in (("import_ms", "timp import"), ("rss_kb", "RSS")):
+            before = baseline.get(key)
+            if not before:
+                continue
+            delta = (results[key] - before) / before * 100
+            flag = "  ⚠️" if delta > args.threshold else ""
+            failed = failed or bool(flag)
+            print(f"{label:<14}{before:>10} -> {results[key]:<10}{delta:>+8.1f}%{flag}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nRezultate salvate în {args.output}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
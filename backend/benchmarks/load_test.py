@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test de încărcare: throughput în funcție de numărul de cereri concurente
+
+Rulează aceleași endpoint-uri GET la niveluri crescânde de concurență și
+raportează cereri/secundă și latența p50/p95. Cu handler-e care nu blochează
+event loop-ul, throughput-ul trebuie să crească odată cu concurența până la
+dimensiunea pool-ului de conexiuni.
+
+Utilizare:
+    python benchmarks/load_test.py --base-url http://localhost:8000 --concurrency 1,4,16,64
+"""
+
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PATHS = [
+    "/time-monitoring/api/users",
+    "/time-monitoring/api/projects",
+    "/time-monitoring/api/departments",
+    "/time-monitoring/api/stats/overview",
+]
+
+
+def _request(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = 200 <= response.status < 400
+    except Exception:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_level(base_url, paths, concurrency, requests_per_worker, timeout):
+    """Rulează un nivel de concurență și întoarce statisticile"""
+    urls = [base_url + paths[i % len(paths)] for i in range(concurrency * requests_per_worker)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda url: _request(url, timeout), urls))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(duration for duration, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": errors,
+        "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test KPI Time Tracker API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", default="1,4,16,64",
+                        help="Niveluri de concurență separate prin virgulă")
+    parser.add_argument("--requests-per-worker", type=int, default=25)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="Endpoint de testat (se poate repeta)")
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+
+    print(f"{'concurrency':>11} {'requests':>8} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    baseline = None
+    for level in levels:
+        stats = run_level(args.base_url.rstrip("/"), paths, level, args.requests_per_worker, args.timeout)
+        baseline = baseline or stats["throughput_rps"]
+        print(f"{stats['concurrency']:>11} {stats['requests']:>8} {stats['errors']:>6} "
+              f"{stats['throughput_rps']:>9.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f}"
+              f"   x{stats['throughput_rps'] / baseline if baseline else 0:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Suită de performanță pentru API: toate endpoint-urile, concurent, cu rezultate JSON
+
+Pentru fiecare scenariu (endpoint GET, export sau ciclu de scriere) trimite
+--requests cereri cu --concurrency fire de execuție și raportează latența
+p50/p95/p99, throughput-ul și erorile. La final rulează un amestec al tuturor
+scenariilor de citire. Cu --spawn pornește serverul local (uvicorn) și
+măsoară RSS-ul maxim al procesului.
+
+Rezultatele se scriu în JSON (--output); cu --compare se afișează diferențele
+față de o rulare anterioară, iar codul de ieșire este 1 dacă p95 sau
+throughput-ul regresează peste --threshold procente.
+
+Utilizare (din directorul backend, după benchmarks/seed.py):
+    python benchmarks/run_suite.py --spawn --database kpi_bench --output before.json
+    python benchmarks/run_suite.py --spawn --database kpi_bench --compare before.json --output after.json
+    DB_BACKEND=sqlite python benchmarks/run_suite.py --spawn --database /tmp/kpi_bench.sqlite3 --output sqlite.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+API = "/time-monitoring/api"
+
+
+def percentile(sorted_values, fraction):
+    """Percentilă nearest-rank pe o listă deja sortată"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def http(base_url, method, path, body=None, headers=None, timeout=60.0):
+    """Trimite o cerere; întoarce (status, corp, durată în secunde)"""
+    data = None
+    headers = dict(headers or {})
+    if body is not None and not isinstance(body, bytes):
+        data = json.dumps(body).encode()
+        headers.setdefault("Content-Type", "application/json")
+    elif body is not None:
+        data = body
+    request = urllib.request.Request(base_url + path, data=data, method=method, headers=headers)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        status = e.code
+    except Exception:
+        payload = b""
+        status = 0
+    return status, payload, time.perf_counter() - started
+
+
+class Server:
+    """Serverul uvicorn pornit local, cu eșantionarea memoriei procesului"""
+
+    def __init__(self, port, database=None, workers=None):
+        self.port = port
+        env = dict(os.environ)
+        if database:
+            # Pe SQLite, --database este fișierul populat cu benchmarks/seed.py
+            env['SQLITE_PATH' if env.get('DB_BACKEND', 'mysql').lower() == 'sqlite' else 'DB_NAME'] = database
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning"]
+        if workers:
+            command += ["--workers", str(workers)]
+        self.process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+        self.peak_rss_kb = 0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def wait_ready(self, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("Serverul s-a oprit la pornire")
+            status, _, _ = http(self.base_url, "GET", f"{API}/system/db-pool", timeout=2.0)
+            if status == 200:
+                self._sampler.start()
+                return
+            time.sleep(0.5)
+        raise RuntimeError("Serverul nu a pornit în timp util")
+
+    def _pids(self):
+        # Procesul principal și, cu --workers, procesele copil
+        pids = [self.process.pid]
+        try:
+            with open(f"/proc/{self.process.pid}/task/{self.process.pid}/children") as f:
+                pids += [int(pid) for pid in f.read().split()]
+        except OSError:
+            pass
+        return pids
+
+    def _rss_kb(self):
+        total = 0
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total += int(line.split()[1])
+            except OSError:
+                pass
+        return total
+
+    def _sample(self):
+        while not self._stop.wait(0.2):
+            self.peak_rss_kb = max(self.peak_rss_kb, self._rss_kb())
+
+    def stop(self):
+        self._stop.set()
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def discover(base_url):
+    """Alege din datele populate valorile pentru parametrii de cale"""
+    def get_json(path):
+        status, payload, _ = http(base_url, "GET", path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} -> {status}; rulați întâi benchmarks/seed.py")
+        return json.loads(payload)
+
+    users = get_json(f"{API}/users")
+    projects = get_json(f"{API}/projects")
+    tasks = get_json(f"{API}/tasks?limit=1")
+    if not users or not projects or not tasks:
+        raise RuntimeError("Baza de date este goală; rulați întâi benchmarks/seed.py")
+    task = tasks[0]
+    date = task['date']
+    return {
+        "user": users[0],
+        "department": users[0]['department'],
+        "project": projects[0],
+        "module_type": projects[0]['module_type'],
+        "task": task,
+        "date": date,
+        "month_start": date[:8] + "01",
+    }
+
+
+def read_scenarios(ctx):
+    """Scenarii de citire: (nume, metodă, cale)"""
+    user, task = ctx['user'], ctx['task']
+    return [
+        ("users", "GET", f"{API}/users"),
+        ("user by email", "GET", f"{API}/users/email/{quote(user['email'])}"),
+        ("departments", "GET", f"{API}/departments"),
+        ("projects", "GET", f"{API}/projects"),
+        ("projects by department", "GET", f"{API}/projects/department/{quote(ctx['department'])}"),
+        ("projects by module", "GET", f"{API}/projects/module/{quote(ctx['module_type'])}"),
+        ("tasks page", "GET", f"{API}/tasks"),
+        ("tasks by department", "GET", f"{API}/tasks/department/{quote(ctx['department'])}"),
+        ("tasks by user", "GET", f"{API}/tasks/user/{user['id']}"),
+        ("tasks by date", "GET", f"{API}/tasks/date/{ctx['date']}"),
+        ("task comments", "GET", f"{API}/tasks/{task['id']}/comments"),
+        ("comments batch (department page)", "GET", f"{API}/comments?department={quote(ctx['department'])}"),
+        ("comment counts (department page)", "GET",
+         f"{API}/comments?department={quote(ctx['department'])}&counts_only=true"),
+        ("audit logs", "GET", f"{API}/audit-logs"),
+        ("audit stats", "GET", f"{API}/audit-logs/stats"),
+        ("stats overview", "GET", f"{API}/stats/overview"),
+        ("stats daily", "GET", f"{API}/stats/daily/{ctx['date']}"),
+        ("system db-pool", "GET", f"{API}/system/db-pool"),
+    ]
+
+
+def export_scenarios(ctx):
+    month = f"date_from={ctx['month_start']}&date_to={ctx['date']}"
+    return [
+        ("export json (month)", "GET", f"{API}/export/json?{month}"),
+        ("export ndjson (month)", "GET", f"{API}/export/json?format=ndjson&{month}"),
+        ("export xml gzip (month)", "GET", f"{API}/export/xml?gzip=true&{month}"),
+        ("export excel (month)", "GET", f"{API}/export/excel?{month}"),
+    ]
+
+
+def write_cycle(ctx):
+    """Creează, actualizează, comentează și șterge un task; întoarce (ok, durată)"""
+    def cycle(base_url):
+        started = time.perf_counter()
+        task = {
+            "user_id": ctx['user']['id'], "project_id": ctx['project']['id'],
+            "description": "benchmark write cycle", "hours": random.randint(1, 8), "date": ctx['date'],
+        }
+        status, payload, _ = http(base_url, "POST", f"{API}/tasks", task)
+        if status != 200:
+            return False, time.perf_counter() - started
+        task_id = json.loads(payload)['id']
+        ok = http(base_url, "PUT", f"{API}/tasks/{task_id}", dict(task, id=task_id, hours=task['hours'] + 1))[0] == 200
+        status, payload, _ = http(base_url, "POST", f"{API}/tasks/{task_id}/comments",
+                                  {"task_id": task_id, "user_id": ctx['user']['id'], "comment": "benchmark"})
+        ok = ok and status == 200
+        ok = http(base_url, "DELETE", f"{API}/tasks/{task_id}")[0] == 200 and ok
+        return ok, time.perf_counter() - started
+    return cycle
+
+
+def run_scenario(base_url, requests, concurrency, call):
+    """call(base_url) -> (ok, durată); rulat de requests ori cu concurrency fire"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: call(base_url), range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(duration for _, duration in results)
+    return {
+        "requests": len(results),
+        "errors": sum(1 for ok, _ in results if not ok),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def request_call(method, path):
+    def call(base_url):
+        status, _, duration = http(base_url, method, path)
+        return 200 <= status < 400, duration
+    return call
+
+
+def compare(current, baseline, threshold):
+    """Afișează diferențele față de baseline; întoarce lista regresiilor"""
+    regressions = []
+    print(f"\n{'scenariu':<28}{'p95 ms':>10}{'Δ p95':>9}{'req/s':>10}{'Δ req/s':>9}")
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        p95_delta = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        rps_delta = ((result['throughput_rps'] - before['throughput_rps']) / before['throughput_rps'] * 100
+                     if before['throughput_rps'] else 0.0)
+        flag = ""
+        if p95_delta > threshold or rps_delta < -threshold:
+            regressions.append(name)
+            flag = "  ⚠️"
+        print(f"{name:<28}{result['p95_ms']:>10}{p95_delta:>+8.1f}%{result['throughput_rps']:>10}{rps_delta:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suită de performanță KPI Time Tracker API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--spawn", action="store_true", help="Pornește serverul local și măsoară RSS-ul")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="Numărul de worker-i uvicorn pentru --spawn")
+    parser.add_argument("--database", help="Baza de date folosită de server cu --spawn (DB_NAME; SQLITE_PATH pe SQLite)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Cereri per scenariu")
+    parser.add_argument("--export-requests", type=int, default=8)
+    parser.add_argument("--skip-writes", action="store_true")
+    parser.add_argument("--skip-exports", action="store_true")
+    parser.add_argument("--output", help="Fișierul JSON cu rezultatele")
+    parser.add_argument("--compare", help="Rezultatele unei rulări anterioare (JSON)")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Prag de regresie în procente")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url.rstrip("/")
+    if args.spawn:
+        server = Server(args.port, args.database, args.workers)
+        server.wait_ready()
+        base_url = server.base_url
+
+    try:
+        ctx = discover(base_url)
+        scenarios = {}
+        print(f"{'scenariu':<28}{'req':>6}{'err':>5}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+
+        def record(name, result):
+            scenarios[name] = result
+            print(f"{name:<28}{result['requests']:>6}{result['errors']:>5}{result['throughput_rps']:>9}"
+                  f"{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}")
+
+        reads = read_scenarios(ctx)
+        for name, method, path in reads:
+            record(name, run_scenario(base_url, args.requests, args.concurrency, request_call(method, path)))
+
+        if not args.skip_exports:
+            for name, method, path in export_scenarios(ctx):
+                record(name, run_scenario(base_url, args.export_requests, min(args.concurrency, 4),
+                                          request_call(method, path)))
+
+        if not args.skip_writes:
+            record("task write cycle", run_scenario(base_url, args.requests // 4 or 1, args.concurrency, write_cycle(ctx)))
+
+        # Amestec: toate citirile intercalate, ca trafic real
+        calls = [request_call(method, path) for _, method, path in reads]
+        record("mixed reads", run_scenario(base_url, args.requests * 4, args.concurrency,
+                                           lambda url: random.choice(calls)(url)))
+    finally:
+        if server is not None:
+            server.stop()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "base_url": base_url,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "workers": args.workers,
+            "python": platform.python_version(),
+        },
+        "scenarios": scenarios,
+        "server": {"peak_rss_mb": round(server.peak_rss_kb / 1024, 1) if server else None},
+    }
+    if server:
+        print(f"\nRSS maxim server: {results['server']['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Rezultate salvate în {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ Regresii peste {args.threshold}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
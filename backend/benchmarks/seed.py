@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Populează o bază de date locală (MySQL/MariaDB sau SQLite) cu date sintetice pentru benchmark
+
+Generează utilizatori, proiecte, task-uri, comentarii și evenimente de audit
+la scara aleasă, apoi reconstruiește totalurile, daily_rollups și contoarele
+de audit, exact ca după migrații. Datele sunt deterministe pentru același --seed.
+
+Folosiți o bază de date separată (--database); tabelele sunt golite doar cu --reset.
+Cu DB_BACKEND=sqlite, --database este calea fișierului (implicit SQLITE_PATH).
+
+Utilizare (din directorul backend):
+    python benchmarks/seed.py --database kpi_bench --scale medium --reset
+    python benchmarks/seed.py --database kpi_bench --tasks 250000 --reset
+    DB_BACKEND=sqlite python benchmarks/seed.py --database /tmp/kpi_bench.sqlite3 --reset
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+SCALES = {
+    'small': {'users': 50, 'projects': 20, 'tasks': 10000, 'comments': 2000, 'audit_logs': 5000},
+    'medium': {'users': 200, 'projects': 50, 'tasks': 100000, 'comments': 20000, 'audit_logs': 50000},
+    'large': {'users': 1000, 'projects': 200, 'tasks': 1000000, 'comments': 200000, 'audit_logs': 500000},
+}
+
+DEPARTMENTS = ["IT", "HR", "Financiar", "Vânzări", "Marketing", "Operațiuni"]
+ROLES = ["User", "Manager", "Admin"]
+MODULE_TYPES = ["dezvoltare", "mentenanta", "suport", "consultanta"]
+AUDIT_ACTIONS = ["CREATE_TASK", "UPDATE_TASK", "DELETE_TASK", "CREATE_COMMENT", "DELETE_COMMENT",
+                 "CREATE_USER", "CREATE_PROJECT", "UPDATE_PROJECT"]
+
+# Ordinea respectă cheile străine la golire
+TABLES = ["task_comments", "daily_rollups", "tasks", "audit_logs", "audit_logs_archive",
+          "audit_action_counts", "audit_user_counts", "rollup_changes", "change_events", "project_departments",
+          "projects", "users"]
+
+BATCH_SIZE = 5000
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(conn, sql, rows):
+    count = 0
+    with conn.cursor() as cursor:
+        for batch in _batches(rows):
+            conn.begin()
+            cursor.executemany(sql, batch)
+            conn.commit()
+            count += len(batch)
+    return count
+
+
+def _id_range(conn, table):
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+        return cursor.fetchone()
+
+
+def reset(conn):
+    from migrations import dialect
+
+    with conn.cursor() as cursor:
+        if dialect(conn) == 'sqlite':
+            # Fără TRUNCATE; id-urile repornesc de la 1 odată cu tabelele goale
+            for table in TABLES:
+                cursor.execute(f"DELETE FROM {table}")
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_sequence'")
+            if cursor.fetchone():
+                cursor.execute("DELETE FROM sqlite_sequence")
+        else:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for table in TABLES:
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+
+
+def seed(conn, counts, rng, days, end_date):
+    start_date = end_date - datetime.timedelta(days=days - 1)
+    timings = {}
+
+    def timed(name, fn):
+        started = time.perf_counter()
+        result = fn()
+        timings[name] = round(time.perf_counter() - started, 2)
+        print(f"  {name}: {result} rânduri în {timings[name]}s")
+
+    timed('users', lambda: _insert(conn, """
+        INSERT INTO users (name, email, role, department) VALUES (%s, %s, %s, %s)
+    """, ((f"Utilizator {i}", f"bench.user{i}@example.com", rng.choice(ROLES), rng.choice(DEPARTMENTS))
+          for i in range(1, counts['users'] + 1))))
+
+    def project_rows():
+        for i in range(1, counts['projects'] + 1):
+            specific = rng.random() < 0.3
+            departments = json.dumps(rng.sample(DEPARTMENTS, 2)) if specific else None
+            yield (f"Proiect {i}", f"Proiect sintetic {i}", rng.choice(MODULE_TYPES), 'active',
+                   'specific_departments' if specific else 'all', departments)
+
+    timed('projects', lambda: _insert(conn, """
+        INSERT INTO projects (name, description, module_type, status, visibility_type, visible_departments)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, project_rows()))
+
+    user_min, user_max = _id_range(conn, 'users')
+    project_min, project_max = _id_range(conn, 'projects')
+
+    def task_rows():
+        for i in range(counts['tasks']):
+            day = start_date + datetime.timedelta(days=rng.randrange(days))
+            created_at = datetime.datetime.combine(day, datetime.time(8)) + datetime.timedelta(seconds=rng.randrange(36000))
+            yield (rng.randint(user_min, user_max), rng.randint(project_min, project_max),
+                   f"Task sintetic {i}", rng.randint(1, 32) / 4, day, created_at)
+
+    timed('tasks', lambda: _insert(conn, """
+        INSERT INTO tasks (user_id, project_id, description, hours, date, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, task_rows()))
+
+    task_min, task_max = _id_range(conn, 'tasks')
+    if task_min is not None:
+        timed('comments', lambda: _insert(conn, """
+            INSERT INTO task_comments (task_id, user_id, comment) VALUES (%s, %s, %s)
+        """, ((rng.randint(task_min, task_max), rng.randint(user_min, user_max), f"Comentariu {i}")
+              for i in range(counts['comments']))))
+
+    def audit_rows():
+        start = datetime.datetime.combine(start_date, datetime.time(0))
+        for i in range(counts['audit_logs']):
+            created_at = start + datetime.timedelta(seconds=rng.randrange(days * 86400))
+            yield (rng.randint(user_min, user_max), rng.choice(AUDIT_ACTIONS), "task",
+                   rng.randint(1, max(counts['tasks'], 1)), json.dumps({"hours": rng.randint(1, 8)}),
+                   "127.0.0.1", "benchmark-seed", created_at)
+
+    timed('audit_logs', lambda: _insert(conn, """
+        INSERT INTO audit_logs (user_id, action, entity_type, entity_id, new_values, ip_address, user_agent, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, audit_rows()))
+    return timings
+
+
+def rebuild_derived(conn):
+    """Totaluri, daily_rollups, comment_count, project_departments și contoare de audit, reconstruite din datele inserate"""
+    import audit
+    import comments
+    import project_visibility
+    import rollups
+
+    with conn.cursor() as cursor:
+        conn.begin()
+        # Subinterogare corelată în loc de UPDATE ... JOIN: aceeași formă pe MySQL și SQLite
+        cursor.execute("""
+            UPDATE users
+            SET total_hours = (SELECT COALESCE(SUM(hours), 0) FROM tasks WHERE tasks.user_id = users.id)
+        """)
+        cursor.execute("""
+            UPDATE projects
+            SET total_hours = (SELECT COALESCE(SUM(hours), 0) FROM tasks WHERE tasks.project_id = projects.id)
+        """)
+        rollups.backfill(cursor)
+        rollups.log_full_change(cursor)
+        comments.backfill_comment_counts(cursor)
+        project_visibility.backfill(cursor)
+        audit.backfill_counters(cursor)
+    conn.commit()
+
+
+def connect(database=None):
+    """Conexiune directă la backend-ul configurat (DB_BACKEND); întoarce (conexiune, nume afișat)"""
+    from main import DB_BACKEND, get_connection_params
+
+    if DB_BACKEND == 'sqlite':
+        import sqlite_backend
+        path = database or sqlite_backend.SQLITE_PATH
+        return sqlite_backend.open_connection(path), path
+
+    import pymysql
+    params = get_connection_params()
+    if database:
+        params['database'] = database
+    return pymysql.connect(**params), params['database']
+
+
+def main():
+    from migrations import apply_migrations
+
+    parser = argparse.ArgumentParser(description="Date sintetice pentru benchmark KPI Time Tracker")
+    parser.add_argument('--database', help="Baza de date țintă (implicit cea din configurație; fișierul, pe SQLite)")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    for name in SCALES['small']:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name, help=f"Suprascrie numărul de {name}")
+    parser.add_argument('--days', type=int, default=365, help="Intervalul de zile acoperit de task-uri")
+    parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=datetime.date.today())
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help="Golește tabelele înainte de populare")
+    args = parser.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    for name in counts:
+        if getattr(args, name) is not None:
+            counts[name] = getattr(args, name)
+
+    conn, target = connect(args.database)
+    try:
+        apply_migrations(conn)
+        if args.reset:
+            reset(conn)
+        else:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM tasks")
+                if cursor.fetchone()[0]:
+                    sys.exit("❌ Baza de date conține deja task-uri; folosiți --reset pentru o populare reproductibilă")
+
+        print(f"Populare {target} ({args.scale}): {counts}")
+        started = time.perf_counter()
+        seed(conn, counts, random.Random(args.seed), args.days, args.end_date)
+        rebuild_derived(conn)
+        print(f"✅ Gata în {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
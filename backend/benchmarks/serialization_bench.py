@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark serializare: cost per rând pentru listele mari de task-uri
+
+Compară, pe rânduri sintetice identice cu cele din DictCursor (Decimal, date,
+datetime), drumul vechi al răspunsului:
+    format_datetime_fields -> validare response_model -> jsonable_encoder -> json.dumps
+cu drumul nou (serialization.fast_response): orjson direct pe rânduri.
+
+Utilizare (din directorul backend):
+    python benchmarks/serialization_bench.py --rows 100000 --repeat 3
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import BaseModel, TypeAdapter  # noqa: E402
+
+import serialization  # noqa: E402
+
+
+class TaskRow(BaseModel):
+    id: int
+    user_id: int
+    project_id: int
+    description: str
+    hours: float
+    date: datetime.date
+    created_at: str
+    user_name: str
+    user_department: str
+    project_name: str
+    module_type: str
+
+
+def make_rows(count, seed=42):
+    """Rânduri în forma întoarsă de TASK_LIST_SELECT cu DictCursor"""
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1, 8, 0, 0)
+    rows = []
+    for i in range(count):
+        created_at = start + datetime.timedelta(minutes=i)
+        rows.append({
+            'id': i + 1,
+            'user_id': rng.randint(1, 200),
+            'project_id': rng.randint(1, 50),
+            'description': f"Task {i + 1}: implementare și testare",
+            'hours': Decimal(rng.randint(1, 32)) / 4,
+            'date': created_at.date(),
+            'created_at': created_at,
+            'user_name': f"Utilizator {rng.randint(1, 200)}",
+            'user_department': rng.choice(["IT", "HR", "Financiar", "Vânzări"]),
+            'project_name': f"Proiect {rng.randint(1, 50)}",
+            'module_type': rng.choice(["dezvoltare", "mentenanta", "suport"]),
+        })
+    return rows
+
+
+def _copy(rows):
+    return [dict(row) for row in rows]
+
+
+def before_dict(rows):
+    """Drumul vechi cu response_model=List[dict]"""
+    for row in rows:
+        row['created_at'] = row['created_at'].isoformat()
+    validated = TypeAdapter(List[dict]).validate_python(rows)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def before_typed(rows):
+    """Drumul vechi cu un response_model tipizat (validare Pydantic per rând)"""
+    for row in rows:
+        row['created_at'] = row['created_at'].isoformat()
+    validated = TypeAdapter(List[TaskRow]).validate_python(rows)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def after(rows):
+    """Drumul nou: rândurile sunt encodate direct"""
+    return serialization.FastJSONResponse(rows).body
+
+
+def measure(fn, rows, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        data = _copy(rows)
+        started = time.perf_counter()
+        size = len(fn(data))
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "best_s": round(best, 4),
+        "median_s": round(statistics.median(timings), 4),
+        "per_row_us": round(best / len(rows) * 1e6, 3),
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serializare răspunsuri")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"{args.rows} rânduri, {args.repeat} repetări, encoder nou: {encoder}")
+
+    results = {
+        "before (List[dict])": measure(before_dict, rows, args.repeat),
+        "before (List[TaskRow])": measure(before_typed, rows, args.repeat),
+        "after (fast_response)": measure(after, rows, args.repeat),
+    }
+    baseline = results["before (List[dict])"]["best_s"]
+    print(f"{'drum':<26}{'best (s)':>10}{'µs/rând':>10}{'MB':>8}{'speedup':>9}")
+    for name, result in results.items():
+        print(f"{name:<26}{result['best_s']:>10}{result['per_row_us']:>10}"
+              f"{result['bytes'] / 1e6:>8.1f}{baseline / result['best_s']:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Import în masă de task-uri (JSON array, NDJSON sau CSV)
+
+Rândurile sunt validate în memorie (inclusiv user_id/project_id față de
+seturile preîncărcate), apoi inserate cu executemany în tranzacții pe loturi.
+Totalurile și agregările zilnice se actualizează o singură dată pe lot pentru
+fiecare utilizator/proiect/zi afectat. Erorile sunt raportate per rând, fără
+a opri importul.
+"""
+
+import csv
+import datetime
+import io
+import json
+import logging
+import os
+from collections import defaultdict
+from decimal import Decimal
+
+from pydantic import ValidationError
+
+import repository
+import rollups
+from conditional import resource_versions
+
+logger = logging.getLogger(__name__)
+
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv('BULK_IMPORT_CHUNK_SIZE', 1000))
+BULK_IMPORT_MAX_ERRORS = 1000
+
+CSV_COLUMNS = ('user_id', 'project_id', 'description', 'hours', 'date')
+
+
+class ImportFormatError(ValueError):
+    """Corpul cererii nu poate fi interpretat în formatul cerut"""
+
+
+def detect_format(content_type, explicit=None):
+    if explicit:
+        return explicit
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return 'ndjson'
+    if content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    return 'json'
+
+
+def parse_rows(body: bytes, fmt: str):
+    """Întoarce o listă de (număr rând, dict sau eroare de parsare)"""
+    text = body.decode('utf-8-sig')
+    if fmt == 'json':
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(f"Invalid JSON: {e}")
+        if not isinstance(data, list):
+            raise ImportFormatError("JSON body must be an array of tasks")
+        return list(enumerate(data, start=1))
+    if fmt == 'ndjson':
+        rows = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((line_number, json.loads(line)))
+            except json.JSONDecodeError as e:
+                rows.append((line_number, ImportFormatError(f"Invalid JSON: {e}")))
+        return rows
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ImportFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+        # Rândul 1 este antetul
+        return [(line_number, row) for line_number, row in enumerate(reader, start=2)]
+    raise ImportFormatError(f"Unsupported format: {fmt}")
+
+
+def _load_reference_ids(cursor):
+    cursor.execute("SELECT id FROM users")
+    user_ids = {row['id'] for row in cursor.fetchall()}
+    cursor.execute("SELECT id, module_type FROM projects")
+    project_modules = {row['id']: row['module_type'] for row in cursor.fetchall()}
+    return user_ids, project_modules
+
+
+def _validate(parsed_rows, task_model, user_ids, project_modules):
+    valid, errors = [], []
+    for row_number, data in parsed_rows:
+        if isinstance(data, Exception):
+            errors.append({"row": row_number, "error": str(data)})
+            continue
+        try:
+            task = task_model(**data) if isinstance(data, dict) else task_model.model_validate(data)
+            task_date = datetime.date.fromisoformat(task.date)
+        except ValidationError as e:
+            errors.append({"row": row_number, "error": "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )})
+            continue
+        except ValueError as e:
+            errors.append({"row": row_number, "error": f"date: {e}"})
+            continue
+        if task.user_id not in user_ids:
+            errors.append({"row": row_number, "error": f"User {task.user_id} not found"})
+            continue
+        if task.project_id not in project_modules:
+            errors.append({"row": row_number, "error": f"Project {task.project_id} not found"})
+            continue
+        valid.append((row_number, task, task_date))
+    return valid, errors
+
+
+def _insert_chunk(chunk, project_modules):
+    """Inserează un lot și aplică diferențele agregate, într-o singură tranzacție"""
+    def work(cursor):
+        cursor.executemany("""
+            INSERT INTO tasks (user_id, project_id, description, hours, date)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(task.user_id, task.project_id, task.description, task.hours, task_date)
+              for _, task, task_date in chunk])
+
+        user_hours = defaultdict(Decimal)
+        project_hours = defaultdict(Decimal)
+        daily = defaultdict(lambda: [Decimal(0), 0])
+        for _, task, task_date in chunk:
+            hours = Decimal(str(task.hours))
+            user_hours[task.user_id] += hours
+            project_hours[task.project_id] += hours
+            entry = daily[(task_date, task.user_id, task.project_id)]
+            entry[0] += hours
+            entry[1] += 1
+
+        cursor.executemany("UPDATE users SET total_hours = total_hours + %s WHERE id = %s",
+                           [(hours, user_id) for user_id, hours in user_hours.items()])
+        cursor.executemany("UPDATE projects SET total_hours = total_hours + %s WHERE id = %s",
+                           [(hours, project_id) for project_id, hours in project_hours.items()])
+        cursor.executemany("""
+            INSERT INTO daily_rollups (date, user_id, project_id, module_type, hours, task_count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE hours = hours + VALUES(hours), task_count = task_count + VALUES(task_count)
+        """, [(task_date, user_id, project_id, project_modules[project_id], hours, count)
+              for (task_date, user_id, project_id), (hours, count) in daily.items()])
+        rollups.log_changes(cursor, {(task_date, user_id) for task_date, user_id, _ in daily})
+        resource_versions.bump(cursor, "tasks")
+    repository.transaction_sync(work)
+
+
+def import_tasks(parsed_rows, task_model, chunk_size=BULK_IMPORT_CHUNK_SIZE):
+    """Validează și inserează rândurile; rulează în executorul bazei de date"""
+    user_ids, project_modules = repository.with_cursor_sync(_load_reference_ids)
+    valid, errors = _validate(parsed_rows, task_model, user_ids, project_modules)
+
+    inserted = 0
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            _insert_chunk(chunk, project_modules)
+            inserted += len(chunk)
+        except Exception as e:
+            # Lotul a eșuat (ex. utilizator șters între timp): reîncercăm rând cu rând ca să izolăm erorile
+            logger.warning(f"Bulk import chunk starting at row {chunk[0][0]} failed, retrying row by row: {e}")
+            for item in chunk:
+                try:
+                    _insert_chunk([item], project_modules)
+                    inserted += 1
+                except Exception as row_error:
+                    errors.append({"row": item[0], "error": str(row_error)})
+
+    errors.sort(key=lambda error: error['row'])
+    return {
+        "total": len(parsed_rows),
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors[:BULK_IMPORT_MAX_ERRORS],
+        "errors_truncated": len(errors) > BULK_IMPORT_MAX_ERRORS
+    }
@@ -0,0 +1,76 @@
+"""
+Cache în proces pentru datele de referință (utilizatori, proiecte, departamente)
+
+Dimensiune limitată (LRU) și TTL per cheie. Cheile includ versiunea resursei
+(conditional.versioned_key), deci scrierile nu invalidează nimic explicit:
+intrările vechi nu mai sunt citite și ies prin expirare sau evicțiune.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 256))
+CACHE_TTL = float(os.getenv('CACHE_TTL', 300))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU thread-safe cu expirare per cheie"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    async def get_or_load(self, key, loader, ttl=None):
+        """Valoarea din cache sau rezultatul await loader(), memorat pentru ttl secunde"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = await loader()
+            self.set(key, value, ttl)
+        return value
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._data)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['default_ttl'] = self.default_ttl
+        return stats
+
+
+# Cache partajat pentru datele de referință
+reference_cache = TTLCache()
@@ -0,0 +1,151 @@
+"""
+Calendar pe interval: matricea de ore utilizator × zi (× proiect)
+
+Citește daily_rollups cu o singură interogare grupată pentru tot intervalul
+(cheia primară începe cu date), în loc de câte o cerere per zi sau de tot
+istoricul unui utilizator. Două formate de răspuns:
+
+- matrix: zilele intervalului o singură dată, apoi pentru fiecare utilizator
+  vectori denși de ore/task-uri indexați după zi (și câte unul per proiect);
+- columnar: celulele nenule ca vectori paraleli (user_id, date, project_id,
+  hours, task_count).
+
+Cu since=<versiune> răspunsul conține doar celulele (utilizator, zi)
+modificate de la acea versiune (rollup_changes), în format columnar, plus
+lista cheilor de înlocuit; dacă versiunea nu mai poate fi urmărită, se
+întoarce intervalul complet (full=true).
+"""
+
+import datetime
+import os
+
+CALENDAR_MAX_DAYS = int(os.getenv('CALENDAR_MAX_DAYS', 366))
+
+# Modificările foarte recente sunt retrimise la fiecare reîmprospătare: tranzacțiile
+# pot fi confirmate în altă ordine decât id-urile alocate în rollup_changes
+CHANGE_OVERLAP_SECONDS = 10
+
+
+def day_range(date_from: datetime.date, date_to: datetime.date):
+    return [date_from + datetime.timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+
+
+def read_version(cursor):
+    """(prima, ultima) versiune păstrată în rollup_changes"""
+    cursor.execute("SELECT MIN(id) AS first, MAX(id) AS last FROM rollup_changes")
+    row = cursor.fetchone()
+    return row['first'] or 0, row['last'] or 0
+
+
+def read_changes(cursor, since: int, first: int, last: int):
+    """Perechile (user_id, date) modificate după since; None dacă e nevoie de reîncărcare completă"""
+    # Versiune ștearsă de prune_changes sau dintr-o bază de date recreată
+    if since < first - 1 or since > last:
+        return None
+    recent = datetime.datetime.now() - datetime.timedelta(seconds=CHANGE_OVERLAP_SECONDS)
+    cursor.execute("SELECT DISTINCT date, user_id FROM rollup_changes WHERE id > %s OR created_at >= %s",
+                   (since, recent))
+    keys = set()
+    for row in cursor.fetchall():
+        if row['date'] is None:
+            return None
+        keys.add((row['user_id'], _as_date(row['date'])))
+    return keys
+
+
+def _as_date(value):
+    return value if isinstance(value, datetime.date) else datetime.date.fromisoformat(str(value)[:10])
+
+
+def read_cells(cursor, date_from, date_to, by_project=True, user_id=None, department=None,
+               project_id=None, dates=None):
+    """Celulele nenule din interval, grupate pe (utilizator, zi[, proiect]), într-o singură interogare"""
+    columns = "r.user_id, r.date" + (", r.project_id" if by_project else "")
+    join = " JOIN users u ON u.id = r.user_id" if department else ""
+    conditions = ["r.date BETWEEN %s AND %s"]
+    params = [date_from, date_to]
+    if dates:
+        conditions.append(f"r.date IN ({', '.join(['%s'] * len(dates))})")
+        params.extend(dates)
+    if user_id is not None:
+        conditions.append("r.user_id = %s")
+        params.append(user_id)
+    if department:
+        conditions.append("u.department = %s")
+        params.append(department)
+    if project_id is not None:
+        conditions.append("r.project_id = %s")
+        params.append(project_id)
+    cursor.execute(f"""
+        SELECT {columns}, SUM(r.hours) AS hours, SUM(r.task_count) AS task_count
+        FROM daily_rollups r{join}
+        WHERE {' AND '.join(conditions)}
+        GROUP BY {columns}
+        ORDER BY {columns}
+    """, params)
+    return cursor.fetchall()
+
+
+def to_matrix(cells, days, by_project=True):
+    index = {day: position for position, day in enumerate(days)}
+    users = {}
+    for cell in cells:
+        position = index[_as_date(cell['date'])]
+        entry = users.get(cell['user_id'])
+        if entry is None:
+            entry = users[cell['user_id']] = {
+                "user_id": cell['user_id'],
+                "hours": [0.0] * len(days),
+                "task_count": [0] * len(days),
+            }
+            if by_project:
+                entry["projects"] = {}
+        hours = float(cell['hours'])
+        entry["hours"][position] = round(entry["hours"][position] + hours, 2)
+        entry["task_count"][position] += int(cell['task_count'])
+        if by_project:
+            project_hours = entry["projects"].setdefault(str(cell['project_id']), [0.0] * len(days))
+            project_hours[position] = round(hours, 2)
+    return {"days": [day.isoformat() for day in days], "users": list(users.values())}
+
+
+def to_columnar(cells, by_project=True):
+    columns = {
+        "user_id": [cell['user_id'] for cell in cells],
+        "date": [_as_date(cell['date']).isoformat() for cell in cells],
+    }
+    if by_project:
+        columns["project_id"] = [cell['project_id'] for cell in cells]
+    columns["hours"] = [round(float(cell['hours']), 2) for cell in cells]
+    columns["task_count"] = [int(cell['task_count']) for cell in cells]
+    return columns
+
+
+def load_calendar(cursor, date_from, date_to, by_project=True, fmt="matrix", since=None,
+                  user_id=None, department=None, project_id=None):
+    """Răspunsul endpoint-ului de calendar; rulează pe o singură conexiune (repository.with_cursor)"""
+    # Versiunea se citește înaintea datelor: o scriere concurentă apare cel mult de două ori, nu deloc
+    first, last = read_version(cursor)
+    result = {"date_from": date_from.isoformat(), "date_to": date_to.isoformat(), "version": last}
+    filters = {"user_id": user_id, "department": department, "project_id": project_id}
+
+    keys = read_changes(cursor, since, first, last) if since is not None else None
+    if keys is None:
+        cells = read_cells(cursor, date_from, date_to, by_project, **filters)
+        body = to_matrix(cells, day_range(date_from, date_to), by_project) if fmt == "matrix" \
+            else {"columns": to_columnar(cells, by_project)}
+        return dict(result, full=True, format=fmt, **body)
+
+    keys = sorted(key for key in keys
+                  if date_from <= key[1] <= date_to and (user_id is None or key[0] == user_id))
+    cells = []
+    if keys:
+        dates = sorted({day for _, day in keys})
+        wanted = set(keys)
+        cells = [cell for cell in read_cells(cursor, date_from, date_to, by_project, dates=dates, **filters)
+                 if (cell['user_id'], _as_date(cell['date'])) in wanted]
+    return dict(
+        result, full=False, format="columnar",
+        changed={"user_id": [key[0] for key in keys], "date": [key[1].isoformat() for key in keys]},
+        columns=to_columnar(cells, by_project),
+    )
@@ -0,0 +1,82 @@
+"""
+Comentariile task-urilor: încărcare în lot și contorul tasks.comment_count
+
+Listele de task-uri afișează numărul de comentarii din coloana
+tasks.comment_count, întreținută în aceeași tranzacție cu scrierea
+comentariului (ca total_hours și daily_rollups), fără JOIN/COUNT pe
+task_comments. Comentariile mai multor task-uri se citesc cu o singură
+interogare pe indexul (task_id, created_at), grupate apoi pe task.
+"""
+
+COMMENT_BATCH_MAX_TASKS = 1000
+
+
+def backfill_comment_counts(cursor):
+    """Recalculează comment_count pentru toate task-urile (migrație, seed)"""
+    cursor.execute("""
+        UPDATE tasks
+        SET comment_count = (SELECT COUNT(*) FROM task_comments WHERE task_comments.task_id = tasks.id)
+    """)
+
+
+def adjust_comment_count(cursor, task_id: int, delta: int):
+    """Aplică diferența pe contorul task-ului, în tranzacția curentă"""
+    cursor.execute("UPDATE tasks SET comment_count = comment_count + %s WHERE id = %s", (delta, task_id))
+
+
+def discount_user_comments(cursor, user_id: int):
+    """Înaintea ștergerii unui utilizator: comentariile lui pe task-urile altora dispar în cascadă"""
+    cursor.execute("""
+        UPDATE tasks
+        SET comment_count = comment_count - (
+            SELECT COUNT(*) FROM task_comments WHERE task_comments.task_id = tasks.id AND task_comments.user_id = %s
+        )
+        WHERE id IN (SELECT task_id FROM task_comments WHERE user_id = %s)
+    """, (user_id, user_id))
+
+
+def reconcile_comment_counts(cursor):
+    """Găsește și repară task-urile la care comment_count diferă de numărul real de comentarii"""
+    cursor.execute("""
+        SELECT t.id, t.comment_count AS stored, COUNT(tc.id) AS actual
+        FROM tasks t
+        LEFT JOIN task_comments tc ON tc.task_id = t.id
+        GROUP BY t.id, t.comment_count
+        HAVING stored <> actual
+    """)
+    drifted = cursor.fetchall()
+    for row in drifted:
+        cursor.execute("""
+            UPDATE tasks
+            SET comment_count = (SELECT COUNT(*) FROM task_comments WHERE task_id = %s)
+            WHERE id = %s
+        """, (row['id'], row['id']))
+    return [{"id": row['id'], "stored": int(row['stored']), "actual": int(row['actual'])} for row in drifted]
+
+
+def load_comment_counts(cursor, task_ids):
+    """{task_id: comment_count} pentru task-urile existente dintre cele cerute"""
+    if not task_ids:
+        return {}
+    cursor.execute(f"SELECT id, comment_count FROM tasks WHERE id IN ({', '.join(['%s'] * len(task_ids))})",
+                   list(task_ids))
+    return {row['id']: row['comment_count'] for row in cursor.fetchall()}
+
+
+def load_comments(cursor, task_ids, preview=None):
+    """{task_id: [comentarii]} într-o singură interogare; cu preview, doar ultimele preview per task"""
+    grouped = {task_id: [] for task_id in task_ids}
+    if not task_ids:
+        return grouped
+    cursor.execute(f"""
+        SELECT tc.*, u.name as user_name
+        FROM task_comments tc
+        JOIN users u ON tc.user_id = u.id
+        WHERE tc.task_id IN ({', '.join(['%s'] * len(task_ids))})
+        ORDER BY tc.task_id, tc.created_at ASC, tc.id ASC
+    """, list(task_ids))
+    for row in cursor.fetchall():
+        grouped[row['task_id']].append(row)
+    if preview:
+        grouped = {task_id: rows[-preview:] for task_id, rows in grouped.items()}
+    return grouped
@@ -0,0 +1,158 @@
+"""
+Validare condițională (ETag / If-None-Match) pentru endpoint-urile GET
+
+Fiecare resursă (users, projects, tasks, ...) are un contor de versiune în
+tabelul resource_versions, incrementat în aceeași tranzacție cu scrierea:
+versiunea nouă devine vizibilă la commit, odată cu datele, iar o scriere
+confirmată nu mai poate eșua ulterior din cauza contorului. Contoarele sunt în
+baza de date, nu în proces, deci sunt aceleași pentru toți worker-ii.
+
+ETag-ul unui răspuns este derivat din versiunile resurselor de care depinde.
+Fiecare worker păstrează versiunile citite RESOURCE_VERSIONS_TTL secunde și
+citește doar cheile cerute de rută, pe cheie primară; scrierile proprii le
+invalidează imediat, cele din alți worker-i sunt observate după cel mult TTL.
+Același ETag servește drept cheie pentru cache-ul datelor de referință.
+"""
+
+import contextvars
+import os
+import time
+
+from fastapi import Depends, Request, Response
+
+import repository
+
+RESOURCES = ("users", "projects", "tasks", "comments", "audit_logs")
+
+# Cât timp o versiune citită este refolosită în proces (0 = citire la fiecare cerere)
+RESOURCE_VERSIONS_TTL = float(os.getenv('RESOURCE_VERSIONS_TTL', 1.0))
+
+# Rândul 'epoch' primește o valoare nouă la crearea tabelului, ca ETag-urile
+# emise pentru o bază de date recreată să nu fie confundate cu cele vechi
+EPOCH = "epoch"
+
+CREATE_RESOURCE_VERSIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS resource_versions (
+        resource VARCHAR(50) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    )
+"""
+
+
+def seed_versions(cursor):
+    """Pas de migrație: rândurile inițiale (epoca și câte un contor per resursă)"""
+    cursor.execute("INSERT IGNORE INTO resource_versions (resource, version) VALUES (%s, UNIX_TIMESTAMP())", (EPOCH,))
+    for resource in RESOURCES:
+        cursor.execute("INSERT IGNORE INTO resource_versions (resource, version) VALUES (%s, 0)", (resource,))
+
+
+# ETag-ul calculat de dependența conditional() pentru cererea curentă
+current_etag = contextvars.ContextVar('current_etag', default=None)
+
+
+class NotModified(Exception):
+    """Validatorul clientului corespunde versiunii curente"""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+class ResourceVersions:
+    """Contoare de versiune per resursă, partajate prin baza de date, cu un cache scurt în proces"""
+
+    def __init__(self, ttl=RESOURCE_VERSIONS_TTL):
+        self.ttl = ttl
+        # resursă -> (versiune, momentul expirării)
+        self._cached = {}
+        self._invalidations = 0
+
+    async def get(self, *resources):
+        """Versiunile resurselor cerute și ale epocii; se citesc doar cheile expirate"""
+        keys = list(dict.fromkeys((EPOCH,) + resources))
+        now = time.monotonic()
+        versions = {}
+        stale = []
+        for key in keys:
+            cached = self._cached.get(key)
+            if cached is not None and cached[1] > now:
+                versions[key] = cached[0]
+            else:
+                stale.append(key)
+        if stale:
+            invalidations = self._invalidations
+            placeholders = ", ".join(["%s"] * len(stale))
+            rows = await repository.fetch_all(
+                f"SELECT resource, version FROM resource_versions WHERE resource IN ({placeholders})", stale
+            )
+            fetched = {row['resource']: row['version'] for row in rows}
+            # O scriere locală confirmată în timpul citirii: valorile pot fi deja vechi, nu le păstrăm
+            keep = invalidations == self._invalidations and self.ttl > 0
+            expires = time.monotonic() + self.ttl
+            for key in stale:
+                versions[key] = fetched.get(key, 0)
+                if keep:
+                    self._cached[key] = (versions[key], expires)
+        return versions
+
+    def bump(self, cursor, *resources):
+        """Incrementează contoarele în tranzacția scrierii (ordonat, ca tranzacțiile concurente să nu se blocheze reciproc)"""
+        resources = sorted(set(resources))
+        if not resources:
+            return
+        placeholders = ", ".join(["%s"] * len(resources))
+        cursor.execute(
+            f"UPDATE resource_versions SET version = version + 1 WHERE resource IN ({placeholders})",
+            resources
+        )
+
+    def invalidate(self, *resources):
+        """După commit: worker-ul curent recitește versiunile la următoarea cerere"""
+        self._invalidations += 1
+        for resource in resources:
+            self._cached.pop(resource, None)
+
+    async def etag(self, *resources):
+        versions = await self.get(*resources)
+        parts = "-".join(str(versions.get(resource, 0)) for resource in resources)
+        return f'W/"{versions.get(EPOCH, 0)}-{parts}"'
+
+
+resource_versions = ResourceVersions()
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparație slabă: ignoră prefixul W/
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def conditional(*resources):
+    """Dependență FastAPI: setează ETag și răspunde 304 înainte de handler dacă validatorul e curent"""
+    async def check(request: Request, response: Response):
+        etag = await resource_versions.etag(*resources)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise NotModified(etag)
+        current_etag.set(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return Depends(check)
+
+
+def versioned_key(key: str) -> str:
+    """Cheia de cache legată de versiunile cererii curente; o scriere în orice worker o schimbă"""
+    etag = current_etag.get()
+    return f"{key}@{etag}" if etag else key
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
@@ -0,0 +1,311 @@
+"""
+Pool de conexiuni MySQL pentru KPI Time Tracker
+"""
+
+import collections
+import configparser
+import logging
+import os
+import threading
+import time
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'mysql_config.ini')
+
+# Valori implicite pentru pool (suprascrise din mysql_config.ini sau variabile de mediu)
+DEFAULT_POOL_SETTINGS = {
+    'min_size': 2,
+    'max_size': 10,
+    'checkout_timeout': 5.0,
+    'recycle_seconds': 3600.0,
+    'max_idle_seconds': 300.0,
+    'health_check_interval': 30.0,
+}
+
+POOL_ENV_VARS = {
+    'min_size': 'DB_POOL_MIN_SIZE',
+    'max_size': 'DB_POOL_MAX_SIZE',
+    'checkout_timeout': 'DB_POOL_TIMEOUT',
+    'recycle_seconds': 'DB_POOL_RECYCLE',
+    'max_idle_seconds': 'DB_POOL_MAX_IDLE',
+    'health_check_interval': 'DB_POOL_HEALTH_CHECK_INTERVAL',
+}
+
+
+class PoolExhaustedError(Exception):
+    """Nu s-a putut obține o conexiune din pool în timpul alocat"""
+
+
+def load_pool_settings():
+    """Încarcă setările pool-ului din secțiunea [pool] și din variabilele de mediu"""
+    settings = dict(DEFAULT_POOL_SETTINGS)
+
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section('pool'):
+        for key, default in DEFAULT_POOL_SETTINGS.items():
+            if config.has_option('pool', key):
+                settings[key] = type(default)(config.get('pool', key))
+
+    # Variabilele de mediu au prioritate (producție)
+    for key, env_var in POOL_ENV_VARS.items():
+        value = os.getenv(env_var)
+        if value:
+            settings[key] = type(DEFAULT_POOL_SETTINGS[key])(value)
+
+    settings['max_size'] = max(1, settings['max_size'])
+    settings['min_size'] = max(0, min(settings['min_size'], settings['max_size']))
+    return settings
+
+
+class _PoolEntry:
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """Conexiune împrumutată din pool; close() o returnează în pool"""
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise pymysql.err.InterfaceError("Connection already returned to pool")
+        return getattr(entry.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return self._entry.raw.cursor(*args, **kwargs)
+
+    def invalidate(self):
+        """Închide conexiunea fizică în loc să o returneze în pool"""
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry, discard=True)
+
+    def close(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Pool thread-safe de conexiuni pymysql cu health check și reciclare"""
+
+    def __init__(self, connect_kwargs, min_size=2, max_size=10, checkout_timeout=5.0,
+                 recycle_seconds=3600.0, max_idle_seconds=300.0, health_check_interval=30.0):
+        self.connect_kwargs = dict(connect_kwargs)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.recycle_seconds = recycle_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_interval = health_check_interval
+
+        self._idle = collections.deque()
+        self._cond = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'checkout_waits': 0,
+            'checkout_wait_ms_total': 0.0,
+            'exhausted': 0,
+            'health_check_failures': 0,
+            'recycled': 0,
+            'peak_in_use': 0,
+        }
+
+    # Creare / închidere conexiuni fizice
+
+    def _connect(self):
+        raw = pymysql.connect(**self.connect_kwargs)
+        with self._cond:
+            self._stats['connections_created'] += 1
+        return _PoolEntry(raw)
+
+    def _close_raw(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['connections_closed'] += 1
+
+    def open(self):
+        """Pre-încălzește pool-ul cu min_size conexiuni"""
+        created = []
+        try:
+            for _ in range(self.min_size):
+                created.append(self._connect())
+        except pymysql.Error as e:
+            logger.warning(f"MySQL pool warm-up incomplete ({len(created)}/{self.min_size}): {e}")
+        with self._cond:
+            for entry in created:
+                self._idle.append(entry)
+                self._size += 1
+        logger.info(f"MySQL pool ready: {len(created)} idle, max {self.max_size}")
+
+    def close(self):
+        """Închide toate conexiunile inactive și refuză noi împrumuturi"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_raw(entry)
+
+    # Împrumut / returnare
+
+    def _is_expired(self, entry, now):
+        return self.recycle_seconds > 0 and now - entry.created_at > self.recycle_seconds
+
+    def _is_healthy(self, entry, now):
+        if now - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            entry.raw.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.warning(f"MySQL pool health check failed: {e}")
+            with self._cond:
+                self._stats['health_check_failures'] += 1
+            return False
+
+    def acquire(self):
+        """Obține o conexiune verificată din pool"""
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        wait_started = time.monotonic()
+
+        while True:
+            entry = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise pymysql.err.InterfaceError("Connection pool is closed")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['exhausted'] += 1
+                        raise PoolExhaustedError(
+                            f"No MySQL connection available after {self.checkout_timeout}s "
+                            f"({self._in_use}/{self.max_size} in use)"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                    if self._closed:
+                        raise pymysql.err.InterfaceError("Connection pool is closed")
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    create = True
+                    self._size += 1
+
+            if create:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                now = time.monotonic()
+                expired = self._is_expired(entry, now)
+                if expired or not self._is_healthy(entry, now):
+                    with self._cond:
+                        self._size -= 1
+                        if expired:
+                            self._stats['recycled'] += 1
+                        self._cond.notify()
+                    self._close_raw(entry)
+                    continue
+
+            with self._cond:
+                self._in_use += 1
+                self._stats['checkouts'] += 1
+                self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._in_use)
+                if waited:
+                    self._stats['checkout_waits'] += 1
+                    self._stats['checkout_wait_ms_total'] += (time.monotonic() - wait_started) * 1000
+            return PooledConnection(self, entry)
+
+    def _release(self, entry, discard=False):
+        if not discard:
+            try:
+                # Nu lăsăm tranzacții deschise pentru următorul consumator
+                if entry.raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    entry.raw.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        to_close = []
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed or self._is_expired(entry, now):
+                if not discard and not self._closed:
+                    self._stats['recycled'] += 1
+                self._size -= 1
+                to_close.append(entry)
+            else:
+                entry.last_used = now
+                self._idle.append(entry)
+
+            # Reciclează conexiunile inactive peste min_size
+            while (len(self._idle) > 0 and self._size > self.min_size
+                   and now - self._idle[0].last_used > self.max_idle_seconds):
+                to_close.append(self._idle.popleft())
+                self._size -= 1
+                self._stats['recycled'] += 1
+            self._cond.notify()
+
+        for stale in to_close:
+            self._close_raw(stale)
+
+    def get_stats(self):
+        """Statistici pool pentru monitorizare"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            })
+        stats['checkout_wait_ms_total'] = round(stats['checkout_wait_ms_total'], 2)
+        return stats
+
+
+def create_pool(connect_kwargs, settings=None):
+    """Creează și pre-încălzește pool-ul pe baza setărilor din configurare"""
+    settings = settings or load_pool_settings()
+    pool = ConnectionPool(connect_kwargs, **settings)
+    pool.open()
+    return pool
@@ -0,0 +1,279 @@
+"""
+Evenimente de modificare trimise clienților prin Server-Sent Events
+
+Endpoint-urile de scriere publică un eveniment compact (resursele modificate,
+acțiunea, entitatea, utilizatorul și departamentul afectat) în tabelul
+change_events. Fiecare worker citește evenimentele noi o singură dată la
+EVENTS_POLL_INTERVAL, oricâți clienți ar avea conectați, le encodează o
+singură dată și le distribuie abonaților locali. Id-urile sunt cele din
+tabel, aceleași în toți worker-ii: un client reconectat la alt worker reia
+fluxul de la Last-Event-ID, din ultimele EVENTS_REPLAY_SIZE evenimente.
+
+Pentru comentarii, id-ul din eveniment este cel al task-ului comentat.
+
+Canale: toate evenimentele, department:<nume> și user:<id>. Evenimentele
+fără departament sau utilizator (proiecte, importuri în masă) ajung la toți
+abonații. Un abonat a cărui coadă se umple, sau care cere reluarea de la un
+id prea vechi, primește "resync" și trebuie să reîncarce datele.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import time
+from collections import defaultdict, deque
+
+import repository
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', 0.5))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 256))
+EVENTS_REPLAY_SIZE = int(os.getenv('EVENTS_REPLAY_SIZE', 1000))
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', 15))
+EVENTS_RETENTION_HOURS = int(os.getenv('EVENTS_RETENTION_HOURS', 24))
+EVENTS_BATCH_SIZE = 1000
+
+# Un id lipsă (tranzacție încă neconfirmată) mai este căutat atât timp; apoi e considerat rollback
+EVENTS_GAP_TIMEOUT = 5.0
+PRUNE_INTERVAL = 600
+
+CREATE_CHANGE_EVENTS_SQL = """
+    CREATE TABLE IF NOT EXISTS change_events (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        resources VARCHAR(255) NOT NULL,
+        action VARCHAR(20) NOT NULL,
+        entity_id INT NULL,
+        user_id INT NULL,
+        department VARCHAR(100) NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        KEY idx_change_events_created (created_at)
+    )
+"""
+
+RETRY_FRAME = b"retry: 3000\n\n"
+HEARTBEAT_FRAME = b": ping\n\n"
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+
+async def publish(resources, action, entity_id=None, user_id=None, department=None):
+    """Înregistrează o modificare; departamentul se deduce din utilizator dacă lipsește"""
+    try:
+        await repository.execute("""
+            INSERT INTO change_events (resources, action, entity_id, user_id, department)
+            VALUES (%s, %s, %s, %s, COALESCE(%s, (SELECT department FROM users WHERE id = %s)))
+        """, (",".join(resources), action, entity_id, user_id, department, user_id))
+    except Exception as e:
+        # Clienții au în continuare ETag-urile; un eveniment pierdut nu anulează scrierea
+        logger.warning(f"Change event not published ({action} {resources}): {e}")
+
+
+def encode_event(row):
+    """Cadrul SSE al unui eveniment, encodat o singură dată pentru toți abonații"""
+    data = {
+        "resources": row['resources'].split(","),
+        "action": row['action'],
+        "id": row['entity_id'],
+        "user_id": row['user_id'],
+        "department": row['department'],
+    }
+    return b"id: %d\nevent: change\ndata: %s\n\n" % (row['id'], dumps(data))
+
+
+class Subscriber:
+    """Un client conectat: filtrele canalului și coada de cadre de trimis"""
+
+    def __init__(self, department=None, user_id=None, after=None, queue_size=EVENTS_QUEUE_SIZE):
+        self.department = department
+        self.user_id = user_id
+        # Evenimentele deja primite înainte de reconectare nu se retrimit
+        self.after = after
+        self.queue = asyncio.Queue(queue_size)
+        self.resyncs = 0
+
+    def matches(self, row):
+        if self.department is None and self.user_id is None:
+            return True
+        return ((self.department is not None and row['department'] in (None, self.department))
+                or (self.user_id is not None and row['user_id'] in (None, self.user_id)))
+
+    def offer(self, event_id, frame):
+        if self.after is not None and event_id <= self.after:
+            return True
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.resync()
+            return False
+
+    def resync(self):
+        """Golește coada: clientul reîncarcă datele, apoi primește evenimentele următoare"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC_FRAME)
+        self.resyncs += 1
+
+
+class EventBus:
+    """Abonații unui worker, indexați pe canal, și evenimentele recente pentru reluare"""
+
+    def __init__(self, replay_size=EVENTS_REPLAY_SIZE):
+        self._everyone = set()
+        self._departments = defaultdict(set)
+        self._users = defaultdict(set)
+        self._recent = deque(maxlen=replay_size)
+        self._seen = set()
+        self._gaps = {}
+        self.last_id = None
+        self._stats = {"dispatched": 0, "delivered": 0, "resyncs": 0, "poll_failures": 0}
+
+    @property
+    def subscriber_count(self):
+        subscribers = set(self._everyone)
+        for group in (self._departments, self._users):
+            for channel in group.values():
+                subscribers.update(channel)
+        return len(subscribers)
+
+    def subscribe(self, department=None, user_id=None, last_event_id=None):
+        subscriber = Subscriber(department, user_id, after=last_event_id)
+        if department is None and user_id is None:
+            self._everyone.add(subscriber)
+        if department is not None:
+            self._departments[department].add(subscriber)
+        if user_id is not None:
+            self._users[user_id].add(subscriber)
+        if last_event_id is not None:
+            self._replay(subscriber, last_event_id)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._everyone.discard(subscriber)
+        for group, key in ((self._departments, subscriber.department), (self._users, subscriber.user_id)):
+            channel = group.get(key)
+            if channel is not None:
+                channel.discard(subscriber)
+                if not channel:
+                    del group[key]
+
+    def _replay(self, subscriber, last_event_id):
+        if self.last_id is not None and last_event_id >= self.last_id:
+            return
+        first = self._recent[0][0] if self._recent else None
+        if first is None or last_event_id < first - 1:
+            subscriber.resync()
+            self._stats["resyncs"] += 1
+            return
+        for event_id, row, frame in self._recent:
+            if event_id > last_event_id and subscriber.matches(row):
+                subscriber.offer(event_id, frame)
+
+    def _targets(self, row):
+        targets = set(self._everyone)
+        for group, key in ((self._departments, row['department']), (self._users, row['user_id'])):
+            if key is None:
+                for channel in group.values():
+                    targets.update(channel)
+            else:
+                targets.update(group.get(key, ()))
+        return targets
+
+    def dispatch(self, rows):
+        """Trimite evenimentele noi abonaților interesați; ignoră id-urile deja trimise"""
+        for row in rows:
+            event_id = row['id']
+            if event_id in self._seen:
+                continue
+            frame = encode_event(row)
+            if len(self._recent) == self._recent.maxlen:
+                self._seen.discard(self._recent[0][0])
+            self._recent.append((event_id, row, frame))
+            self._seen.add(event_id)
+            self._stats["dispatched"] += 1
+            for subscriber in self._targets(row):
+                if subscriber.offer(event_id, frame):
+                    self._stats["delivered"] += 1
+                else:
+                    self._stats["resyncs"] += 1
+
+    def _track_gaps(self, rows):
+        now = time.monotonic()
+        fetched = {row['id'] for row in rows}
+        for event_id in fetched:
+            self._gaps.pop(event_id, None)
+        newest = max(fetched, default=self.last_id)
+        if newest > self.last_id:
+            missing = [event_id for event_id in range(self.last_id + 1, newest) if event_id not in fetched]
+            for event_id in missing[:EVENTS_BATCH_SIZE]:
+                self._gaps[event_id] = now
+            self.last_id = newest
+        for event_id, since in list(self._gaps.items()):
+            if now - since > EVENTS_GAP_TIMEOUT:
+                del self._gaps[event_id]
+
+    def _read_new(self, cursor):
+        if self.last_id is None:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS last FROM change_events")
+            self.last_id = cursor.fetchone()['last']
+            return []
+        sql = "SELECT id, resources, action, entity_id, user_id, department FROM change_events WHERE id > %s"
+        params = [self.last_id]
+        if self._gaps:
+            sql += f" OR id IN ({', '.join(['%s'] * len(self._gaps))})"
+            params.extend(self._gaps)
+        cursor.execute(sql + " ORDER BY id LIMIT %s", params + [EVENTS_BATCH_SIZE])
+        return cursor.fetchall()
+
+    async def poll_once(self):
+        rows = await repository.with_cursor(self._read_new)
+        if rows:
+            self._track_gaps(rows)
+            self.dispatch(rows)
+        return len(rows)
+
+    async def run(self, interval=EVENTS_POLL_INTERVAL):
+        """Task de fundal: citește evenimentele noi și curăță periodic tabelul"""
+        last_prune = time.monotonic()
+        while True:
+            try:
+                await self.poll_once()
+                if time.monotonic() - last_prune > PRUNE_INTERVAL:
+                    last_prune = time.monotonic()
+                    await prune_events()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["poll_failures"] += 1
+                logger.warning(f"Change events poll failed: {e}")
+            await asyncio.sleep(interval)
+
+    def get_stats(self):
+        return dict(self._stats, subscribers=self.subscriber_count, last_id=self.last_id or 0,
+                    pending_gaps=len(self._gaps))
+
+
+async def prune_events(retention_hours=EVENTS_RETENTION_HOURS):
+    """Șterge evenimentele mai vechi decât orice reluare posibilă"""
+    before = datetime.datetime.now() - datetime.timedelta(hours=retention_hours)
+    result = await repository.execute("DELETE FROM change_events WHERE created_at < %s", (before,))
+    return result.rowcount
+
+
+async def stream(bus, subscriber, heartbeat=EVENTS_HEARTBEAT):
+    """Corpul răspunsului SSE; abonatul este eliminat la deconectarea clientului"""
+    try:
+        yield RETRY_FRAME
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                frame = HEARTBEAT_FRAME
+            yield frame
+    finally:
+        bus.unsubscribe(subscriber)
+
+
+event_bus = EventBus()
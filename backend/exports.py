@@ -0,0 +1,369 @@
+"""
+Exporturi în flux pentru KPI Time Tracker
+
+Datele sunt citite cu cursoare unbuffered, în loturi, și scrise direct în
+răspuns, fără a materializa toată baza de date în memorie.
+"""
+
+import datetime
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import metrics
+import project_visibility
+import repository
+import serialization
+
+logger = logging.getLogger(__name__)
+
+EXPORT_VERSION = "1.0.0"
+EXPORT_BATCH_SIZE = 1000
+
+
+def dumps(value) -> str:
+    return serialization.dumps(value).decode('utf-8')
+
+
+def export_sections(date_from=None, date_to=None, department=None):
+    """Interogările exportului, ca listă de (secțiune, sql, parametri)"""
+    users_sql = "SELECT * FROM users"
+    users_params = []
+    projects_sql = "SELECT * FROM projects"
+    projects_params = []
+    task_conditions = []
+    task_params = []
+
+    if department:
+        users_sql += " WHERE department = %s"
+        users_params.append(department)
+        projects_sql += " WHERE " + project_visibility.VISIBLE_TO_DEPARTMENT_SQL
+        projects_params.append(department)
+        task_conditions.append("u.department = %s")
+        task_params.append(department)
+    if date_from:
+        task_conditions.append("t.date >= %s")
+        task_params.append(date_from)
+    if date_to:
+        task_conditions.append("t.date <= %s")
+        task_params.append(date_to)
+
+    tasks_sql = """
+        SELECT t.*, u.name as user_name, p.name as project_name, p.module_type
+        FROM tasks t
+        JOIN users u ON t.user_id = u.id
+        JOIN projects p ON t.project_id = p.id
+    """
+    if task_conditions:
+        tasks_sql += " WHERE " + " AND ".join(task_conditions)
+    tasks_sql += " ORDER BY t.date DESC, t.created_at DESC"
+
+    return [
+        ("users", users_sql + " ORDER BY name", users_params),
+        ("projects", projects_sql + " ORDER BY module_type, name", projects_params),
+        ("tasks", tasks_sql, task_params),
+    ]
+
+
+def export_info(fmt, filters=None):
+    info = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "version": EXPORT_VERSION,
+        "format": fmt
+    }
+    if filters:
+        info["filters"] = {key: value for key, value in filters.items() if value}
+    return info
+
+
+def iter_json_export(sections, filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """Array JSON în flux, cu aceeași structură ca exportul clasic"""
+    yield ('{"export_info":' + dumps(export_info("json", filters))).encode('utf-8')
+    for name, sql, params in sections:
+        yield f',"{name}":['.encode('utf-8')
+        first = True
+        for batch in repository.stream_batches(sql, params, batch_size):
+            chunk = ','.join(dumps(row) for row in batch)
+            if not first:
+                chunk = ',' + chunk
+            first = False
+            yield chunk.encode('utf-8')
+        yield b']'
+    yield b'}'
+
+
+def iter_ndjson_export(sections, filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """NDJSON: o linie cu export_info, apoi câte o linie {"type": ..., "data": ...} pe rând"""
+    yield (dumps({"type": "export_info", "data": export_info("ndjson", filters)}) + '\n').encode('utf-8')
+    for name, sql, params in sections:
+        record_type = name[:-1]
+        for batch in repository.stream_batches(sql, params, batch_size):
+            yield ''.join(
+                dumps({"type": record_type, "data": row}) + '\n' for row in batch
+            ).encode('utf-8')
+
+
+def _xml_attribute(value) -> str:
+    # Aceleași valori ca exportul ElementTree: Decimal devine float, restul str()
+    if isinstance(value, Decimal):
+        value = float(value)
+    return str(value)
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_xml_export(sections, compress=False, batch_size=EXPORT_BATCH_SIZE):
+    """XML în flux: kpi_export/users/projects/tasks, scris incremental cu XMLGenerator"""
+    # Importat la nevoie, ca pornirea worker-ilor să nu plătească pentru formatele rar folosite
+    from xml.sax.saxutils import XMLGenerator
+
+    def chunks():
+        buffer = io.StringIO()
+        xml = XMLGenerator(buffer, encoding='utf-8', short_empty_elements=True)
+
+        def drain():
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return data.encode('utf-8')
+
+        xml.startDocument()
+        xml.startElement("kpi_export", {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "version": EXPORT_VERSION
+        })
+        for name, sql, params in sections:
+            element = name[:-1]
+            xml.startElement(name, {})
+            for batch in repository.stream_batches(sql, params, batch_size):
+                for row in batch:
+                    xml.startElement(element, {key: _xml_attribute(value) for key, value in row.items()})
+                    xml.endElement(element)
+                yield drain()
+            xml.endElement(name)
+        xml.endElement("kpi_export")
+        xml.endDocument()
+        yield drain()
+
+    return _gzip_stream(chunks()) if compress else chunks()
+
+
+# Export Excel (openpyxl write-only, memorie constantă)
+
+EXCEL_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'kpi_exports'))
+EXPORT_JOB_TTL = float(os.getenv('EXPORT_JOB_TTL', 3600))
+EXPORT_JOB_WORKERS = int(os.getenv('EXPORT_JOB_WORKERS', 2))
+
+_ILLEGAL_XLSX_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+_job_executor = None
+
+
+def _excel_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, str):
+        return _ILLEGAL_XLSX_CHARS.sub('', value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
+
+
+def _section_columns(sql, params):
+    """Numele coloanelor unei secțiuni, fără a citi rânduri"""
+    def read(cursor):
+        cursor.execute(f"SELECT * FROM ({sql}) section LIMIT 0", params)
+        return [column[0] for column in cursor.description]
+    return repository.with_cursor_sync(read)
+
+
+def write_excel_export(sections, path, batch_size=EXPORT_BATCH_SIZE):
+    """Scrie exportul .xlsx rând cu rând (Users, Projects, Tasks, Summary); întoarce sumarul"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    counts = {}
+    total_hours = 0.0
+
+    for name, sql, params in sections:
+        sheet = workbook.create_sheet(name.capitalize())
+        columns = None
+        count = 0
+        for batch in repository.stream_batches(sql, params, batch_size):
+            if columns is None:
+                columns = list(batch[0].keys())
+                sheet.append(columns)
+            for row in batch:
+                sheet.append([_excel_value(row[column]) for column in columns])
+                if name == 'tasks':
+                    total_hours += float(row.get('hours') or 0)
+            count += len(batch)
+        if columns is None:
+            # Secțiune fără rânduri: foaia păstrează totuși antetul
+            sheet.append(_section_columns(sql, params))
+        counts[name] = count
+
+    summary = workbook.create_sheet('Summary')
+    summary.append(['Metric', 'Value'])
+    summary.append(['Total Users', counts.get('users', 0)])
+    summary.append(['Total Projects', counts.get('projects', 0)])
+    summary.append(['Total Tasks', counts.get('tasks', 0)])
+    summary.append(['Total Hours', total_hours])
+
+    workbook.save(path)
+    return {"rows": counts, "total_hours": total_hours}
+
+
+def build_excel_file(sections):
+    """Generează exportul într-un fișier temporar; apelantul îl șterge după trimitere"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix='.xlsx', dir=EXPORT_DIR)
+    os.close(fd)
+    started = time.perf_counter()
+    try:
+        write_excel_export(sections, path)
+    except Exception:
+        remove_file(path)
+        metrics.export_duration_seconds.observe(time.perf_counter() - started, format="excel", mode="sync", status="failed")
+        raise
+    metrics.export_duration_seconds.observe(time.perf_counter() - started, format="excel", mode="sync", status="completed")
+    return path
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Job-uri de export în fundal
+# Starea fiecărui job este un fișier JSON lângă rezultat, ca să fie vizibilă din orice proces.
+# Job-ul rulează în worker-ul care l-a creat (pid); dacă acel worker dispare
+# (restart, reload), job-ul rămas neterminat este raportat ca eșuat.
+
+def _job_meta_path(job_id):
+    return os.path.join(EXPORT_DIR, f"{job_id}.json")
+
+
+def _job_file_path(job_id):
+    return os.path.join(EXPORT_DIR, f"{job_id}.xlsx")
+
+
+def _save_job(job):
+    tmp_path = _job_meta_path(job['id']) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f)
+    os.replace(tmp_path, _job_meta_path(job['id']))
+
+
+def get_job(job_id):
+    """Starea unui job sau None dacă nu există"""
+    if not _JOB_ID.match(job_id):
+        return None
+    try:
+        with open(_job_meta_path(job_id), encoding='utf-8') as f:
+            job = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if job['status'] in ('queued', 'running') and not metrics.pid_alive(job.get('pid', os.getpid())):
+        job.update(status='failed', error='Export interrupted: worker process exited', finished_at=time.time())
+        remove_file(_job_file_path(job_id))
+        _save_job(job)
+    return job
+
+
+def job_file_path(job):
+    return _job_file_path(job['id'])
+
+
+def _run_excel_job(job, sections):
+    started = time.time()
+    job.update(status='running', started_at=started)
+    _save_job(job)
+    try:
+        summary = write_excel_export(sections, _job_file_path(job['id']))
+        job.update(status='completed', summary=summary)
+    except Exception as e:
+        logger.error(f"Excel export job {job['id']} failed: {e}")
+        remove_file(_job_file_path(job['id']))
+        job.update(status='failed', error=str(e))
+    job.update(finished_at=time.time(), duration_seconds=round(time.time() - started, 3))
+    _save_job(job)
+    metrics.export_duration_seconds.observe(job['duration_seconds'], format="excel", mode="job", status=job['status'])
+
+
+def start_excel_job(sections, filters=None):
+    """Pornește generarea exportului Excel în fundal și întoarce job-ul creat"""
+    global _job_executor
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    cleanup_expired_jobs()
+    if _job_executor is None:
+        _job_executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix='export')
+
+    job = {
+        "id": uuid.uuid4().hex,
+        "type": "excel",
+        "status": "queued",
+        "pid": os.getpid(),
+        "filters": {key: str(value) for key, value in (filters or {}).items() if value},
+        "created_at": time.time(),
+    }
+    _save_job(job)
+    _job_executor.submit(_run_excel_job, dict(job), sections)
+    return job
+
+
+def cleanup_expired_jobs(ttl=None):
+    """Șterge rezultatele și starea job-urilor terminate mai vechi de EXPORT_JOB_TTL
+
+    Job-urile în așteptare sau în lucru sunt păstrate oricât ar dura; fișierele
+    care nu aparțin unui job (exporturi sincrone abandonate) sunt șterse după vechime.
+    """
+    ttl = EXPORT_JOB_TTL if ttl is None else ttl
+    if not os.path.isdir(EXPORT_DIR):
+        return 0
+    now = time.time()
+    removed = 0
+    for entry in os.scandir(EXPORT_DIR):
+        name, extension = os.path.splitext(entry.name)
+        if extension not in ('.json', '.xlsx'):
+            continue
+        try:
+            if now - entry.stat().st_mtime <= ttl:
+                continue
+            if _JOB_ID.match(name):
+                # get_job marchează ca eșuate job-urile rămase de la un worker oprit
+                job = get_job(name)
+                if job is not None and job['status'] in ('queued', 'running'):
+                    continue
+            os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def shutdown():
+    """Oprește executorul de job-uri (job-urile în curs sunt abandonate)"""
+    global _job_executor
+    if _job_executor is not None:
+        _job_executor.shutdown(wait=False)
+        _job_executor = None
@@ -8,6 +8,8 @@ import configparser
 import os
 import sys
 
+from migrations import apply_migrations
+
 def load_mysql_config():
     """Încarcă configurația MySQL din fișierul mysql_config.ini"""
     config = configparser.ConfigParser()
@@ -58,79 +60,10 @@ def init_tables():
         config = load_mysql_config()
         
         connection = pymysql.connect(**config)
-        cursor = connection.cursor()
         
-        # Tabel utilizatori
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                role VARCHAR(50) NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                total_hours DECIMAL(10,2) DEFAULT 0.00,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabel proiecte
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS projects (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                module_type VARCHAR(50) NOT NULL,
-                status VARCHAR(50) DEFAULT 'active',
-                total_hours DECIMAL(10,2) DEFAULT 0.00,
-                visibility_type VARCHAR(50) DEFAULT 'all',
-                visible_departments JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabel task-uri
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                project_id INT NOT NULL,
-                description TEXT NOT NULL,
-                hours DECIMAL(5,2) NOT NULL,
-                date DATE NOT NULL,
-                status VARCHAR(50) DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (project_id) REFERENCES projects (id)
-            )
-        """)
-        
-        # Tabel comentarii task-uri
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS task_comments (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                task_id INT NOT NULL,
-                user_id INT NOT NULL,
-                comment TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (task_id) REFERENCES tasks (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        
-        # Tabel audit logs
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                action VARCHAR(100) NOT NULL,
-                table_name VARCHAR(100) NOT NULL,
-                record_id INT NOT NULL,
-                old_values JSON,
-                new_values JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
+        # Tabelele și indecșii sunt create de migrațiile versionate
+        applied = apply_migrations(connection)
+        print(f"ℹ️  Migrații aplicate: {applied}" if applied else "ℹ️  Schema este deja la zi")
         
         print("✅ Tabelele au fost create cu succes!")
         
@@ -1,21 +1,39 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
+import base64
 import datetime
-import uvicorn
 import pymysql
 import os
 import json
-import xml.etree.ElementTree as ET
-import pandas as pd
-import tempfile
 import configparser
 from decimal import Decimal
 import logging
 from contextlib import asynccontextmanager
+from database import ConnectionPool, PoolExhaustedError, create_pool
+import repository
+import sqlite_backend
+import exports
+import rollups
+import calendar_range
+import comments
+import project_visibility
+import events
+import bulk_import
+import metrics
+import tracing
+from cache import reference_cache
+from serialization import FastJSONResponse, fast_response, json_column
+import audit
+from audit import audit_pipeline
+from conditional import NotModified, conditional, not_modified_response, resource_versions, versioned_key
+from migrations import apply_migrations
 
 # Configurare logging pentru producție
 logging.basicConfig(
@@ -30,16 +48,53 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global DB_POOL
     # Startup
     logger.info("Starting Time Management API")
+    try:
+        DB_POOL = create_database()
+    except FileNotFoundError as e:
+        logger.error(f"MySQL pool not created: {e}")
+    # Interogările rulează în executor, câte un worker pentru fiecare conexiune din pool
+    repository.configure(get_db_connection, DB_POOL.max_size if DB_POOL else 4,
+                         write_connection_factory=DB_POOL.acquire_writer if DB_BACKEND == 'sqlite' else None)
+    reconcile_task = None
+    if HOURS_RECONCILE_INTERVAL > 0:
+        reconcile_task = asyncio.create_task(periodic_hours_reconciliation(HOURS_RECONCILE_INTERVAL))
+    audit_pipeline.start(on_flush=lambda rows: notify_change("audit_logs"))
+    archive_task = None
+    if audit.AUDIT_RETENTION_DAYS > 0 and audit.AUDIT_ARCHIVE_INTERVAL > 0:
+        archive_task = asyncio.create_task(periodic_audit_archive(audit.AUDIT_ARCHIVE_INTERVAL))
+    metrics_task = None
+    if metrics.METRICS_MULTIPROCESS:
+        # Fiecare worker publică metricile proprii; /metrics le însumează
+        metrics.registry.enable_multiprocess(metrics.METRICS_DIR)
+        metrics_task = asyncio.create_task(metrics.sync_snapshots(metrics.METRICS_SYNC_INTERVAL))
+    # Evenimentele de modificare sunt citite o singură dată per worker și distribuite clienților SSE
+    events_task = asyncio.create_task(events.event_bus.run())
     yield
     # Shutdown
     logger.info("Shutting down Time Management API")
+    if reconcile_task is not None:
+        reconcile_task.cancel()
+    if archive_task is not None:
+        archive_task.cancel()
+    if metrics_task is not None:
+        metrics_task.cancel()
+    events_task.cancel()
+    # Evenimentele de audit din coadă sunt scrise înainte de oprirea executorului
+    await audit_pipeline.stop()
+    repository.shutdown()
+    exports.shutdown()
+    if DB_POOL is not None:
+        DB_POOL.close()
+        DB_POOL = None
 
 app = FastAPI(
     title="KPI Time Tracker API", 
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Configurare CORS pentru producție
@@ -50,6 +105,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Query-Trace-Id"],
 )
 
 # Middleware pentru securitate în producție
@@ -59,17 +115,14 @@ if os.getenv('NODE_ENV') == 'production':
         allowed_hosts=["your-domain.com", "*.your-domain.com"]
     )
 
-# Funcție pentru a converti tipurile Decimal în float pentru JSON
-def convert_decimals_to_float(data):
-    """Convertește toate tipurile Decimal din date în float pentru serializare JSON"""
-    if isinstance(data, dict):
-        return {key: convert_decimals_to_float(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [convert_decimals_to_float(item) for item in data]
-    elif isinstance(data, Decimal):
-        return float(data)
-    else:
-        return data
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return not_modified_response(exc.etag)
+
+@app.exception_handler(PoolExhaustedError)
+async def pool_exhausted_handler(request: Request, exc: PoolExhaustedError):
+    logger.warning(f"{request.url.path}: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Database busy, please retry"})
 
 # CORS pentru frontend
 app.add_middleware(
@@ -78,8 +131,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Query-Trace-Id"],
 )
 
+# Trace SQL per cerere și metrici Prometheus (middleware-ul exterior măsoară și CORS)
+app.add_middleware(tracing.QueryTraceMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.registry.add_collector(
+    "db_pool", lambda: DB_POOL.get_stats() if DB_POOL is not None else {}, "Pool conexiuni MySQL",
+    counter_keys=("connections_created", "connections_closed", "checkouts", "checkout_waits",
+                  "checkout_wait_ms_total", "exhausted", "health_check_failures", "recycled"))
+metrics.registry.add_collector(
+    "reference_cache", lambda: reference_cache.get_stats(), "Cache date de referință",
+    counter_keys=("hits", "misses", "evictions", "expirations"))
+metrics.registry.add_collector(
+    "audit_pipeline", lambda: audit_pipeline.get_stats(), "Pipeline audit",
+    counter_keys=("enqueued", "written", "batches", "backpressure_waits", "overflow", "flush_failures",
+                  "salvaged_batches", "user_ids_cleared", "dead_letters"))
+metrics.registry.add_collector(
+    "change_events", lambda: events.event_bus.get_stats(), "Evenimente de modificare (SSE)",
+    counter_keys=("dispatched", "delivered", "resyncs", "poll_failures"))
+
 # Modele Pydantic
 class User(BaseModel):
     id: Optional[int] = None
@@ -164,98 +236,10 @@ def init_db():
         
         # Conectează la baza de date creată
         conn = pymysql.connect(**MYSQL_CONFIG)
-        cursor = conn.cursor()
-
-        # Tabel utilizatori
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                role VARCHAR(50) NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                total_hours DECIMAL(10,2) DEFAULT 0.0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        print("Tabel 'users' creat/verificat")
 
-        # Tabel proiecte
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS projects (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                module_type VARCHAR(50) NOT NULL,
-                status VARCHAR(20) DEFAULT 'active',
-                total_hours DECIMAL(10,2) DEFAULT 0.0,
-                visibility_type VARCHAR(20) DEFAULT 'all',
-                visible_departments JSON DEFAULT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        print("Tabel 'projects' creat/verificat")
-        
-        # Migrație pentru a adăuga câmpurile de vizibilitate la tabelul existent
-        try:
-            cursor.execute("ALTER TABLE projects ADD COLUMN visibility_type VARCHAR(20) DEFAULT 'all'")
-            print("Câmp 'visibility_type' adăugat la tabelul 'projects'")
-        except pymysql.Error:
-            print("Câmp 'visibility_type' deja există în tabelul 'projects'")
-        
-        try:
-            cursor.execute("ALTER TABLE projects ADD COLUMN visible_departments JSON DEFAULT NULL")
-            print("Câmp 'visible_departments' adăugat la tabelul 'projects'")
-        except pymysql.Error:
-            print("Câmp 'visible_departments' deja există în tabelul 'projects'")
-
-        # Tabel task-uri
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                project_id INT NOT NULL,
-                description TEXT NOT NULL,
-                hours DECIMAL(10,2) NOT NULL,
-                date DATE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
-            )
-        """)
-        print("Tabel 'tasks' creat/verificat")
-
-        # Tabel comentarii task-uri
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS task_comments (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                task_id INT NOT NULL,
-                user_id INT NOT NULL,
-                comment TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-            )
-        """)
-        print("Tabel 'task_comments' creat/verificat")
-
-        # Tabel audit logs
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT,
-                action VARCHAR(100) NOT NULL,
-                entity_type VARCHAR(50) NOT NULL,
-                entity_id INT,
-                old_values JSON,
-                new_values JSON,
-                ip_address VARCHAR(45),
-                user_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE SET NULL
-            )
-        """)
-        print("Tabel 'audit_logs' creat/verificat")
+        # Tabelele și indecșii sunt gestionate de migrațiile versionate
+        applied = apply_migrations(conn)
+        print(f"Migrații aplicate: {applied}" if applied else "Schema este la zi")
 
         conn.commit()
         conn.close()
@@ -305,28 +289,61 @@ except FileNotFoundError:
     logger.error("MySQL config file not found. MySQL is required for this application.")
     MYSQL_CONFIG = None
 
-# Funcție pentru conexiunea la MySQL
+# Parametri de conectare MySQL
+def get_connection_params():
+    """Parametrii pymysql.connect pentru mediul curent"""
+    # Folosește variabilele de mediu pentru producție
+    if os.getenv('NODE_ENV') == 'production':
+        return {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'user': os.getenv('DB_USER', 'kpi_user'),
+            'password': os.getenv('DB_PASSWORD', 'kpi_password_2024'),
+            'database': os.getenv('DB_NAME', 'kpi_tracker'),
+            'port': int(os.getenv('DB_PORT', 3306)),
+            'charset': 'utf8mb4',
+            'autocommit': True
+        }
+    # Configurație pentru dezvoltare
+    if MYSQL_CONFIG is None:
+        raise FileNotFoundError("MySQL config not available")
+    # DB_NAME permite rularea pe altă bază de date (ex. benchmark-uri)
+    if os.getenv('DB_NAME'):
+        return dict(MYSQL_CONFIG, database=os.getenv('DB_NAME'))
+    return MYSQL_CONFIG
+
+# Backend de stocare: mysql (implicit) sau sqlite (embedded, fără server; vezi sqlite_backend.py)
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+
+# Pool de conexiuni (creat în lifespan)
+DB_POOL: Optional[ConnectionPool] = None
+
+def create_database():
+    """Pool-ul pentru backend-ul configurat"""
+    if DB_BACKEND == 'sqlite':
+        database = sqlite_backend.open_database()
+        # Baza de date embedded își aplică singură migrațiile la pornire
+        conn = database.acquire_writer()
+        try:
+            applied = apply_migrations(conn)
+        finally:
+            conn.close()
+        if applied:
+            logger.info(f"SQLite migrations applied: {applied}")
+        return database
+    return create_pool(get_connection_params())
+
+# Funcție pentru conexiunea la baza de date
 def get_db_connection():
-    """Conectare la baza de date MySQL"""
+    """Conexiune din pool (close() o returnează în pool)"""
     try:
-        # Folosește variabilele de mediu pentru producție
-        if os.getenv('NODE_ENV') == 'production':
-            connection = pymysql.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                user=os.getenv('DB_USER', 'kpi_user'),
-                password=os.getenv('DB_PASSWORD', 'kpi_password_2024'),
-                database=os.getenv('DB_NAME', 'kpi_tracker'),
-                port=int(os.getenv('DB_PORT', 3306)),
-                charset='utf8mb4',
-                autocommit=True
-            )
-        else:
-            # Configurație pentru dezvoltare
-            if MYSQL_CONFIG is None:
-                raise FileNotFoundError("MySQL config not available")
-            connection = pymysql.connect(**MYSQL_CONFIG)
-        
-        return connection
+        if DB_POOL is not None:
+            return DB_POOL.acquire()
+        # Fără pool (scripturi, înainte de startup) - conexiune directă
+        if DB_BACKEND == 'sqlite':
+            return sqlite_backend.open_connection()
+        return pymysql.connect(**get_connection_params())
+    except PoolExhaustedError:
+        raise
     except (pymysql.Error, FileNotFoundError) as e:
         logger.error(f"MySQL connection failed: {e}")
         logger.error("MySQL is required for this application. Please ensure MySQL is running and configured correctly.")
@@ -339,77 +356,8 @@ def init_mysql_db():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Tabel utilizatori
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                role VARCHAR(50) NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                total_hours DECIMAL(10,2) DEFAULT 0.00,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabel proiecte
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS projects (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                module_type VARCHAR(50) NOT NULL,
-                status VARCHAR(50) DEFAULT 'active',
-                total_hours DECIMAL(10,2) DEFAULT 0.00,
-                visibility_type VARCHAR(50) DEFAULT 'all',
-                visible_departments JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabel task-uri
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                project_id INT NOT NULL,
-                description TEXT NOT NULL,
-                hours DECIMAL(5,2) NOT NULL,
-                date DATE NOT NULL,
-                status VARCHAR(50) DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (project_id) REFERENCES projects (id)
-            )
-        """)
-        
-        # Tabel comentarii task-uri
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS task_comments (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                task_id INT NOT NULL,
-                user_id INT NOT NULL,
-                comment TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (task_id) REFERENCES tasks (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        
-        # Tabel audit logs
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                action VARCHAR(100) NOT NULL,
-                table_name VARCHAR(100) NOT NULL,
-                record_id INT NOT NULL,
-                old_values JSON,
-                new_values JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
+        # Tabelele și indecșii sunt gestionate de migrațiile versionate
+        apply_migrations(conn)
         
         # Adaugă demo user dacă nu există
         cursor.execute("SELECT COUNT(*) FROM users WHERE email = %s", ("demo@company.com",))
@@ -444,98 +392,164 @@ def init_mysql_db():
         logger.error(f"Error initializing MySQL database: {e}")
         raise
 
-def update_user_hours(user_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
-        cursor.execute("SELECT SUM(hours) FROM tasks WHERE user_id = ?", (user_id,))
-        result = cursor.fetchone()
-        total_hours = result[0] if result[0] is not None else 0.0
-        cursor.execute("UPDATE users SET total_hours = ? WHERE id = ?", (total_hours, user_id))
-    else:
-        cursor.execute("SELECT SUM(hours) FROM tasks WHERE user_id = %s", (user_id,))
-        result = cursor.fetchone()
-        total_hours = result[0] if result[0] is not None else 0.0
-        cursor.execute("UPDATE users SET total_hours = %s WHERE id = %s", (total_hours, user_id))
-    
-    conn.commit()
-    conn.close()
+def _to_decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
 
-def update_project_hours(project_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
-        cursor.execute("SELECT SUM(hours) FROM tasks WHERE project_id = ?", (project_id,))
-        result = cursor.fetchone()
-        total_hours = result[0] if result[0] is not None else 0.0
-        cursor.execute("UPDATE projects SET total_hours = ? WHERE id = ?", (total_hours, project_id))
-    else:
-        cursor.execute("SELECT SUM(hours) FROM tasks WHERE project_id = %s", (project_id,))
-        result = cursor.fetchone()
-        total_hours = result[0] if result[0] is not None else 0.0
-        cursor.execute("UPDATE projects SET total_hours = %s WHERE id = %s", (total_hours, project_id))
-    
-    conn.commit()
-    conn.close()
+def _adjust_user_hours(cursor, user_id: int, delta):
+    """Aplică diferența de ore pe total_hours al utilizatorului, în tranzacția curentă"""
+    if delta:
+        cursor.execute("UPDATE users SET total_hours = total_hours + %s WHERE id = %s", (delta, user_id))
+
+def _adjust_project_hours(cursor, project_id: int, delta):
+    """Aplică diferența de ore pe total_hours al proiectului, în tranzacția curentă"""
+    if delta:
+        cursor.execute("UPDATE projects SET total_hours = total_hours + %s WHERE id = %s", (delta, project_id))
+
+def _discount_cascaded_hours(cursor, column: str, entity_id: int):
+    """Înaintea ștergerii unui utilizator/proiect: orele task-urilor șterse în cascadă se scad din totalurile celeilalte părți"""
+    other, adjust = ("project_id", _adjust_project_hours) if column == "user_id" else ("user_id", _adjust_user_hours)
+    cursor.execute(f"""
+        SELECT {other} AS id, SUM(hours) AS hours FROM tasks
+        WHERE {column} = %s GROUP BY {other} ORDER BY {other}
+    """, (entity_id,))
+    for row in cursor.fetchall():
+        adjust(cursor, row['id'], -_to_decimal(row['hours']))
+
+# Reconciliere total_hours (corectează eventualele derive față de SUM(tasks.hours))
+HOURS_RECONCILE_INTERVAL = float(os.getenv('HOURS_RECONCILE_INTERVAL', 6 * 3600))
+
+def reconcile_total_hours(cursor):
+    """Găsește și repară utilizatorii/proiectele la care total_hours diferă de suma task-urilor"""
+    report = {}
+    for table, column in (("users", "user_id"), ("projects", "project_id")):
+        cursor.execute(f"""
+            SELECT e.id, e.total_hours AS stored, COALESCE(SUM(t.hours), 0) AS actual
+            FROM {table} e
+            LEFT JOIN tasks t ON t.{column} = e.id
+            GROUP BY e.id, e.total_hours
+            HAVING ROUND(stored, 2) <> ROUND(actual, 2)
+        """)
+        drifted = cursor.fetchall()
+        for row in drifted:
+            # Recalculează la momentul UPDATE-ului, ca să nu pierdem scrieri concurente
+            cursor.execute(f"""
+                UPDATE {table}
+                SET total_hours = (SELECT COALESCE(SUM(hours), 0) FROM tasks WHERE {column} = %s)
+                WHERE id = %s
+            """, (row['id'], row['id']))
+        report[table] = [
+            {"id": row['id'], "stored": float(row['stored'] or 0), "actual": float(row['actual'])}
+            for row in drifted
+        ]
+    if report['users'] or report['projects']:
+        resource_versions.bump(cursor, "users", "projects")
+    return report
+
+def reconcile_comment_counts(cursor):
+    drifted = comments.reconcile_comment_counts(cursor)
+    if drifted:
+        resource_versions.bump(cursor, "tasks")
+    return drifted
+
+RECONCILE_LOCK = "kpi:reconcile_hours"
+
+def reconcile_total_hours_exclusive():
+    """Reconcilierea, doar dacă nu rulează deja în alt worker (None altfel)"""
+    with repository.named_lock(RECONCILE_LOCK) as acquired:
+        if not acquired:
+            return None
+        report = repository.transaction_sync(reconcile_total_hours)
+        report['comment_counts'] = repository.transaction_sync(reconcile_comment_counts)
+        # Tot aici, întreținerea jurnalului de modificări al calendarului
+        repository.transaction_sync(rollups.prune_changes)
+        return report
+
+async def run_hours_reconciliation():
+    report = await repository.run(reconcile_total_hours_exclusive)
+    if report is None:
+        return None
+    if report['users'] or report['projects']:
+        await notify_change("users", "projects", action="reconciled")
+        logger.warning(f"total_hours drift repaired: {len(report['users'])} users, {len(report['projects'])} projects")
+    if report['comment_counts']:
+        await notify_change("tasks", action="reconciled")
+        logger.warning(f"comment_count drift repaired: {len(report['comment_counts'])} tasks")
+    return report
+
+async def periodic_hours_reconciliation(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_hours_reconciliation()
+        except Exception as e:
+            logger.error(f"total_hours reconciliation failed: {e}")
 
-def log_audit_event(user_id: int, action: str, entity_type: str, entity_id: int = None, 
+async def periodic_audit_archive(interval: int):
+    """Mută periodic evenimentele vechi de audit în audit_logs_archive"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await repository.run(audit.archive_audit_logs):
+                await notify_change("audit_logs")
+        except Exception as e:
+            logger.error(f"Audit log archiving failed: {e}")
+
+async def log_audit_event(user_id: int, action: str, entity_type: str, entity_id: int = None, 
                    old_values: dict = None, new_values: dict = None, 
                    ip_address: str = None, user_agent: str = None):
-    """Log audit event to database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT INTO audit_logs (user_id, action, entity_type, entity_id, old_values, new_values, ip_address, user_agent)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """, (user_id, action, entity_type, entity_id, 
-          json.dumps(old_values) if old_values else None,
-          json.dumps(new_values) if new_values else None,
-          ip_address, user_agent))
-    
-    conn.commit()
-    conn.close()
+    """Pune evenimentul în coada de audit; scrierea se face în loturi, în fundal"""
+    await audit_pipeline.record(user_id, action, entity_type, entity_id,
+                                old_values, new_values, ip_address, user_agent)
+
+def audit_request_info(request: Request) -> dict:
+    """IP-ul și user-agent-ul clientului pentru evenimentele de audit"""
+    return {
+        "ip_address": request.client.host if request.client else None,
+        "user_agent": request.headers.get("user-agent")
+    }
+
+def format_datetime_fields(rows, *fields):
+    """Convertește câmpurile datetime în string ISO pentru fiecare rând"""
+    for row in rows:
+        for field in fields:
+            value = row.get(field)
+            if value:
+                row[field] = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    return rows
+
+def parse_visible_departments(projects):
+    """Pregătește coloana JSON visible_departments pentru serializare (listă goală dacă lipsește)"""
+    for project in projects:
+        project['visible_departments'] = json_column(project.get('visible_departments'), [])
+    return projects
+
+async def notify_change(*resources, action=None, entity_id=None, user_id=None, department=None):
+    """După commit: worker-ul curent recitește versiunile resurselor modificate
+
+    Versiunile sunt incrementate în tranzacția scrierii (resource_versions.bump);
+    ceilalți worker-i le observă după cel mult RESOURCE_VERSIONS_TTL. Cache-ul
+    datelor de referință este indexat după ETag (versioned_key), deci intrările
+    vechi nu mai sunt citite după incrementare și expiră singure.
+    Cu action, modificarea este trimisă și clienților abonați la evenimente
+    (canalele utilizatorului și departamentului său).
+    """
+    resource_versions.invalidate(*resources)
+    if action is not None:
+        await events.publish(resources, action, entity_id, user_id, department)
 
 # API Endpoints
 
 # Utilizatori
-@app.get("/time-monitoring/api/users", response_model=List[User])
-async def get_users():
-    conn = get_db_connection()
-    
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users ORDER BY name")
-        users = [dict(row) for row in cursor.fetchall()]
-    else:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users ORDER BY name")
-        users = cursor.fetchall()
-    
-    conn.close()
-    return users
+@app.get("/time-monitoring/api/users", response_model=List[User], dependencies=[conditional("users", "tasks")])
+async def get_users(response: Response):
+    users = await reference_cache.get_or_load(
+        versioned_key("users"), lambda: repository.fetch_all("SELECT * FROM users ORDER BY name")
+    )
+    return fast_response(users, response)
 
-@app.get("/time-monitoring/api/users/email/{email}", response_model=User)
+@app.get("/time-monitoring/api/users/email/{email}", response_model=User, dependencies=[conditional("users", "tasks")])
 async def get_user_by_email(email: str):
-    conn = get_db_connection()
-    
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-        user_row = cursor.fetchone()
-        user = dict(user_row) if user_row else None
-    else:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        user = cursor.fetchone()
-    
-    conn.close()
+    user = await repository.fetch_one("SELECT * FROM users WHERE email = %s", (email,))
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -544,46 +558,32 @@ async def get_user_by_email(email: str):
 
 @app.post("/time-monitoring/api/users", response_model=User)
 async def create_user(user: User, request: Request):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Folosește valorile implicite dacă nu sunt furnizate
     role = user.role if user.role else "User"
     department = user.department if user.department else "IT"
     
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
+    def insert_user(cursor):
         # Verifică dacă email-ul există deja
-        cursor.execute("SELECT id FROM users WHERE email = ?", (user.email,))
+        cursor.execute("SELECT id FROM users WHERE email = %s", (user.email,))
         if cursor.fetchone():
-            conn.close()
             raise HTTPException(status_code=400, detail="Email already exists")
         
-        cursor.execute("INSERT INTO users (name, email, role, department) VALUES (?, ?, ?, ?)", 
+        cursor.execute("INSERT INTO users (name, email, role, department) VALUES (%s, %s, %s, %s)", 
                        (user.name, user.email, role, department))
-        user_id = cursor.lastrowid
-    else:
-    # Verifică dacă email-ul există deja
-        cursor.execute("SELECT id FROM users WHERE email = %s", (user.email,))
-    if cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=400, detail="Email already exists")
+        resource_versions.bump(cursor, "users")
+        return cursor.lastrowid
     
-    cursor.execute("INSERT INTO users (name, email, role, department) VALUES (%s, %s, %s, %s)", 
-                   (user.name, user.email, role, department))
-    user_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    user_id = await repository.transaction(insert_user)
+    await notify_change("users", action="created", entity_id=user_id, user_id=user_id, department=department)
     
     # Log audit event
-    log_audit_event(
+    await log_audit_event(
         user_id=user_id,
         action="CREATE_USER",
         entity_type="user",
         entity_id=user_id,
         new_values=user.dict(),
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
+        **audit_request_info(request)
     )
     
     user.id = user_id
@@ -593,319 +593,369 @@ async def create_user(user: User, request: Request):
 
 @app.put("/time-monitoring/api/users/{user_id}", response_model=User)
 async def update_user(user_id: int, user: User):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Verifică dacă utilizatorul există
-    cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Verifică dacă email-ul există pentru alt utilizator
-    cursor.execute("SELECT id FROM users WHERE email = %s AND id != %s", (user.email, user_id))
-    if cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=400, detail="Email already exists")
+    def save_user(cursor):
+        # Verifică dacă utilizatorul există
+        cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        # Verifică dacă email-ul există pentru alt utilizator
+        cursor.execute("SELECT id FROM users WHERE email = %s AND id != %s", (user.email, user_id))
+        if cursor.fetchone():
+            raise HTTPException(status_code=400, detail="Email already exists")
+        
+        cursor.execute("UPDATE users SET name = %s, email = %s, role = %s, department = %s WHERE id = %s", 
+                       (user.name, user.email, user.role, user.department, user_id))
+        resource_versions.bump(cursor, "users")
     
-    cursor.execute("UPDATE users SET name = %s, email = %s, role = %s, department = %s WHERE id = %s", 
-                   (user.name, user.email, user.role, user.department, user_id))
-    conn.commit()
-    conn.close()
+    await repository.transaction(save_user)
+    await notify_change("users", action="updated", entity_id=user_id, user_id=user_id, department=user.department)
     user.id = user_id
     return user
 
 @app.delete("/time-monitoring/api/users/{user_id}")
 async def delete_user(user_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
-    if cursor.rowcount == 0:
-        conn.close()
-        raise HTTPException(status_code=404, detail="User not found")
-    conn.commit()
-    conn.close()
+    def remove_user(cursor):
+        cursor.execute("SELECT department FROM users WHERE id = %s", (user_id,))
+        user = cursor.fetchone()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        # Zilele din calendar dispar odată cu agregările șterse în cascadă
+        rollups.log_changes_for(cursor, "user_id", user_id)
+        _discount_cascaded_hours(cursor, "user_id", user_id)
+        comments.discount_user_comments(cursor, user_id)
+        audit.fold_user_counts(cursor, user_id)
+        cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        # Task-urile și comentariile utilizatorului sunt șterse în cascadă; total_hours al proiectelor se schimbă
+        resource_versions.bump(cursor, "users", "projects", "tasks", "comments")
+        return user
+
+    user = await repository.transaction(remove_user)
+    await notify_change("users", "projects", "tasks", "comments", action="deleted", entity_id=user_id,
+                        user_id=user_id, department=user['department'])
     return {"message": "User deleted successfully"}
 
 # Proiecte
-@app.get("/time-monitoring/api/departments", response_model=List[str])
-async def get_departments():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT department FROM users WHERE department IS NOT NULL AND department != '' ORDER BY department")
-    departments = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return departments
-
-@app.get("/time-monitoring/api/projects", response_model=List[Project])
-async def get_projects():
-    conn = get_db_connection()
-    
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM projects ORDER BY module_type, name")
-        projects = [dict(row) for row in cursor.fetchall()]
-    else:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM projects ORDER BY module_type, name")
-        projects = cursor.fetchall()
-    
-    conn.close()
-    
-    # Convertim JSON string-urile înapoi în liste Python
-    for project in projects:
-        if project.get('visible_departments'):
-            try:
-                project['visible_departments'] = json.loads(project['visible_departments'])
-            except (json.JSONDecodeError, TypeError):
-                project['visible_departments'] = []
-        else:
-            project['visible_departments'] = []
-    
-    return projects
+@app.get("/time-monitoring/api/departments", response_model=List[str], dependencies=[conditional("users")])
+async def get_departments(response: Response):
+    async def load():
+        rows = await repository.fetch_all("SELECT DISTINCT department FROM users WHERE department IS NOT NULL AND department != '' ORDER BY department")
+        return [row['department'] for row in rows]
+    return fast_response(await reference_cache.get_or_load(versioned_key("departments"), load), response)
 
-@app.get("/time-monitoring/api/projects/department/{department}", response_model=List[Project])
-async def get_projects_for_department(department: str):
-    conn = get_db_connection()
-    
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
-        cursor = conn.cursor()
-        # Pentru SQLite, folosim o abordare simplificată
-        cursor.execute("SELECT * FROM projects ORDER BY module_type, name")
-        projects = [dict(row) for row in cursor.fetchall()]
-    else:
-        cursor = conn.cursor()
-        # Obținem proiectele care sunt vizibile pentru departamentul specificat
-        cursor.execute("""
-            SELECT * FROM projects 
-            WHERE visibility_type = 'all' 
-               OR (visibility_type = 'specific_departments' AND JSON_CONTAINS(visible_departments, %s))
-            ORDER BY module_type, name
-        """, (json.dumps(department),))
-        projects = cursor.fetchall()
-    
-    conn.close()
-    
-    # Convertim JSON string-urile înapoi în liste Python
-    for project in projects:
-        if project.get('visible_departments'):
-            try:
-                project['visible_departments'] = json.loads(project['visible_departments'])
-            except (json.JSONDecodeError, TypeError):
-                project['visible_departments'] = []
-        else:
-            project['visible_departments'] = []
-    
-    return projects
+@app.get("/time-monitoring/api/projects", response_model=List[Project], dependencies=[conditional("projects", "tasks")])
+async def get_projects(response: Response):
+    async def load():
+        projects = await repository.fetch_all("SELECT * FROM projects ORDER BY module_type, name")
+        return parse_visible_departments(projects)
+    return fast_response(await reference_cache.get_or_load(versioned_key("projects"), load), response)
 
-@app.get("/time-monitoring/api/projects/module/{module_type}", response_model=List[Project])
-async def get_projects_by_module(module_type: str):
-    conn = get_db_connection()
-    
-    # Verifică tipul de conexiune
-    if isinstance(conn, sqlite3.Connection):
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM projects WHERE module_type = ? ORDER BY name", (module_type,))
-        projects = [dict(row) for row in cursor.fetchall()]
-    else:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM projects WHERE module_type = %s ORDER BY name", (module_type,))
-        projects = cursor.fetchall()
-    
-    conn.close()
-    return projects
+@app.get("/time-monitoring/api/projects/department/{department}", response_model=List[Project], dependencies=[conditional("projects", "tasks")])
+async def get_projects_for_department(department: str, response: Response):
+    async def load():
+        # Proiectele vizibile pentru departament, prin indexul project_departments
+        projects = await repository.fetch_all(
+            "SELECT * FROM projects WHERE" + project_visibility.VISIBLE_TO_DEPARTMENT_SQL + "ORDER BY module_type, name",
+            (department,)
+        )
+        return parse_visible_departments(projects)
+    return fast_response(await reference_cache.get_or_load(versioned_key(f"projects:department:{department}"), load), response)
+
+@app.get("/time-monitoring/api/projects/module/{module_type}", response_model=List[Project], dependencies=[conditional("projects", "tasks")])
+async def get_projects_by_module(module_type: str, response: Response):
+    async def load():
+        projects = await repository.fetch_all("SELECT * FROM projects WHERE module_type = %s ORDER BY name", (module_type,))
+        return parse_visible_departments(projects)
+    return fast_response(await reference_cache.get_or_load(versioned_key(f"projects:module:{module_type}"), load), response)
 
 @app.post("/time-monitoring/api/projects", response_model=Project)
-async def create_project(project: Project):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+async def create_project(project: Project, request: Request):
     # Convertim visible_departments în JSON string pentru MySQL
     visible_departments_json = None
     if project.visible_departments:
         visible_departments_json = json.dumps(project.visible_departments)
     
-    cursor.execute("""
-        INSERT INTO projects (name, description, module_type, status, visibility_type, visible_departments) 
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (project.name, project.description, project.module_type, project.status, 
-          project.visibility_type, visible_departments_json))
-    
-    project_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    project.id = project_id
+    def insert_project(cursor):
+        cursor.execute("""
+            INSERT INTO projects (name, description, module_type, status, visibility_type, visible_departments) 
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (project.name, project.description, project.module_type, project.status, 
+              project.visibility_type, visible_departments_json))
+        project_id = cursor.lastrowid
+        project_visibility.sync_project_departments(cursor, project_id, project.visible_departments)
+        resource_versions.bump(cursor, "projects")
+        return project_id
+    
+    project.id = await repository.transaction(insert_project)
+    await notify_change("projects", action="created", entity_id=project.id)
+    
+    await log_audit_event(
+        user_id=None,
+        action="CREATE_PROJECT",
+        entity_type="project",
+        entity_id=project.id,
+        new_values=project.dict(),
+        **audit_request_info(request)
+    )
     return project
 
 @app.put("/time-monitoring/api/projects/{project_id}", response_model=Project)
-async def update_project(project_id: int, project: Project):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+async def update_project(project_id: int, project: Project, request: Request):
     # Convertim visible_departments în JSON string pentru MySQL
     visible_departments_json = None
     if project.visible_departments:
         visible_departments_json = json.dumps(project.visible_departments)
     
-    cursor.execute("""
-        UPDATE projects 
-        SET name = %s, description = %s, module_type = %s, status = %s, 
-            visibility_type = %s, visible_departments = %s
-        WHERE id = %s
-    """, (project.name, project.description, project.module_type, project.status,
-          project.visibility_type, visible_departments_json, project_id))
+    def save_project(cursor):
+        cursor.execute("SELECT * FROM projects WHERE id = %s", (project_id,))
+        old_project = cursor.fetchone()
+        if not old_project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        cursor.execute("""
+            UPDATE projects 
+            SET name = %s, description = %s, module_type = %s, status = %s, 
+                visibility_type = %s, visible_departments = %s
+            WHERE id = %s
+        """, (project.name, project.description, project.module_type, project.status,
+              project.visibility_type, visible_departments_json, project_id))
+        project_visibility.sync_project_departments(cursor, project_id, project.visible_departments)
+        rollups.update_project_module_type(cursor, project_id, project.module_type)
+        resource_versions.bump(cursor, "projects")
+        return old_project
+    
+    old_project = await repository.transaction(save_project)
+    await notify_change("projects", action="updated", entity_id=project_id)
     
-    conn.commit()
-    conn.close()
     project.id = project_id
+    await log_audit_event(
+        user_id=None,
+        action="UPDATE_PROJECT",
+        entity_type="project",
+        entity_id=project_id,
+        old_values=parse_visible_departments([old_project])[0],
+        new_values=project.dict(),
+        **audit_request_info(request)
+    )
     return project
 
 @app.delete("/time-monitoring/api/projects/{project_id}")
-async def delete_project(project_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM projects WHERE id = %s", (project_id,))
-    if cursor.rowcount == 0:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Project not found")
-    conn.commit()
-    conn.close()
+async def delete_project(project_id: int, request: Request):
+    def remove_project(cursor):
+        cursor.execute("SELECT * FROM projects WHERE id = %s", (project_id,))
+        project = cursor.fetchone()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        rollups.log_changes_for(cursor, "project_id", project_id)
+        _discount_cascaded_hours(cursor, "project_id", project_id)
+        cursor.execute("DELETE FROM projects WHERE id = %s", (project_id,))
+        # Task-urile și comentariile proiectului sunt șterse în cascadă; total_hours al utilizatorilor se schimbă
+        resource_versions.bump(cursor, "users", "projects", "tasks", "comments")
+        return project
+    
+    project = await repository.transaction(remove_project)
+    await notify_change("users", "projects", "tasks", "comments", action="deleted", entity_id=project_id)
+    
+    await log_audit_event(
+        user_id=None,
+        action="DELETE_PROJECT",
+        entity_type="project",
+        entity_id=project_id,
+        old_values=parse_visible_departments([project])[0],
+        **audit_request_info(request)
+    )
     return {"message": "Project deleted successfully"}
 
 # Task-uri
-@app.get("/time-monitoring/api/tasks", response_model=List[dict])
-async def get_tasks():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.*, u.name as user_name, u.department as user_department, p.name as project_name, p.module_type
-        FROM tasks t
-        JOIN users u ON t.user_id = u.id
-        JOIN projects p ON t.project_id = p.id
-        ORDER BY t.date DESC, t.created_at DESC
-    """)
-    tasks = cursor.fetchall()
-    conn.close()
-    
-    # Convertește datetime în string pentru fiecare task
-    for task in tasks:
-        if task['created_at']:
-            task['created_at'] = task['created_at'].isoformat() if hasattr(task['created_at'], 'isoformat') else str(task['created_at'])
-    
-    return tasks
+TASK_PAGE_SIZE_DEFAULT = 200
+TASK_PAGE_SIZE_MAX = 1000
 
-@app.get("/time-monitoring/api/tasks/department/{department}")
-async def get_department_tasks(department: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.*, u.name as user_name, u.department as user_department, p.name as project_name, p.module_type
-        FROM tasks t
-        JOIN users u ON t.user_id = u.id
-        JOIN projects p ON t.project_id = p.id
-        WHERE u.department = %s
-        ORDER BY t.date DESC, t.created_at DESC
-    """, (department,))
-    tasks = cursor.fetchall()
-    conn.close()
-    
-    # Convertește datetime în string pentru fiecare task
-    for task in tasks:
-        if task['created_at']:
-            task['created_at'] = task['created_at'].isoformat() if hasattr(task['created_at'], 'isoformat') else str(task['created_at'])
-    
-    return tasks
+TASK_LIST_SELECT = """
+    SELECT t.*, u.name as user_name, u.department as user_department, p.name as project_name, p.module_type
+    FROM tasks t
+    JOIN users u ON t.user_id = u.id
+    JOIN projects p ON t.project_id = p.id
+"""
 
-@app.get("/time-monitoring/api/tasks/user/{user_id}")
-async def get_user_tasks(user_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.*, p.name as project_name, p.module_type, u.department as user_department
-        FROM tasks t
-        JOIN projects p ON t.project_id = p.id
-        JOIN users u ON t.user_id = u.id
-        WHERE t.user_id = %s
-        ORDER BY t.date DESC, t.created_at DESC
-    """, (user_id,))
-    tasks = cursor.fetchall()
-    conn.close()
-    
-    # Convertește datetime în string pentru fiecare task
-    for task in tasks:
-        if task['created_at']:
-            task['created_at'] = task['created_at'].isoformat() if hasattr(task['created_at'], 'isoformat') else str(task['created_at'])
-    
-    return tasks
+class TaskPageParams:
+    """Parametri comuni de paginare (keyset pe date, created_at, id) și filtrare pentru listele de task-uri"""
 
-@app.get("/time-monitoring/api/tasks/date/{date}")
-async def get_tasks_by_date(date: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.*, u.name as user_name, p.name as project_name, p.module_type
-        FROM tasks t
-        JOIN users u ON t.user_id = u.id
-        JOIN projects p ON t.project_id = p.id
-        WHERE t.date = %s
-        ORDER BY t.created_at DESC
-    """, (date,))
-    tasks = cursor.fetchall()
-    conn.close()
-    
-    # Convertește datetime în string pentru fiecare task
-    for task in tasks:
-        if task['created_at']:
-            task['created_at'] = task['created_at'].isoformat() if hasattr(task['created_at'], 'isoformat') else str(task['created_at'])
-    
+    def __init__(
+        self,
+        limit: int = Query(TASK_PAGE_SIZE_DEFAULT, ge=1, le=TASK_PAGE_SIZE_MAX),
+        cursor: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        project_id: Optional[int] = None,
+        module_type: Optional[str] = None,
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.date_from = date_from
+        self.date_to = date_to
+        self.project_id = project_id
+        self.module_type = module_type
+
+def encode_cursor(*values) -> str:
+    """Cursor opac (base64url JSON) pentru cheia de sortare a ultimului rând din pagină"""
+    return base64.urlsafe_b64encode(json.dumps([str(value) for value in values]).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, *parsers) -> list:
+    """Valorile cursorului, validate pe rând de parsers (ValueError -> 400)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        # encode_cursor scrie doar șiruri, câte unul pentru fiecare coloană a cheii
+        if not isinstance(values, list) or len(values) != len(parsers) or not all(isinstance(v, str) for v in values):
+            raise ValueError("unexpected cursor shape")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def cursor_date(value: str) -> str:
+    datetime.date.fromisoformat(value)
+    return value
+
+def cursor_datetime(value: str) -> str:
+    datetime.datetime.fromisoformat(value)
+    return value
+
+def encode_task_cursor(task: dict) -> str:
+    """Cursor opac pentru poziția (date, created_at, id) a ultimului task din pagină"""
+    return encode_cursor(task['date'], task['created_at'], task['id'])
+
+def decode_task_cursor(cursor: str):
+    return tuple(decode_cursor(cursor, cursor_date, cursor_datetime, int))
+
+def task_page_query(select: str, page: TaskPageParams, conditions: List[str], params: list):
+    """Interogarea unei pagini de task-uri (filtre, poziția cursorului, ordine keyset, limit + 1)"""
+    conditions = list(conditions)
+    params = list(params)
+    
+    if page.date_from:
+        conditions.append("t.date >= %s")
+        params.append(page.date_from)
+    if page.date_to:
+        conditions.append("t.date <= %s")
+        params.append(page.date_to)
+    if page.project_id:
+        conditions.append("t.project_id = %s")
+        params.append(page.project_id)
+    if page.module_type:
+        conditions.append("p.module_type = %s")
+        params.append(page.module_type)
+    if page.cursor:
+        date, created_at, task_id = decode_task_cursor(page.cursor)
+        conditions.append("(t.date < %s OR (t.date = %s AND (t.created_at < %s OR (t.created_at = %s AND t.id < %s))))")
+        params.extend([date, date, created_at, created_at, task_id])
+    
+    query = select
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY t.date DESC, t.created_at DESC, t.id DESC LIMIT %s"
+    params.append(page.limit + 1)
+    return query, params
+
+def trim_task_page(response: Response, page: TaskPageParams, tasks: list) -> list:
+    """Păstrează primele limit rânduri; cursorul paginii următoare este trimis în X-Next-Cursor"""
+    if len(tasks) > page.limit:
+        tasks = tasks[:page.limit]
+        response.headers["X-Next-Cursor"] = encode_task_cursor(tasks[-1])
     return tasks
 
+async def fetch_task_page(response: Response, page: TaskPageParams, conditions: List[str], params: list):
+    """Returnează o pagină de task-uri; cursorul paginii următoare este trimis în X-Next-Cursor"""
+    query, params = task_page_query(TASK_LIST_SELECT, page, conditions, params)
+    tasks = await repository.fetch_all(query, params)
+    return fast_response(trim_task_page(response, page, tasks), response)
+
+@app.get("/time-monitoring/api/tasks", response_model=List[dict], dependencies=[conditional("tasks", "users", "projects")])
+async def get_tasks(response: Response, page: TaskPageParams = Depends()):
+    return await fetch_task_page(response, page, [], [])
+
+@app.get("/time-monitoring/api/tasks/department/{department}", dependencies=[conditional("tasks", "users", "projects")])
+async def get_department_tasks(department: str, response: Response, page: TaskPageParams = Depends()):
+    return await fetch_task_page(response, page, ["u.department = %s"], [department])
+
+@app.get("/time-monitoring/api/tasks/user/{user_id}", dependencies=[conditional("tasks", "users", "projects")])
+async def get_user_tasks(user_id: int, response: Response, page: TaskPageParams = Depends()):
+    return await fetch_task_page(response, page, ["t.user_id = %s"], [user_id])
+
+@app.get("/time-monitoring/api/tasks/date/{date}", dependencies=[conditional("tasks", "users", "projects")])
+async def get_tasks_by_date(date: str, response: Response, page: TaskPageParams = Depends()):
+    return await fetch_task_page(response, page, ["t.date = %s"], [date])
+
 @app.post("/time-monitoring/api/tasks", response_model=Task)
-async def create_task(task: TaskCreate):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Verifică dacă utilizatorul și proiectul există
-    cursor.execute("SELECT id FROM users WHERE id = %s", (task.user_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    cursor.execute("SELECT id FROM projects WHERE id = %s", (task.project_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Creează task-ul
-    cursor.execute("""
-        INSERT INTO tasks (user_id, project_id, description, hours, date) 
-        VALUES (%s, %s, %s, %s, %s)
-    """, (task.user_id, task.project_id, task.description, task.hours, task.date))
-    
-    task_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    # Actualizează orele totale
-    update_user_hours(task.user_id)
-    update_project_hours(task.project_id)
-    
+async def create_task(task: TaskCreate, request: Request):
+    def insert_task(cursor):
+        # Verifică dacă utilizatorul și proiectul există
+        cursor.execute("SELECT id FROM users WHERE id = %s", (task.user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        cursor.execute("SELECT id FROM projects WHERE id = %s", (task.project_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        # Creează task-ul
+        cursor.execute("""
+            INSERT INTO tasks (user_id, project_id, description, hours, date) 
+            VALUES (%s, %s, %s, %s, %s)
+        """, (task.user_id, task.project_id, task.description, task.hours, task.date))
+        task_id = cursor.lastrowid
+        
+        # Actualizează orele totale
+        _adjust_user_hours(cursor, task.user_id, _to_decimal(task.hours))
+        _adjust_project_hours(cursor, task.project_id, _to_decimal(task.hours))
+        rollups.adjust_daily_rollup(cursor, task.date, task.user_id, task.project_id, _to_decimal(task.hours), 1)
+        resource_versions.bump(cursor, "tasks")
+        return task_id
+    
+    task_id = await repository.transaction(insert_task)
+    await notify_change("tasks", action="created", entity_id=task_id, user_id=task.user_id)
+    
+    await log_audit_event(
+        user_id=task.user_id,
+        action="CREATE_TASK",
+        entity_type="task",
+        entity_id=task_id,
+        new_values=task.dict(),
+        **audit_request_info(request)
+    )
     return Task(id=task_id, **task.dict())
 
+@app.post("/time-monitoring/api/tasks/bulk")
+async def bulk_import_tasks(request: Request, format: Optional[str] = Query(None, pattern="^(json|ndjson|csv)$")):
+    """Import în masă: JSON array, NDJSON sau CSV (după Content-Type sau ?format=)"""
+    fmt = bulk_import.detect_format(request.headers.get("content-type"), format)
+    body = await request.body()
+    try:
+        rows = await run_in_threadpool(bulk_import.parse_rows, body, fmt)
+    except bulk_import.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    report = await repository.run(bulk_import.import_tasks, rows, TaskCreate)
+    if report["inserted"]:
+        await notify_change("tasks", action="imported")
+    logger.info(f"Bulk import: {report['inserted']}/{report['total']} tasks inserted, {report['failed']} failed")
+    
+    await log_audit_event(
+        user_id=None,
+        action="BULK_IMPORT_TASKS",
+        entity_type="task",
+        new_values={"format": fmt, "total": report["total"], "inserted": report["inserted"], "failed": report["failed"]},
+        **audit_request_info(request)
+    )
+    return report
+
 async def get_task_by_id(task_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+    task = await repository.fetch_one("""
         SELECT t.*, u.name as user_name, u.department as user_department, p.name as project_name, p.module_type
         FROM tasks t
         JOIN users u ON t.user_id = u.id
         JOIN projects p ON t.project_id = p.id
         WHERE t.id = %s
     """, (task_id,))
-    task = cursor.fetchone()
-    conn.close()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -913,309 +963,405 @@ async def get_task_by_id(task_id: int):
     return task
 
 @app.put("/time-monitoring/api/tasks/{task_id}", response_model=Task)
-async def update_task(task_id: int, task: Task):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        UPDATE tasks 
-        SET description = %s, hours = %s, date = %s
-        WHERE id = %s
-    """, (task.description, task.hours, task.date, task_id))
-    
-    if cursor.rowcount == 0:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Task not found")
+async def update_task(task_id: int, task: Task, request: Request):
+    def save_task(cursor):
+        cursor.execute("SELECT user_id, project_id, description, hours, date FROM tasks WHERE id = %s FOR UPDATE", (task_id,))
+        old_task = cursor.fetchone()
+        if not old_task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        # Verifică utilizatorul/proiectul doar dacă task-ul este mutat
+        if task.user_id != old_task['user_id']:
+            cursor.execute("SELECT id FROM users WHERE id = %s", (task.user_id,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="User not found")
+        if task.project_id != old_task['project_id']:
+            cursor.execute("SELECT id FROM projects WHERE id = %s", (task.project_id,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Project not found")
+        
+        cursor.execute("""
+            UPDATE tasks 
+            SET user_id = %s, project_id = %s, description = %s, hours = %s, date = %s
+            WHERE id = %s
+        """, (task.user_id, task.project_id, task.description, task.hours, task.date, task_id))
+        
+        # Actualizează orele totale cu diferențele (ore vechi vs. ore noi, mutări)
+        old_hours = old_task['hours']
+        new_hours = _to_decimal(task.hours)
+        if task.user_id == old_task['user_id']:
+            _adjust_user_hours(cursor, task.user_id, new_hours - old_hours)
+        else:
+            _adjust_user_hours(cursor, old_task['user_id'], -old_hours)
+            _adjust_user_hours(cursor, task.user_id, new_hours)
+        if task.project_id == old_task['project_id']:
+            _adjust_project_hours(cursor, task.project_id, new_hours - old_hours)
+        else:
+            _adjust_project_hours(cursor, old_task['project_id'], -old_hours)
+            _adjust_project_hours(cursor, task.project_id, new_hours)
+        
+        # Agregări zilnice: aceeași cheie primește diferența, altfel mutăm task-ul între chei
+        same_rollup = (str(old_task['date']) == str(task.date)
+                       and task.user_id == old_task['user_id']
+                       and task.project_id == old_task['project_id'])
+        if same_rollup:
+            rollups.adjust_daily_rollup(cursor, task.date, task.user_id, task.project_id, new_hours - old_hours, 0)
+        else:
+            rollups.adjust_daily_rollup(cursor, old_task['date'], old_task['user_id'], old_task['project_id'], -old_hours, -1)
+            rollups.adjust_daily_rollup(cursor, task.date, task.user_id, task.project_id, new_hours, 1)
+        resource_versions.bump(cursor, "tasks")
+        return old_task
     
-    conn.commit()
-    conn.close()
+    old_task = await repository.transaction(save_task)
+    await notify_change("tasks", action="updated", entity_id=task_id, user_id=task.user_id)
+    if old_task['user_id'] != task.user_id:
+        # Task mutat: și canalul utilizatorului anterior află că l-a pierdut
+        await events.publish(("tasks",), "updated", task_id, old_task['user_id'])
     
     # Returnează task-ul actualizat cu informațiile complete
     updated_task = await get_task_by_id(task_id)
+    format_datetime_fields([updated_task], 'date', 'created_at')
+    
+    await log_audit_event(
+        user_id=task.user_id,
+        action="UPDATE_TASK",
+        entity_type="task",
+        entity_id=task_id,
+        old_values=old_task,
+        new_values={key: updated_task[key] for key in ("user_id", "project_id", "description", "hours", "date")},
+        **audit_request_info(request)
+    )
     return updated_task
 
 @app.delete("/time-monitoring/api/tasks/{task_id}")
-async def delete_task(task_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Obține detaliile task-ului înainte de ștergere
-    cursor.execute("SELECT user_id, project_id FROM tasks WHERE id = %s", (task_id,))
-    task = cursor.fetchone()
-    if not task:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    user_id, project_id = task
-    
-    # Șterge task-ul
-    cursor.execute("DELETE FROM tasks WHERE id = %s", (task_id,))
-    conn.commit()
-    conn.close()
-    
-    # Actualizează orele totale
-    update_user_hours(user_id)
-    update_project_hours(project_id)
-    
+async def delete_task(task_id: int, request: Request):
+    def remove_task(cursor):
+        # Obține detaliile task-ului înainte de ștergere
+        cursor.execute("SELECT user_id, project_id, description, hours, date FROM tasks WHERE id = %s FOR UPDATE", (task_id,))
+        task = cursor.fetchone()
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        # Șterge task-ul
+        cursor.execute("DELETE FROM tasks WHERE id = %s", (task_id,))
+        
+        # Actualizează orele totale
+        _adjust_user_hours(cursor, task['user_id'], -task['hours'])
+        _adjust_project_hours(cursor, task['project_id'], -task['hours'])
+        rollups.adjust_daily_rollup(cursor, task['date'], task['user_id'], task['project_id'], -task['hours'], -1)
+        resource_versions.bump(cursor, "tasks", "comments")
+        return task
+    
+    task = await repository.transaction(remove_task)
+    await notify_change("tasks", "comments", action="deleted", entity_id=task_id, user_id=task['user_id'])
+    
+    await log_audit_event(
+        user_id=task['user_id'],
+        action="DELETE_TASK",
+        entity_type="task",
+        entity_id=task_id,
+        old_values=task,
+        **audit_request_info(request)
+    )
     return {"message": "Task deleted successfully"}
 
 # Comentarii Task-uri
-@app.get("/time-monitoring/api/tasks/{task_id}/comments", response_model=List[TaskComment])
-async def get_task_comments(task_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+@app.get("/time-monitoring/api/tasks/{task_id}/comments", response_model=List[TaskComment], dependencies=[conditional("comments", "users")])
+async def get_task_comments(task_id: int, response: Response):
+    comments = await repository.fetch_all("""
         SELECT tc.*, u.name as user_name
         FROM task_comments tc
         JOIN users u ON tc.user_id = u.id
         WHERE tc.task_id = %s
         ORDER BY tc.created_at ASC
     """, (task_id,))
-    comments = cursor.fetchall()
-    conn.close()
     
-    # Convertește datetime în string pentru fiecare comentariu
-    for comment in comments:
-        if comment['created_at']:
-            comment['created_at'] = comment['created_at'].isoformat() if hasattr(comment['created_at'], 'isoformat') else str(comment['created_at'])
-    
-    return comments
+    return fast_response(comments, response)
+
+TASK_KEYS_SELECT = """
+    SELECT t.id, t.date, t.created_at, t.comment_count
+    FROM tasks t
+    JOIN users u ON t.user_id = u.id
+    JOIN projects p ON t.project_id = p.id
+"""
+
+@app.get("/time-monitoring/api/comments", dependencies=[conditional("comments", "users", "tasks")])
+async def get_comments_batch(
+    response: Response,
+    task_ids: Optional[List[int]] = Query(None),
+    department: Optional[str] = None,
+    user_id: Optional[int] = None,
+    date: Optional[datetime.date] = None,
+    counts_only: bool = False,
+    preview: Optional[int] = Query(None, ge=1, le=50),
+    page: TaskPageParams = Depends(),
+):
+    """Comentariile mai multor task-uri, grupate pe task, într-o singură cerere
+
+    Task-urile sunt date explicit (task_ids=1&task_ids=2...) sau ca pagina de
+    listă corespunzătoare (department / user_id / date și aceiași parametri de
+    paginare ca /tasks, cu X-Next-Cursor). Cu counts_only=true se întoarce doar
+    {task_id: număr de comentarii}, din tasks.comment_count.
+    """
+    if task_ids:
+        ids = list(dict.fromkeys(task_ids))
+        if len(ids) > comments.COMMENT_BATCH_MAX_TASKS:
+            raise HTTPException(status_code=400, detail=f"At most {comments.COMMENT_BATCH_MAX_TASKS} task ids per request")
+
+        def load(cursor):
+            if counts_only:
+                return comments.load_comment_counts(cursor, ids)
+            return comments.load_comments(cursor, ids, preview)
+        return fast_response(await repository.with_cursor(load), response)
+
+    conditions, params = [], []
+    for column, value in (("u.department", department), ("t.user_id", user_id), ("t.date", date)):
+        if value is not None:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+    query, params = task_page_query(TASK_KEYS_SELECT, page, conditions, params)
+
+    def load_page(cursor):
+        cursor.execute(query, params)
+        tasks = trim_task_page(response, page, cursor.fetchall())
+        if counts_only:
+            return {task['id']: task['comment_count'] for task in tasks}
+        # Task-urile fără comentarii (după comment_count) nu mai ajung în interogare
+        grouped = comments.load_comments(cursor, [task['id'] for task in tasks if task['comment_count']], preview)
+        return {task['id']: grouped.get(task['id'], []) for task in tasks}
+    return fast_response(await repository.with_cursor(load_page), response)
 
 @app.post("/time-monitoring/api/tasks/{task_id}/comments", response_model=TaskComment)
 async def create_task_comment(task_id: int, comment: TaskCommentCreate, request: Request):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Verifică dacă task-ul există
-    cursor.execute("SELECT id FROM tasks WHERE id = %s", (task_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    # Creează comentariul
-    cursor.execute("""
-        INSERT INTO task_comments (task_id, user_id, comment)
-        VALUES (%s, %s, %s)
-    """, (task_id, comment.user_id, comment.comment))
-    
-    comment_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    def insert_comment(cursor):
+        # Verifică dacă task-ul există
+        cursor.execute("SELECT user_id FROM tasks WHERE id = %s", (task_id,))
+        task = cursor.fetchone()
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        # Creează comentariul
+        cursor.execute("""
+            INSERT INTO task_comments (task_id, user_id, comment)
+            VALUES (%s, %s, %s)
+        """, (task_id, comment.user_id, comment.comment))
+        comment_id = cursor.lastrowid
+        comments.adjust_comment_count(cursor, task_id, 1)
+        # comment_count face parte din listele de task-uri
+        resource_versions.bump(cursor, "tasks", "comments")
+        return comment_id, task['user_id']
+    
+    comment_id, task_user_id = await repository.transaction(insert_comment)
+    # Evenimentul merge pe canalul proprietarului task-ului
+    await notify_change("tasks", "comments", action="created", entity_id=task_id, user_id=task_user_id)
     
     # Log audit event
-    log_audit_event(
+    await log_audit_event(
         user_id=comment.user_id,
         action="CREATE_COMMENT",
         entity_type="task_comment",
         entity_id=comment_id,
         new_values={"task_id": task_id, "comment": comment.comment},
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
+        **audit_request_info(request)
     )
     
     # Returnează comentariul creat cu datele complete
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+    created_comment = await repository.fetch_one("""
         SELECT tc.*, u.name as user_name
         FROM task_comments tc
         JOIN users u ON tc.user_id = u.id
         WHERE tc.id = %s
     """, (comment_id,))
-    created_comment = cursor.fetchone()
-    conn.close()
     
     # Convertește datetime în string
-    if created_comment['created_at']:
-        created_comment['created_at'] = created_comment['created_at'].isoformat() if hasattr(created_comment['created_at'], 'isoformat') else str(created_comment['created_at'])
-    
+    format_datetime_fields([created_comment], 'created_at')
     return created_comment
 
 @app.delete("/time-monitoring/api/comments/{comment_id}")
 async def delete_task_comment(comment_id: int, request: Request):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Obține detaliile comentariului înainte de ștergere
-    cursor.execute("SELECT user_id, task_id, comment FROM task_comments WHERE id = %s", (comment_id,))
-    comment = cursor.fetchone()
-    if not comment:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Comment not found")
-    
-    user_id, task_id, comment_text = comment
+    def remove_comment(cursor):
+        # Obține detaliile comentariului înainte de ștergere
+        cursor.execute("""
+            SELECT tc.user_id, tc.task_id, tc.comment, t.user_id AS task_user_id
+            FROM task_comments tc
+            JOIN tasks t ON tc.task_id = t.id
+            WHERE tc.id = %s
+        """, (comment_id,))
+        comment = cursor.fetchone()
+        if not comment:
+            raise HTTPException(status_code=404, detail="Comment not found")
+        
+        # Șterge comentariul
+        cursor.execute("DELETE FROM task_comments WHERE id = %s", (comment_id,))
+        comments.adjust_comment_count(cursor, comment['task_id'], -1)
+        resource_versions.bump(cursor, "tasks", "comments")
+        return comment
     
-    # Șterge comentariul
-    cursor.execute("DELETE FROM task_comments WHERE id = %s", (comment_id,))
-    conn.commit()
-    conn.close()
+    comment = await repository.transaction(remove_comment)
+    await notify_change("tasks", "comments", action="deleted", entity_id=comment['task_id'], user_id=comment['task_user_id'])
     
     # Log audit event
-    log_audit_event(
-        user_id=user_id,
+    await log_audit_event(
+        user_id=comment['user_id'],
         action="DELETE_COMMENT",
         entity_type="task_comment",
         entity_id=comment_id,
-        old_values={"task_id": task_id, "comment": comment_text},
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
+        old_values={"task_id": comment['task_id'], "comment": comment['comment']},
+        **audit_request_info(request)
     )
     
     return {"message": "Comment deleted successfully"}
 
 # Audit Logs
-@app.get("/time-monitoring/api/audit-logs", response_model=List[AuditLog])
-async def get_audit_logs(skip: int = 0, limit: int = 100, user_id: Optional[int] = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = """
+AUDIT_PAGE_SIZE_MAX = 500
+
+@app.get("/time-monitoring/api/audit-logs", response_model=List[AuditLog], dependencies=[conditional("audit_logs", "users")])
+async def get_audit_logs(
+    response: Response,
+    limit: int = Query(100, ge=1, le=AUDIT_PAGE_SIZE_MAX),
+    user_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    archived: bool = False
+):
+    """Pagină de evenimente (keyset pe created_at, id); cursorul următor este trimis în X-Next-Cursor"""
+    table = "audit_logs_archive" if archived else "audit_logs"
+    query = f"""
         SELECT al.*, u.name as user_name
-        FROM audit_logs al
+        FROM {table} al
         LEFT JOIN users u ON al.user_id = u.id
     """
+    conditions = []
     params = []
     
     if user_id:
-        query += " WHERE al.user_id = %s"
+        conditions.append("al.user_id = %s")
         params.append(user_id)
+    if cursor:
+        created_at, log_id = decode_cursor(cursor, cursor_datetime, int)
+        conditions.append("(al.created_at < %s OR (al.created_at = %s AND al.id < %s))")
+        params.extend([created_at, created_at, log_id])
+    
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY al.created_at DESC, al.id DESC LIMIT %s"
+    params.append(limit + 1)
     
-    query += " ORDER BY al.created_at DESC LIMIT %s OFFSET %s"
-    params.extend([limit, skip])
+    logs = await repository.fetch_all(query, params)
     
-    cursor.execute(query, params)
-    logs = cursor.fetchall()
-    conn.close()
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1]['created_at'], logs[-1]['id'])
     
-    # Procesează JSON string-urile înapoi în dict-uri
+    # Coloanele JSON sunt incluse direct în răspuns
     for log in logs:
-        if log['old_values']:
-            try:
-                log['old_values'] = json.loads(log['old_values'])
-            except (json.JSONDecodeError, TypeError):
-                log['old_values'] = {}
-        else:
-            log['old_values'] = {}
-            
-        if log['new_values']:
-            try:
-                log['new_values'] = json.loads(log['new_values'])
-            except (json.JSONDecodeError, TypeError):
-                log['new_values'] = {}
-        else:
-            log['new_values'] = {}
-            
-        # Convertește datetime în string
-        if log['created_at']:
-            log['created_at'] = log['created_at'].isoformat() if hasattr(log['created_at'], 'isoformat') else str(log['created_at'])
+        log['old_values'] = json_column(log['old_values'], {})
+        log['new_values'] = json_column(log['new_values'], {})
     
-    return logs
+    return fast_response(logs, response)
 
-@app.get("/time-monitoring/api/audit-logs/stats")
+@app.get("/time-monitoring/api/audit-logs/stats", dependencies=[conditional("audit_logs", "users")])
 async def get_audit_stats():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Total logs
-    cursor.execute("SELECT COUNT(*) FROM audit_logs")
-    total_logs = cursor.fetchone()[0]
-    
-    # Logs by action
-    cursor.execute("""
-        SELECT action, COUNT(*) as count
-        FROM audit_logs
-        GROUP BY action
-        ORDER BY count DESC
-    """)
-    action_stats = cursor.fetchall()
-    
-    # Logs by user
-    cursor.execute("""
-        SELECT u.name, COUNT(al.id) as count
-        FROM audit_logs al
-        LEFT JOIN users u ON al.user_id = u.id
-        GROUP BY al.user_id, u.name
-        ORDER BY count DESC
-        LIMIT 10
-    """)
-    user_stats = cursor.fetchall()
+    """Statistici din contoarele menținute la scrierea evenimentelor (include arhiva)"""
+    def read_stats(cursor):
+        cursor.execute("SELECT action, count FROM audit_action_counts ORDER BY count DESC")
+        action_stats = cursor.fetchall()
+        
+        # Contoarele rămase de la utilizatori șterși intră într-un singur rând "Unknown"
+        cursor.execute("""
+            SELECT u.name, SUM(c.count) AS count
+            FROM audit_user_counts c
+            LEFT JOIN users u ON c.user_id = u.id
+            GROUP BY u.id, u.name
+            ORDER BY count DESC
+            LIMIT 10
+        """)
+        user_stats = cursor.fetchall()
+        return action_stats, user_stats
     
-    conn.close()
+    action_stats, user_stats = await repository.with_cursor(read_stats)
     
     return {
-        "total_logs": total_logs,
-        "action_stats": [{"action": row[0], "count": row[1]} for row in action_stats],
-        "user_stats": [{"user": row[0] or "Unknown", "count": row[1]} for row in user_stats]
+        "total_logs": sum(row['count'] for row in action_stats),
+        "action_stats": [{"action": row['action'], "count": row['count']} for row in action_stats],
+        "user_stats": [{"user": row['name'] or "Unknown", "count": int(row['count'])} for row in user_stats]
     }
 
-# Statistici
-@app.get("/time-monitoring/api/stats/overview")
+# Statistici (servite din daily_rollups)
+@app.get("/time-monitoring/api/stats/overview", dependencies=[conditional("users", "projects", "tasks")])
 async def get_overview_stats():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Total utilizatori
-    cursor.execute("SELECT COUNT(*) FROM users")
-    total_users = cursor.fetchone()[0]
-    
-    # Total ore
-    cursor.execute("SELECT SUM(hours) FROM tasks")
-    result = cursor.fetchone()
-    total_hours = result[0] if result[0] is not None else 0.0
-    
-    # Total proiecte active
-    cursor.execute("SELECT COUNT(*) FROM projects WHERE status = 'active'")
-    active_projects = cursor.fetchone()[0]
-    
-    # Total task-uri
-    cursor.execute("SELECT COUNT(*) FROM tasks")
-    total_tasks = cursor.fetchone()[0]
-    
-    # Utilizatorul cu cele mai multe ore
-    cursor.execute("""
-        SELECT u.name, SUM(t.hours) as total_hours
-        FROM users u
-        LEFT JOIN tasks t ON u.id = t.user_id
-        GROUP BY u.id, u.name
-        ORDER BY total_hours DESC
-        LIMIT 1
-    """)
-    top_user = cursor.fetchone()
+    def read_stats(cursor):
+        # Total utilizatori și proiecte active (tabele mici)
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM users) AS total_users,
+                   (SELECT COUNT(*) FROM projects WHERE status = 'active') AS active_projects
+        """)
+        counts = cursor.fetchone()
+        
+        # Total ore și task-uri
+        cursor.execute("SELECT SUM(hours) AS total_hours, SUM(task_count) AS total_tasks FROM daily_rollups")
+        totals = cursor.fetchone()
+        
+        # Utilizatorul cu cele mai multe ore
+        cursor.execute("""
+            SELECT u.name, r.total_hours
+            FROM (
+                SELECT user_id, SUM(hours) AS total_hours
+                FROM daily_rollups
+                GROUP BY user_id
+                ORDER BY total_hours DESC
+                LIMIT 1
+            ) r
+            JOIN users u ON u.id = r.user_id
+        """)
+        top_user = cursor.fetchone()
+        
+        # Numărul de task-uri pe utilizator și pe proiect (listele nu mai încarcă toate task-urile)
+        cursor.execute("SELECT user_id, SUM(task_count) AS tasks FROM daily_rollups GROUP BY user_id")
+        user_task_counts = {row['user_id']: int(row['tasks']) for row in cursor.fetchall()}
+        cursor.execute("SELECT project_id, SUM(task_count) AS tasks FROM daily_rollups GROUP BY project_id")
+        project_task_counts = {row['project_id']: int(row['tasks']) for row in cursor.fetchall()}
+        return counts, totals, top_user, user_task_counts, project_task_counts
     
-    conn.close()
+    counts, totals, top_user, user_task_counts, project_task_counts = await repository.with_cursor(read_stats)
+    total_users = counts['total_users']
+    total_hours = totals['total_hours'] if totals['total_hours'] is not None else 0.0
     
     return {
         "total_users": total_users,
         "total_hours": total_hours,
-        "active_projects": active_projects,
-        "total_tasks": total_tasks,
+        "active_projects": counts['active_projects'],
+        "total_tasks": int(totals['total_tasks'] or 0),
         "top_user": {
-            "name": top_user[0] if top_user else "N/A",
-            "hours": float(top_user[1]) if top_user and top_user[1] else 0.0
+            "name": top_user['name'] if top_user else "N/A",
+            "hours": float(top_user['total_hours']) if top_user and top_user['total_hours'] else 0.0
         },
-        "average_hours_per_user": total_hours / total_users if total_users > 0 else 0
+        "average_hours_per_user": total_hours / total_users if total_users > 0 else 0,
+        "user_task_counts": user_task_counts,
+        "project_task_counts": project_task_counts
     }
 
-@app.get("/time-monitoring/api/stats/daily/{date}")
+@app.get("/time-monitoring/api/stats/daily/{date}", dependencies=[conditional("users", "tasks")])
 async def get_daily_stats(date: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT u.name, SUM(t.hours) as daily_hours
-        FROM users u
-        LEFT JOIN tasks t ON u.id = t.user_id AND t.date = %s
-        GROUP BY u.id, u.name
-        ORDER BY daily_hours DESC
-    """, (date,))
-    
-    user_stats = cursor.fetchall()
-    
-    cursor.execute("SELECT SUM(hours) FROM tasks WHERE date = %s", (date,))
-    result = cursor.fetchone()
-    total_daily_hours = result[0] if result[0] is not None else 0.0
+    def read_stats(cursor):
+        cursor.execute("""
+            SELECT u.name, r.daily_hours
+            FROM users u
+            LEFT JOIN (
+                SELECT user_id, SUM(hours) AS daily_hours
+                FROM daily_rollups
+                WHERE date = %s
+                GROUP BY user_id
+            ) r ON r.user_id = u.id
+            ORDER BY r.daily_hours DESC
+        """, (date,))
+        user_stats = cursor.fetchall()
+        
+        cursor.execute("SELECT SUM(hours) AS total FROM daily_rollups WHERE date = %s", (date,))
+        result = cursor.fetchone()
+        total_daily_hours = result['total'] if result['total'] is not None else 0.0
+        return user_stats, total_daily_hours
     
-    conn.close()
+    user_stats, total_daily_hours = await repository.with_cursor(read_stats)
     
     return {
         "date": date,
@@ -1223,186 +1369,222 @@ async def get_daily_stats(date: str):
         "user_stats": user_stats
     }
 
+# Calendar
+@app.get("/time-monitoring/api/calendar", dependencies=[conditional("users", "tasks")])
+async def get_calendar(
+    response: Response,
+    date_from: datetime.date,
+    date_to: datetime.date,
+    user_id: Optional[int] = None,
+    department: Optional[str] = None,
+    project_id: Optional[int] = None,
+    by_project: bool = True,
+    format: str = Query("matrix", pattern="^(matrix|columnar)$"),
+    since: Optional[int] = Query(None, ge=0),
+):
+    """Ore pe utilizator × zi (× proiect) pentru un interval, dintr-o singură interogare grupată
+
+    Cu since=<version> din răspunsul anterior se întorc doar celulele modificate.
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if (date_to - date_from).days + 1 > calendar_range.CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range exceeds {calendar_range.CALENDAR_MAX_DAYS} days")
+
+    def load(cursor):
+        return calendar_range.load_calendar(
+            cursor, date_from, date_to, by_project=by_project, fmt=format, since=since,
+            user_id=user_id, department=department, project_id=project_id
+        )
+    return fast_response(await repository.with_cursor(load), response)
+
+# Evenimente
+@app.get("/time-monitoring/api/events")
+async def stream_change_events(
+    request: Request,
+    department: Optional[str] = None,
+    user_id: Optional[int] = None,
+    last_event_id: Optional[int] = Query(None, ge=0),
+):
+    """Server-Sent Events: modificările din toate resursele, ale unui departament sau ale unui utilizator
+
+    EventSource retrimite automat Last-Event-ID la reconectare; la "resync"
+    clientul reîncarcă datele, în rest reîncarcă doar resursele din eveniment.
+    """
+    header = request.headers.get("last-event-id")
+    if header and header.isdigit():
+        last_event_id = int(header)
+    subscriber = events.event_bus.subscribe(department, user_id, last_event_id)
+    return StreamingResponse(
+        events.stream(events.event_bus, subscriber),
+        media_type="text/event-stream",
+        # Fără buffering în proxy (nginx), altfel evenimentele ajung în loturi
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Sistem
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Metrici în format Prometheus"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/time-monitoring/api/system/query-traces")
+async def get_query_traces(
+    limit: int = Query(50, ge=1, le=tracing.QUERY_TRACE_BUFFER),
+    min_queries: int = Query(0, ge=0),
+    path: Optional[str] = None
+):
+    """Ultimele cereri cu interogările SQL executate (parametrii redactați)"""
+    return tracing.get_recent_traces(limit, min_queries, path)
+
+@app.get("/time-monitoring/api/system/query-traces/{trace_id}")
+async def get_query_trace(trace_id: str):
+    trace = tracing.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+@app.get("/time-monitoring/api/system/slow-queries")
+async def get_slow_queries(limit: int = Query(50, ge=1, le=tracing.QUERY_TRACE_BUFFER)):
+    """Interogările peste pragul SLOW_QUERY_MS, cele mai recente primele"""
+    return {"threshold_ms": tracing.SLOW_QUERY_MS, "queries": tracing.get_slow_queries(limit)}
+
+@app.get("/time-monitoring/api/system/db-pool")
+async def get_db_pool_stats():
+    """Statistici pool de conexiuni MySQL"""
+    if DB_POOL is None:
+        return {"enabled": False}
+    return {"enabled": True, **DB_POOL.get_stats()}
+
+@app.get("/time-monitoring/api/system/cache")
+async def get_cache_stats():
+    """Statistici cache date de referință (hit/miss)"""
+    return reference_cache.get_stats()
+
+@app.get("/time-monitoring/api/system/audit")
+async def get_audit_pipeline_stats():
+    """Statistici pipeline audit (coadă, loturi scrise, backpressure, overflow)"""
+    return audit_pipeline.get_stats()
+
+@app.post("/time-monitoring/api/system/archive-audit-logs")
+async def archive_audit_logs(retention_days: int = Query(audit.AUDIT_RETENTION_DAYS, ge=1)):
+    """Mută imediat în arhivă evenimentele mai vechi de retention_days"""
+    moved = await repository.run(audit.archive_audit_logs, retention_days)
+    if moved:
+        await notify_change("audit_logs")
+    return {"archived": moved, "retention_days": retention_days}
+
+@app.post("/time-monitoring/api/system/reconcile-hours")
+async def reconcile_hours():
+    """Reconciliere la cerere a total_hours (utilizatori, proiecte) și a comment_count (task-uri)"""
+    report = await run_hours_reconciliation()
+    if report is None:
+        raise HTTPException(status_code=409, detail="Hours reconciliation already running")
+    return report
+
 # Export endpoints
 @app.get("/time-monitoring/api/export/json")
-async def export_json():
-    """Export all data as JSON"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all data
-        cursor.execute("SELECT * FROM users ORDER BY name")
-        users = cursor.fetchall()
-        
-        cursor.execute("SELECT * FROM projects ORDER BY module_type, name")
-        projects = cursor.fetchall()
-        
-        cursor.execute("""
-            SELECT t.*, u.name as user_name, p.name as project_name, p.module_type
-            FROM tasks t
-            JOIN users u ON t.user_id = u.id
-            JOIN projects p ON t.project_id = p.id
-            ORDER BY t.date DESC, t.created_at DESC
-        """)
-        tasks = cursor.fetchall()
-        
-        conn.close()
-        
-        # Convertește tipurile Decimal în float pentru serializare JSON
-        users = convert_decimals_to_float(users)
-        projects = convert_decimals_to_float(projects)
-        tasks = convert_decimals_to_float(tasks)
-        
-        export_data = {
-            "export_info": {
-                "timestamp": datetime.datetime.now().isoformat(),
-                "version": "1.0.0",
-                "format": "json"
-            },
-            "users": users,
-            "projects": projects,
-            "tasks": tasks
-        }
-        
-        return JSONResponse(content=export_data)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+async def export_json(
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    department: Optional[str] = None
+):
+    """Export data as a streamed JSON document or NDJSON"""
+    filters = {"date_from": date_from, "date_to": date_to, "department": department}
+    sections = exports.export_sections(date_from, date_to, department)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            metrics.timed_stream(exports.iter_ndjson_export(sections, filters), "ndjson"),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="kpi_export_{timestamp}.ndjson"'}
+        )
+    return StreamingResponse(
+        metrics.timed_stream(exports.iter_json_export(sections, filters), "json"),
+        media_type="application/json"
+    )
 
 @app.get("/time-monitoring/api/export/xml")
-async def export_xml():
-    """Export all data as XML"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all data
-        cursor.execute("SELECT * FROM users ORDER BY name")
-        users = cursor.fetchall()
-        
-        cursor.execute("SELECT * FROM projects ORDER BY module_type, name")
-        projects = cursor.fetchall()
-        
-        cursor.execute("""
-            SELECT t.*, u.name as user_name, p.name as project_name, p.module_type
-            FROM tasks t
-            JOIN users u ON t.user_id = u.id
-            JOIN projects p ON t.project_id = p.id
-            ORDER BY t.date DESC, t.created_at DESC
-        """)
-        tasks = cursor.fetchall()
-        
-        conn.close()
-        
-        # Convertește tipurile Decimal în float pentru serializare
-        users = convert_decimals_to_float(users)
-        projects = convert_decimals_to_float(projects)
-        tasks = convert_decimals_to_float(tasks)
-        
-        # Create XML structure
-        root = ET.Element("kpi_export")
-        root.set("timestamp", datetime.datetime.now().isoformat())
-        root.set("version", "1.0.0")
-        
-        # Users
-        users_elem = ET.SubElement(root, "users")
-        for user in users:
-            user_elem = ET.SubElement(users_elem, "user")
-            for key, value in user.items():
-                user_elem.set(key, str(value))
-        
-        # Projects
-        projects_elem = ET.SubElement(root, "projects")
-        for project in projects:
-            project_elem = ET.SubElement(projects_elem, "project")
-            for key, value in project.items():
-                project_elem.set(key, str(value))
-        
-        # Tasks
-        tasks_elem = ET.SubElement(root, "tasks")
-        for task in tasks:
-            task_elem = ET.SubElement(tasks_elem, "task")
-            for key, value in task.items():
-                task_elem.set(key, str(value))
-        
-        # Convert to string
-        xml_str = ET.tostring(root, encoding='unicode', xml_declaration=True)
-        
-        return JSONResponse(content={"xml": xml_str})
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+async def export_xml(
+    gzip: bool = False,
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    department: Optional[str] = None
+):
+    """Export data as a streamed XML document"""
+    sections = exports.export_sections(date_from, date_to, department)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    headers = {"Content-Disposition": f'attachment; filename="kpi_export_{timestamp}.xml"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        metrics.timed_stream(exports.iter_xml_export(sections, compress=gzip), "xml"),
+        media_type="application/xml",
+        headers=headers
+    )
 
 @app.get("/time-monitoring/api/export/excel")
-async def export_excel():
-    """Export all data as Excel file"""
+async def export_excel(
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    department: Optional[str] = None
+):
+    """Export data as Excel file (for large exports use the background job endpoints)"""
+    sections = exports.export_sections(date_from, date_to, department)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all data
-        cursor.execute("SELECT * FROM users ORDER BY name")
-        users = cursor.fetchall()
-        
-        cursor.execute("SELECT * FROM projects ORDER BY module_type, name")
-        projects = cursor.fetchall()
-        
-        cursor.execute("""
-            SELECT t.*, u.name as user_name, p.name as project_name, p.module_type
-            FROM tasks t
-            JOIN users u ON t.user_id = u.id
-            JOIN projects p ON t.project_id = p.id
-            ORDER BY t.date DESC, t.created_at DESC
-        """)
-        tasks = cursor.fetchall()
-        
-        conn.close()
-        
-        # Convertește tipurile Decimal în float pentru pandas
-        users = convert_decimals_to_float(users)
-        projects = convert_decimals_to_float(projects)
-        tasks = convert_decimals_to_float(tasks)
-        
-        # Create Excel file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            with pd.ExcelWriter(tmp_file.name, engine='openpyxl') as writer:
-                # Users sheet
-                users_df = pd.DataFrame(users)
-                users_df.to_excel(writer, sheet_name='Users', index=False)
-                
-                # Projects sheet
-                projects_df = pd.DataFrame(projects)
-                projects_df.to_excel(writer, sheet_name='Projects', index=False)
-                
-                # Tasks sheet
-                tasks_df = pd.DataFrame(tasks)
-                tasks_df.to_excel(writer, sheet_name='Tasks', index=False)
-                
-                # Summary sheet
-                summary_data = {
-                    'Metric': ['Total Users', 'Total Projects', 'Total Tasks', 'Total Hours'],
-                    'Value': [
-                        len(users),
-                        len(projects),
-                        len(tasks),
-                        sum(task.get('hours', 0) for task in tasks)
-                    ]
-                }
-                summary_df = pd.DataFrame(summary_data)
-                summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Return file
-            return FileResponse(
-                tmp_file.name,
-                media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                filename=f'kpi_export_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-            )
-        
+        file_path = await run_in_threadpool(exports.build_excel_file, sections)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+    
+    # Fișierul temporar este șters după trimiterea răspunsului
+    return FileResponse(
+        file_path,
+        media_type=exports.EXCEL_MEDIA_TYPE,
+        filename=f'kpi_export_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx',
+        background=BackgroundTask(exports.remove_file, file_path)
+    )
+
+@app.post("/time-monitoring/api/export/excel/jobs", status_code=202)
+async def create_excel_export_job(
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    department: Optional[str] = None
+):
+    """Start an Excel export in the background"""
+    filters = {"date_from": date_from, "date_to": date_to, "department": department}
+    sections = exports.export_sections(date_from, date_to, department)
+    return await run_in_threadpool(exports.start_excel_job, sections, filters)
+
+@app.get("/time-monitoring/api/export/excel/jobs/{job_id}")
+async def get_excel_export_job(job_id: str):
+    """Status of a background Excel export"""
+    job = await run_in_threadpool(exports.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+@app.get("/time-monitoring/api/export/excel/jobs/{job_id}/download")
+async def download_excel_export_job(job_id: str):
+    """Download the result of a completed Excel export"""
+    job = await run_in_threadpool(exports.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+    
+    created = datetime.datetime.fromtimestamp(job['created_at'])
+    return FileResponse(
+        exports.job_file_path(job),
+        media_type=exports.EXCEL_MEDIA_TYPE,
+        filename=f'kpi_export_{created.strftime("%Y%m%d_%H%M%S")}.xlsx'
+    )
 
 if __name__ == "__main__":
     # Nu inițializa MySQL la pornire - va folosi SQLite fallback
     logger.info("Starting Time Management API server")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # WEB_CONCURRENCY > 1 pornește mai mulți worker-i (gunicorn); vezi server.py
+    import server
+    server.run(app)
@@ -0,0 +1,381 @@
+"""
+Metrici în format Prometheus (text exposition 0.0.4), fără dependențe externe
+
+Contoare, gauge-uri și histograme cu etichete, thread-safe, plus colectori
+apelați la fiecare citire /metrics pentru valorile menținute în altă parte
+(pool de conexiuni, cache, pipeline audit). MetricsMiddleware măsoară fiecare
+cerere HTTP și etichetează interogările DB cu ruta care le-a generat.
+Cu mai mulți worker-i, valorile tuturor proceselor sunt însumate la citire.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EXPORT_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'kpi_metrics'))
+METRICS_SYNC_INTERVAL = float(os.getenv('METRICS_SYNC_INTERVAL', 5))
+METRICS_MULTIPROCESS = int(os.getenv('WEB_CONCURRENCY', 1)) > 1
+
+# Scope-ul ASGI al cererii curente; propagat în executorul DB prin copy_context()
+current_scope = contextvars.ContextVar('current_scope', default=None)
+
+_route_labels = {}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.documentation, "labelnames": list(self.labelnames),
+                "values": values}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), [list(state[0]), state[1], state[2]]] for key, state in self._values.items()]
+        # +Inf nu este reprezentabil în JSON; ultima limită este implicită
+        return {"kind": self.kind, "help": self.documentation, "labelnames": list(self.labelnames),
+                "buckets": list(self.buckets[:-1]), "values": values}
+
+
+def _merge_value(kind, current, value):
+    if current is None:
+        return [list(value[0]), value[1], value[2]] if kind == "histogram" else value
+    if kind == "histogram":
+        return [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1], current[2] + value[2]]
+    return current + value
+
+
+def merge_snapshots(snapshots):
+    """Însumează snapshot-urile mai multor procese (contoare, gauge-uri și histograme)"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = dict(metric, values={})
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                target["values"][key] = _merge_value(metric["kind"], target["values"].get(key), value)
+    return merged
+
+
+def render_snapshot(merged):
+    lines = []
+    for name, metric in merged.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        labelnames = metric["labelnames"]
+        for key, value in sorted(metric["values"].items()):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(metric["buckets"]) + [float('inf')], counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+            labels = _format_labels(labelnames, key)
+            lines.append(f"{name}_sum{labels} {round(total, 6)}")
+            lines.append(f"{name}_count{labels} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class Registry:
+    """Metricile înregistrate și colectorii evaluați la fiecare citire
+
+    Cu mai mulți worker-i (enable_multiprocess), fiecare proces își scrie
+    periodic snapshot-ul în METRICS_DIR, iar /metrics însumează toate
+    snapshot-urile, indiferent de worker-ul care răspunde.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self.directory = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, prefix, read_stats, documentation, counter_keys=()):
+        """read_stats() -> dict; fiecare cheie numerică devine metrica prefix_cheie (gauge sau counter)"""
+        self._collectors.append((prefix, read_stats, documentation, frozenset(counter_keys)))
+
+    def snapshot(self):
+        snapshot = {metric.name: metric.snapshot() for metric in self._metrics}
+        for prefix, read_stats, documentation, counter_keys in self._collectors:
+            try:
+                stats = read_stats() or {}
+            except Exception:
+                continue
+            for key, value in sorted(stats.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                snapshot[f"{prefix}_{key}"] = {
+                    "kind": "counter" if key in counter_keys else "gauge",
+                    "help": f"{documentation} ({key})", "labelnames": [], "values": [[[], value]],
+                }
+        return snapshot
+
+    def enable_multiprocess(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def write_snapshot(self):
+        """Scrie atomic snapshot-ul procesului curent în directorul partajat"""
+        if self.directory is None:
+            return
+        path = self._snapshot_path(os.getpid())
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def remove_snapshot(self):
+        if self.directory is not None:
+            try:
+                os.remove(self._snapshot_path(os.getpid()))
+            except OSError:
+                pass
+
+    def _other_snapshots(self):
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            pid = int(filename[:-5]) if filename[:-5].isdigit() else None
+            if pid is None or pid == os.getpid():
+                continue
+            path = os.path.join(self.directory, filename)
+            if not pid_alive(pid):
+                # Worker oprit fără curățare (ex. SIGKILL)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self):
+        snapshots = [self.snapshot()]
+        if self.directory is not None:
+            snapshots += self._other_snapshots()
+        return render_snapshot(merge_snapshots(snapshots))
+
+
+def pid_alive(pid):
+    """Procesul pid încă rulează (pe aceeași mașină)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+async def sync_snapshots(interval):
+    """Task de fundal per worker: publică snapshot-ul la fiecare interval secunde"""
+    try:
+        while True:
+            try:
+                registry.write_snapshot()
+            except OSError as e:
+                logger.error(f"Metrics snapshot failed: {e}")
+            await asyncio.sleep(interval)
+    finally:
+        registry.remove_snapshot()
+
+
+registry = Registry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "Cereri HTTP procesate", ("method", "route", "status"))
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Durata cererilor HTTP", ("method", "route"))
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "Cereri HTTP în curs", ("method",))
+db_queries_total = registry.counter(
+    "db_queries_total", "Interogări DB executate, pe handler", ("handler",))
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Durata interogărilor DB, pe handler", ("handler",))
+export_duration_seconds = registry.histogram(
+    "export_duration_seconds", "Durata generării exporturilor", ("format", "mode", "status"), EXPORT_BUCKETS)
+
+
+def route_label(scope):
+    """Șablonul rutei (ex. /tasks/user/{user_id}) pentru scope-ul rutat, ca etichetă cu cardinalitate mică"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    label = _route_labels.get(endpoint)
+    if label is None:
+        label = "unmatched"
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                label = route.path
+                break
+        _route_labels[endpoint] = label
+    return label
+
+
+def current_handler():
+    scope = current_scope.get()
+    return route_label(scope) if scope is not None else "background"
+
+
+def observe_query(seconds):
+    handler = current_handler()
+    db_queries_total.inc(handler=handler)
+    db_query_duration_seconds.observe(seconds, handler=handler)
+
+
+def timed_stream(chunks, format, mode="stream"):
+    """Generator care transmite chunks și înregistrează durata totală a exportului"""
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        yield from chunks
+        status = "completed"
+    finally:
+        export_duration_seconds.observe(time.perf_counter() - started, format=format, mode=mode, status=status)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: număr de cereri, histograme de latență și cereri în curs, pe rută"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        # Ruta e cunoscută abia după rutare (scope["endpoint"]); interogările DB o citesc la execuție
+        token = current_scope.set(scope)
+        http_requests_in_progress.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_progress.dec(method=method)
+            current_scope.reset(token)
+            route = route_label(scope)
+            http_requests_total.inc(method=method, route=route, status=status_holder["status"])
+            http_request_duration_seconds.observe(elapsed, method=method, route=route)
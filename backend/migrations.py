@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+Migrații versionate pentru schema KPI Time Tracker
+
+Fiecare migrație rulează o singură dată și este înregistrată în tabelul
+schema_migrations. Migrațiile care adaugă indecși declară și interogările
+pe care trebuie să le accelereze; acestea sunt verificate cu EXPLAIN.
+Pentru backend-ul SQLite (DB_BACKEND=sqlite), migrațiile care conțin DDL
+specific MySQL declară pași echivalenți în sqlite_steps; pașii Python
+(backfill) sunt comuni, SQL-ul lor fiind tradus de sqlite_backend.
+
+Utilizare:
+    python migrations.py            # aplică migrațiile lipsă
+    python migrations.py --status   # afișează versiunile aplicate
+    python migrations.py --verify   # verifică planurile EXPLAIN pentru interogările critice
+
+--verify iese cu codul 1 dacă o interogare critică nu folosește indexul
+declarat sau dacă o migrație cu verificări nu este aplicată, și cu codul 2 pe
+SQLite, unde nu se poate verifica nimic; în CI (MySQL) oprește pipeline-ul.
+"""
+
+import argparse
+import logging
+import sys
+from collections import namedtuple
+
+import audit
+import comments
+import conditional
+import events
+import project_visibility
+import rollups
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_LOCK = 'kpi_tracker_schema_migrations'
+
+Migration = namedtuple('Migration', ['version', 'description', 'steps', 'checks', 'sqlite_steps'],
+                       defaults=(None,))
+
+# Verificare EXPLAIN: interogarea trebuie să folosească indexul așteptat pe tabelul dat
+ExplainCheck = namedtuple('ExplainCheck', ['name', 'sql', 'params', 'table', 'index'])
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def _index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def dialect(conn):
+    """'sqlite' pentru conexiunile sqlite_backend, 'mysql' altfel"""
+    return getattr(conn, 'dialect', 'mysql')
+
+
+def sqlite_add_column(table, column, definition):
+    """Pas de migrație SQLite: adaugă coloana doar dacă nu există deja"""
+    def step(cursor):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if any(row[1] == column for row in cursor.fetchall()):
+            logger.info(f"Column {table}.{column} already exists")
+            return
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def add_column(table, column, definition):
+    """Pas de migrație: adaugă coloana doar dacă nu există deja"""
+    def step(cursor):
+        if _column_exists(cursor, table, column):
+            logger.info(f"Column {table}.{column} already exists")
+            return
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def create_index(table, index, columns):
+    """Pas de migrație: creează indexul doar dacă nu există deja"""
+    def step(cursor):
+        if _index_exists(cursor, table, index):
+            logger.info(f"Index {table}.{index} already exists")
+            return
+        cursor.execute(f"CREATE INDEX {index} ON {table} ({', '.join(columns)})")
+    return step
+
+
+TASK_LIST_SQL = """
+    SELECT t.*, u.name as user_name, u.department as user_department, p.name as project_name, p.module_type
+    FROM tasks t
+    JOIN users u ON t.user_id = u.id
+    JOIN projects p ON t.project_id = p.id
+"""
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            role VARCHAR(50) NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            total_hours DECIMAL(10,2) DEFAULT 0.0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS projects (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            module_type VARCHAR(50) NOT NULL,
+            status VARCHAR(20) DEFAULT 'active',
+            total_hours DECIMAL(10,2) DEFAULT 0.0,
+            visibility_type VARCHAR(20) DEFAULT 'all',
+            visible_departments JSON DEFAULT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            project_id INT NOT NULL,
+            description TEXT NOT NULL,
+            hours DECIMAL(10,2) NOT NULL,
+            date DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS task_comments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            task_id INT NOT NULL,
+            user_id INT NOT NULL,
+            comment TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INT,
+            old_values JSON,
+            new_values JSON,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE SET NULL
+        )
+        """,
+    ], [], [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            role VARCHAR(50) NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            total_hours DECIMAL(10,2) DEFAULT 0.0,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            module_type VARCHAR(50) NOT NULL,
+            status VARCHAR(20) DEFAULT 'active',
+            total_hours DECIMAL(10,2) DEFAULT 0.0,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+            description TEXT NOT NULL,
+            hours DECIMAL(10,2) NOT NULL,
+            date DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS task_comments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            comment TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER,
+            old_values JSON,
+            new_values JSON,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+    ]),
+
+    Migration(2, "project visibility columns", [
+        add_column('projects', 'visibility_type', "VARCHAR(20) DEFAULT 'all'"),
+        add_column('projects', 'visible_departments', "JSON DEFAULT NULL"),
+    ], [], [
+        sqlite_add_column('projects', 'visibility_type', "VARCHAR(20) DEFAULT 'all'"),
+        sqlite_add_column('projects', 'visible_departments', "JSON DEFAULT NULL"),
+    ]),
+
+    Migration(3, "indexes for task listings, comments and audit logs", [
+        create_index('tasks', 'idx_tasks_date_created', ['date', 'created_at', 'id']),
+        create_index('tasks', 'idx_tasks_user_date_created', ['user_id', 'date', 'created_at', 'id']),
+        create_index('tasks', 'idx_tasks_project_date', ['project_id', 'date']),
+        create_index('users', 'idx_users_department', ['department']),
+        create_index('task_comments', 'idx_task_comments_task_created', ['task_id', 'created_at']),
+        create_index('audit_logs', 'idx_audit_logs_created', ['created_at', 'id']),
+        create_index('audit_logs', 'idx_audit_logs_user_created', ['user_id', 'created_at']),
+    ], [
+        ExplainCheck("tasks listing", TASK_LIST_SQL + " ORDER BY t.date DESC, t.created_at DESC, t.id DESC LIMIT 200",
+                     (), 't', 'idx_tasks_date_created'),
+        ExplainCheck("tasks by date", TASK_LIST_SQL + " WHERE t.date = %s ORDER BY t.date DESC, t.created_at DESC, t.id DESC LIMIT 200",
+                     ('2024-01-15',), 't', 'idx_tasks_date_created'),
+        ExplainCheck("tasks by user", TASK_LIST_SQL + " WHERE t.user_id = %s ORDER BY t.date DESC, t.created_at DESC, t.id DESC LIMIT 200",
+                     (1,), 't', 'idx_tasks_user_date_created'),
+        ExplainCheck("tasks by department", TASK_LIST_SQL + " WHERE u.department = %s ORDER BY t.date DESC, t.created_at DESC, t.id DESC LIMIT 200",
+                     ('IT',), 'u', 'idx_users_department'),
+        ExplainCheck("task comments", "SELECT tc.* FROM task_comments tc WHERE tc.task_id = %s ORDER BY tc.created_at ASC",
+                     (1,), 'tc', 'idx_task_comments_task_created'),
+        ExplainCheck("audit logs", "SELECT al.* FROM audit_logs al ORDER BY al.created_at DESC LIMIT 100",
+                     (), 'al', 'idx_audit_logs_created'),
+        ExplainCheck("audit logs by user", "SELECT al.* FROM audit_logs al WHERE al.user_id = %s ORDER BY al.created_at DESC LIMIT 100",
+                     (1,), 'al', 'idx_audit_logs_user_created'),
+    ], [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_date_created ON tasks (date, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_date_created ON tasks (user_id, date, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_date ON tasks (project_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_users_department ON users (department)",
+        "CREATE INDEX IF NOT EXISTS idx_task_comments_task_created ON task_comments (task_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_logs_created ON audit_logs (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_logs_user_created ON audit_logs (user_id, created_at)",
+    ]),
+
+    Migration(4, "daily_rollups for stats endpoints", [
+        rollups.CREATE_DAILY_ROLLUPS_SQL,
+        rollups.backfill,
+    ], [
+        ExplainCheck("daily stats", "SELECT r.user_id, SUM(r.hours) FROM daily_rollups r WHERE r.date = %s GROUP BY r.user_id",
+                     ('2024-01-15',), 'r', 'PRIMARY'),
+    ], [
+        """
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            date DATE NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+            module_type VARCHAR(50) NOT NULL,
+            hours DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+            task_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, user_id, project_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_daily_rollups_user ON daily_rollups (user_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_daily_rollups_project ON daily_rollups (project_id, date)",
+        rollups.backfill,
+    ]),
+
+    Migration(5, "audit log archive and stats counters", [
+        audit.CREATE_AUDIT_ARCHIVE_SQL,
+        audit.CREATE_AUDIT_ACTION_COUNTS_SQL,
+        audit.CREATE_AUDIT_USER_COUNTS_SQL,
+        audit.backfill_counters,
+    ], [
+        ExplainCheck("audit logs keyset page",
+                     "SELECT al.* FROM audit_logs al WHERE (al.created_at < %s OR (al.created_at = %s AND al.id < %s)) "
+                     "ORDER BY al.created_at DESC, al.id DESC LIMIT 101",
+                     ('2024-01-15 00:00:00', '2024-01-15 00:00:00', 1000), 'al', 'idx_audit_logs_created'),
+    ], [
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER,
+            old_values JSON,
+            new_values JSON,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_audit_archive_created ON audit_logs_archive (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_archive_user_created ON audit_logs_archive (user_id, created_at)",
+        "CREATE TABLE IF NOT EXISTS audit_action_counts (action VARCHAR(100) PRIMARY KEY, count BIGINT NOT NULL DEFAULT 0)",
+        "CREATE TABLE IF NOT EXISTS audit_user_counts (user_id INTEGER PRIMARY KEY, count BIGINT NOT NULL DEFAULT 0)",
+        audit.backfill_counters,
+    ]),
+    Migration(6, "resource versions shared by all workers", [
+        conditional.CREATE_RESOURCE_VERSIONS_SQL,
+        conditional.seed_versions,
+    ], []),  # DDL portabil: aceiași pași și pentru SQLite
+    Migration(7, "rollup change log for incremental calendar refresh", [
+        rollups.CREATE_ROLLUP_CHANGES_SQL,
+        rollups.log_full_change,
+    ], [
+        ExplainCheck("calendar range", "SELECT r.user_id, r.date, r.project_id, r.hours, r.task_count "
+                     "FROM daily_rollups r WHERE r.date BETWEEN %s AND %s",
+                     ('2024-01-01', '2024-01-31'), 'r', 'PRIMARY'),
+    ], [
+        """
+        CREATE TABLE IF NOT EXISTS rollup_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE,
+            user_id INTEGER,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_rollup_changes_created ON rollup_changes (created_at)",
+        rollups.log_full_change,
+    ]),
+    Migration(8, "change events for server-sent updates", [
+        events.CREATE_CHANGE_EVENTS_SQL,
+    ], [], [
+        """
+        CREATE TABLE IF NOT EXISTS change_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            resources VARCHAR(255) NOT NULL,
+            action VARCHAR(20) NOT NULL,
+            entity_id INTEGER,
+            user_id INTEGER,
+            department VARCHAR(100),
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_change_events_created ON change_events (created_at)",
+    ]),
+    Migration(9, "comment_count on tasks for batched comment loading", [
+        add_column('tasks', 'comment_count', "INT NOT NULL DEFAULT 0"),
+        comments.backfill_comment_counts,
+    ], [
+        ExplainCheck("comments batch", "SELECT tc.* FROM task_comments tc WHERE tc.task_id IN (%s, %s, %s) "
+                     "ORDER BY tc.task_id, tc.created_at ASC, tc.id ASC",
+                     (1, 2, 3), 'tc', 'idx_task_comments_task_created'),
+    ], [
+        sqlite_add_column('tasks', 'comment_count', "INTEGER NOT NULL DEFAULT 0"),
+        comments.backfill_comment_counts,
+    ]),
+    Migration(10, "project_departments visibility index", [
+        project_visibility.CREATE_PROJECT_DEPARTMENTS_SQL,
+        project_visibility.backfill,
+    ], [
+        ExplainCheck("projects for department",
+                     "SELECT pd.project_id FROM project_departments pd WHERE pd.department = %s",
+                     ('IT',), 'pd', 'PRIMARY'),
+    ], [
+        """
+        CREATE TABLE IF NOT EXISTS project_departments (
+            department VARCHAR(100) NOT NULL,
+            project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+            PRIMARY KEY (department, project_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_project_departments_project ON project_departments (project_id)",
+        project_visibility.backfill,
+    ]),
+]
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    _ensure_migrations_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def explain_check(cursor, check):
+    """Rulează EXPLAIN și întoarce (ok, index folosit) pentru tabelul verificat"""
+    cursor.execute("EXPLAIN " + check.sql, check.params)
+    columns = [column[0] for column in cursor.description]
+    for row in cursor.fetchall():
+        plan = dict(zip(columns, row))
+        if plan.get('table') == check.table:
+            return plan.get('key') == check.index, plan.get('key')
+    return False, None
+
+
+def apply_migrations(conn, migrations=MIGRATIONS):
+    """Aplică migrațiile lipsă, în ordine; întoarce lista versiunilor aplicate"""
+    sqlite = dialect(conn) == 'sqlite'
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, 60)", (MIGRATIONS_LOCK,))
+    try:
+        done = applied_versions(cursor)
+        applied = []
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done:
+                continue
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            steps = migration.sqlite_steps if sqlite and migration.sqlite_steps is not None else migration.steps
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (migration.version, migration.description)
+            )
+            conn.commit()
+            applied.append(migration.version)
+
+            # Planurile EXPLAIN verificate sunt cele din MySQL
+            for check in ([] if sqlite else migration.checks):
+                ok, key = explain_check(cursor, check)
+                if not ok:
+                    logger.warning(f"Migration {migration.version}: '{check.name}' uses {key} instead of {check.index}")
+        return applied
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATIONS_LOCK,))
+        cursor.close()
+
+
+def verify_migrations(conn, migrations=MIGRATIONS):
+    """Verifică cu EXPLAIN că interogările critice folosesc indecșii; întoarce verificările eșuate
+
+    O migrație neaplicată nu poate fi verificată: verificările ei sunt raportate
+    ca eșuate, ca o schemă rămasă în urmă să nu treacă neobservată.
+    """
+    cursor = conn.cursor()
+    done = applied_versions(cursor)
+    failures = []
+    for migration in migrations:
+        for check in migration.checks:
+            if migration.version not in done:
+                print(f"❌ [{migration.version}] {check.name}: migrația nu este aplicată")
+                failures.append(check.name)
+                continue
+            try:
+                ok, key = explain_check(cursor, check)
+            except Exception as e:
+                ok, key = False, f"eroare: {e}"
+            print(f"{'✅' if ok else '❌'} [{migration.version}] {check.name}: {key} (expected {check.index})")
+            if not ok:
+                failures.append(check.name)
+    cursor.close()
+    return failures
+
+
+def main():
+    from main import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Migrații schema KPI Time Tracker")
+    parser.add_argument('--status', action='store_true', help="Afișează migrațiile aplicate")
+    parser.add_argument('--verify', action='store_true', help="Verifică planurile EXPLAIN")
+    args = parser.parse_args()
+
+    # Conexiune directă la backend-ul configurat (DB_BACKEND)
+    conn = get_db_connection()
+    try:
+        if args.status:
+            done = applied_versions(conn.cursor())
+            for migration in MIGRATIONS:
+                mark = '✅' if migration.version in done else '⏳'
+                print(f"{mark} {migration.version}: {migration.description}")
+            return
+        if args.verify:
+            if dialect(conn) == 'sqlite':
+                print("⚠️  Verificarea EXPLAIN este disponibilă doar pentru MySQL")
+                sys.exit(2)
+            failures = verify_migrations(conn)
+            if failures:
+                print(f"❌ {len(failures)} verificări eșuate")
+            sys.exit(1 if failures else 0)
+
+        applied = apply_migrations(conn)
+        print(f"✅ Migrații aplicate: {applied}" if applied else "ℹ️  Schema este la zi")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
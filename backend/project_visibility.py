@@ -0,0 +1,62 @@
+"""
+Vizibilitatea proiectelor pe departamente: tabelul project_departments
+
+Coloana JSON projects.visible_departments rămâne forma din API; tabelul
+project_departments (department, project_id) este indexul ei inversat,
+rescris în aceeași tranzacție cu proiectul. Proiectele vizibile unui
+departament se citesc astfel pe cheia primară, în loc de JSON_CONTAINS
+evaluat pe fiecare rând din projects.
+"""
+
+import json
+
+CREATE_PROJECT_DEPARTMENTS_SQL = """
+    CREATE TABLE IF NOT EXISTS project_departments (
+        department VARCHAR(100) NOT NULL,
+        project_id INT NOT NULL,
+        PRIMARY KEY (department, project_id),
+        KEY idx_project_departments_project (project_id),
+        FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+    )
+"""
+
+# Condiția pe projects (fără alias); parametrul este numele departamentului
+VISIBLE_TO_DEPARTMENT_SQL = """
+    (visibility_type = 'all'
+     OR (visibility_type = 'specific_departments'
+         AND id IN (SELECT project_id FROM project_departments WHERE department = %s)))
+"""
+
+
+def parse_departments(value):
+    """Lista de departamente din coloana JSON (text sau deja decodată)"""
+    if not value:
+        return []
+    if isinstance(value, (bytes, str)):
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return []
+    return [department for department in dict.fromkeys(value) if isinstance(department, str) and department]
+
+
+def sync_project_departments(cursor, project_id: int, departments):
+    """Rescrie departamentele proiectului, în tranzacția în care se salvează proiectul"""
+    cursor.execute("DELETE FROM project_departments WHERE project_id = %s", (project_id,))
+    departments = parse_departments(departments)
+    if departments:
+        cursor.executemany("INSERT INTO project_departments (department, project_id) VALUES (%s, %s)",
+                           [(department, project_id) for department in departments])
+
+
+def backfill(cursor):
+    """Reconstruiește project_departments din visible_departments (migrație, seed)"""
+    cursor.execute("DELETE FROM project_departments")
+    cursor.execute("SELECT id, visible_departments FROM projects WHERE visible_departments IS NOT NULL")
+    rows = [
+        (department, row['id'] if isinstance(row, dict) else row[0])
+        for row in cursor.fetchall()
+        for department in parse_departments(row['visible_departments'] if isinstance(row, dict) else row[1])
+    ]
+    if rows:
+        cursor.executemany("INSERT INTO project_departments (department, project_id) VALUES (%s, %s)", rows)
@@ -0,0 +1,240 @@
+"""
+Strat async de acces la date pentru KPI Time Tracker
+
+Interogările pymysql rulează într-un executor dedicat, dimensionat după pool-ul
+de conexiuni, astfel încât handler-ele FastAPI nu blochează event loop-ul.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+import pymysql
+import pymysql.cursors
+
+import metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+ExecuteResult = namedtuple('ExecuteResult', ['rowcount', 'lastrowid'])
+
+_connection_factory = None
+_write_connection_factory = None
+_executor = None
+_write_executor = None
+
+
+def configure(connection_factory, max_workers, write_connection_factory=None):
+    """Setează sursa de conexiuni și pornește executorul pentru interogări
+
+    Cu write_connection_factory (backend-ul SQLite), scrierile folosesc acea
+    conexiune și un executor cu un singur fir: o coadă de scriere în ordinea
+    sosirii, care nu ocupă firele de citire cât așteaptă.
+    """
+    global _connection_factory, _write_connection_factory, _executor, _write_executor
+    _connection_factory = connection_factory
+    _write_connection_factory = write_connection_factory
+    _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+    if write_connection_factory is not None:
+        _write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+    logger.info(f"Database executor started with {max_workers} workers"
+                + (" and a single writer" if write_connection_factory is not None else ""))
+
+
+def shutdown():
+    """Oprește executorul după terminarea interogărilor în curs"""
+    global _executor, _write_executor
+    if _write_executor is not None:
+        _write_executor.shutdown(wait=True)
+        _write_executor = None
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def _run_in(executor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Contextul cererii (ruta pentru metrici) este păstrat în firul executorului
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, partial(context.run, fn, *args, **kwargs))
+
+
+async def run(fn, *args, **kwargs):
+    """Rulează o funcție blocantă în executorul bazei de date"""
+    return await _run_in(_executor, fn, *args, **kwargs)
+
+
+async def _run_write(fn, *args, **kwargs):
+    return await _run_in(_write_executor or _executor, fn, *args, **kwargs)
+
+
+class TimedCursor:
+    """Cursor care măsoară fiecare execute/executemany pentru metrici și trace-ul cererii"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _observe(self, query, args, started, many=False):
+        seconds = time.perf_counter() - started
+        metrics.observe_query(seconds)
+        tracing.record_query(query, args, seconds, self._cursor.rowcount, many)
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._observe(query, args, started)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._observe(query, args, started, many=True)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _with_cursor(work, transactional=False, write=False):
+    write = write or transactional
+    conn = (_write_connection_factory or _connection_factory)() if write else _connection_factory()
+    try:
+        cursor = TimedCursor(conn.cursor(pymysql.cursors.DictCursor))
+        if transactional:
+            conn.begin()
+        try:
+            result = work(cursor)
+            if transactional:
+                conn.commit()
+            return result
+        except Exception:
+            if transactional:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+
+def _fetch_all(sql, params, cursor):
+    cursor.execute(sql, params)
+    return list(cursor.fetchall())
+
+
+def _fetch_one(sql, params, cursor):
+    cursor.execute(sql, params)
+    return cursor.fetchone()
+
+
+def _fetch_value(sql, params, cursor):
+    cursor.execute(sql, params)
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return next(iter(row.values()))
+
+
+def _execute(sql, params, cursor):
+    cursor.execute(sql, params)
+    return ExecuteResult(cursor.rowcount, cursor.lastrowid)
+
+
+async def fetch_all(sql, params=None):
+    """Returnează toate rândurile ca listă de dict-uri"""
+    return await run(_with_cursor, partial(_fetch_all, sql, params))
+
+
+async def fetch_one(sql, params=None):
+    """Returnează primul rând (dict) sau None"""
+    return await run(_with_cursor, partial(_fetch_one, sql, params))
+
+
+async def fetch_value(sql, params=None):
+    """Returnează prima coloană din primul rând sau None"""
+    return await run(_with_cursor, partial(_fetch_value, sql, params))
+
+
+async def execute(sql, params=None):
+    """Execută o comandă de scriere; returnează rowcount și lastrowid"""
+    return await _run_write(_with_cursor, partial(_execute, sql, params), write=True)
+
+
+async def transaction(work):
+    """Rulează work(cursor) într-o singură tranzacție pe aceeași conexiune"""
+    return await _run_write(_with_cursor, work, True)
+
+
+async def with_cursor(work):
+    """Rulează work(cursor) pe o singură conexiune, fără tranzacție explicită"""
+    return await run(_with_cursor, work)
+
+
+def stream_batches(sql, params=None, batch_size=1000):
+    """Generator sincron: citește rezultatul cu un cursor unbuffered, în loturi de batch_size rânduri
+
+    Se consumă din threadpool (ex. StreamingResponse); memoria rămâne constantă
+    indiferent de numărul de rânduri.
+    """
+    conn = _connection_factory()
+    completed = False
+    try:
+        cursor = TimedCursor(conn.cursor(pymysql.cursors.SSDictCursor))
+        cursor.execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+        cursor.close()
+        completed = True
+    finally:
+        # Un cursor unbuffered abandonat lasă rânduri necitite pe conexiune; nu o refolosim
+        if not completed and hasattr(conn, 'invalidate'):
+            conn.invalidate()
+        else:
+            conn.close()
+
+
+def transaction_sync(work):
+    """Varianta sincronă a transaction(), pentru cod care rulează deja în executor"""
+    return _with_cursor(work, True)
+
+
+def with_cursor_sync(work):
+    """Varianta sincronă a with_cursor(), pentru cod care rulează deja în executor"""
+    return _with_cursor(work)
+
+
+@contextmanager
+def named_lock(name):
+    """Lock MySQL (GET_LOCK) fără așteptare, ținut pe o conexiune dedicată
+
+    Produce True dacă lock-ul a fost obținut. Este vizibil pentru toate
+    procesele conectate la aceeași bază de date, deci o sarcină periodică
+    rulează într-un singur worker la un moment dat.
+    """
+    conn = _connection_factory()
+    try:
+        cursor = conn.cursor(pymysql.cursors.Cursor)
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (name,))
+        acquired = cursor.fetchone()[0] == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+            cursor.close()
+    finally:
+        conn.close()
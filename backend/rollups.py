@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Agregări zilnice (daily_rollups) pentru endpoint-urile de statistici
+
+Tabelul păstrează orele și numărul de task-uri pe zi × utilizator × proiect ×
+module_type. Este actualizat cu diferențe în aceeași tranzacție cu scrierea
+task-ului; backfill() îl reconstruiește din tasks.
+
+Fiecare modificare adaugă perechea (date, user_id) afectată în rollup_changes;
+id-ul ultimei modificări este versiunea folosită de calendar pentru
+reîmprospătarea incrementală (doar celulele schimbate de la o versiune dată).
+
+Utilizare:
+    python rollups.py --backfill [--date-from YYYY-MM-DD] [--date-to YYYY-MM-DD]
+"""
+
+import argparse
+import datetime
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CREATE_DAILY_ROLLUPS_SQL = """
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        date DATE NOT NULL,
+        user_id INT NOT NULL,
+        project_id INT NOT NULL,
+        module_type VARCHAR(50) NOT NULL,
+        hours DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+        task_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (date, user_id, project_id),
+        KEY idx_daily_rollups_user (user_id, date),
+        KEY idx_daily_rollups_project (project_id, date),
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+    )
+"""
+
+
+# date NULL = toate zilele (backfill); clienții cu o versiune mai veche reîncarcă tot intervalul
+CREATE_ROLLUP_CHANGES_SQL = """
+    CREATE TABLE IF NOT EXISTS rollup_changes (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        date DATE NULL,
+        user_id INT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        KEY idx_rollup_changes_created (created_at)
+    )
+"""
+
+ROLLUP_CHANGES_RETENTION_DAYS = int(os.getenv('ROLLUP_CHANGES_RETENTION_DAYS', 7))
+
+
+def log_changes(cursor, keys):
+    """Înregistrează perechile (date, user_id) modificate, în tranzacția curentă"""
+    keys = list(keys)
+    if keys:
+        cursor.executemany("INSERT INTO rollup_changes (date, user_id) VALUES (%s, %s)", keys)
+
+
+def log_changes_for(cursor, column: str, value):
+    """Înregistrează toate zilele unui utilizator/proiect, înainte de o ștergere în cascadă"""
+    cursor.execute(f"""
+        INSERT INTO rollup_changes (date, user_id)
+        SELECT DISTINCT date, user_id FROM daily_rollups WHERE {column} = %s
+    """, (value,))
+
+
+def log_full_change(cursor):
+    cursor.execute("INSERT INTO rollup_changes (date, user_id) VALUES (NULL, NULL)")
+
+
+def prune_changes(cursor, retention_days=ROLLUP_CHANGES_RETENTION_DAYS):
+    """Șterge modificările mai vechi de retention_days, păstrând ultima (versiunea curentă)"""
+    cursor.execute("SELECT MAX(id) AS last FROM rollup_changes")
+    row = cursor.fetchone()
+    last = row['last'] if isinstance(row, dict) else row[0]
+    if last is None:
+        return 0
+    before = datetime.datetime.now() - datetime.timedelta(days=retention_days)
+    cursor.execute("DELETE FROM rollup_changes WHERE created_at < %s AND id < %s", (before, last))
+    return cursor.rowcount
+
+
+def adjust_daily_rollup(cursor, date, user_id: int, project_id: int, hours_delta, count_delta: int):
+    """Aplică diferența de ore/task-uri pe agregarea zilei, în tranzacția curentă"""
+    if not hours_delta and not count_delta:
+        return
+    cursor.execute("""
+        INSERT INTO daily_rollups (date, user_id, project_id, module_type, hours, task_count)
+        SELECT %s, %s, id, module_type, %s, %s FROM projects WHERE id = %s
+        ON DUPLICATE KEY UPDATE hours = hours + VALUES(hours), task_count = task_count + VALUES(task_count)
+    """, (date, user_id, hours_delta, count_delta, project_id))
+    log_changes(cursor, [(date, user_id)])
+    if count_delta < 0:
+        cursor.execute("""
+            DELETE FROM daily_rollups
+            WHERE date = %s AND user_id = %s AND project_id = %s AND task_count <= 0
+        """, (date, user_id, project_id))
+
+
+def update_project_module_type(cursor, project_id: int, module_type: str):
+    """Propagă schimbarea module_type a unui proiect în agregări"""
+    cursor.execute("UPDATE daily_rollups SET module_type = %s WHERE project_id = %s AND module_type <> %s",
+                   (module_type, project_id, module_type))
+
+
+def backfill(cursor, date_from=None, date_to=None):
+    """Reconstruiește agregările din tasks pentru intervalul dat (implicit tot istoricul)"""
+    def where(column):
+        conditions = []
+        if date_from:
+            conditions.append(f"{column} >= %s")
+        if date_to:
+            conditions.append(f"{column} <= %s")
+        return (" WHERE " + " AND ".join(conditions)) if conditions else ""
+
+    params = [value for value in (date_from, date_to) if value]
+
+    cursor.execute("DELETE FROM daily_rollups" + where("date"), params)
+    cursor.execute("""
+        INSERT INTO daily_rollups (date, user_id, project_id, module_type, hours, task_count)
+        SELECT t.date, t.user_id, t.project_id, p.module_type, SUM(t.hours), COUNT(*)
+        FROM tasks t
+        JOIN projects p ON t.project_id = p.id
+    """ + where("t.date") + """
+        GROUP BY t.date, t.user_id, t.project_id, p.module_type
+    """, params)
+    return cursor.rowcount
+
+
+def main():
+    from main import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Agregări zilnice KPI Time Tracker")
+    parser.add_argument('--backfill', action='store_true', help="Reconstruiește daily_rollups din tasks")
+    parser.add_argument('--date-from', type=datetime.date.fromisoformat)
+    parser.add_argument('--date-to', type=datetime.date.fromisoformat)
+    args = parser.parse_args()
+
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    conn = get_db_connection()
+    try:
+        conn.begin()
+        cursor = conn.cursor()
+        rows = backfill(cursor, args.date_from, args.date_to)
+        log_full_change(cursor)
+        conn.commit()
+        print(f"✅ daily_rollups reconstruit: {rows} rânduri")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,79 @@
+"""
+Serializare rapidă a rândurilor din baza de date în răspunsuri JSON
+
+Rândurile DictCursor (Decimal, date, datetime, coloane JSON ca text) sunt
+encodate direct cu orjson, fără conversii rând cu rând și fără validarea
+Pydantic a fiecărui element din listele mari. Dacă orjson nu este instalat,
+se folosește modulul json standard, cu aceleași rezultate.
+"""
+
+import datetime
+import json
+from decimal import Decimal
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson este în requirements.txt
+    orjson = None
+
+# orjson >= 3.9: coloanele JSON sunt incluse ca atare, fără json.loads + dumps
+_Fragment = getattr(orjson, 'Fragment', None)
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(content) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(content) -> bytes:
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_column(value, default=None):
+    """Valoarea unei coloane JSON (text) gata de serializat; default dacă lipsește sau e invalidă"""
+    if not value:
+        return default
+    if isinstance(value, (bytes, str)):
+        if _Fragment is not None:
+            return _Fragment(value)
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return default
+    return value
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse cu suport nativ pentru Decimal/date/datetime, encodat cu orjson"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content, response: Response = None, status_code: int = 200) -> FastJSONResponse:
+    """Răspuns pre-encodat care ocolește validarea response_model
+
+    Antetele setate pe răspunsul injectat (ETag, X-Next-Cursor) sunt copiate,
+    deoarece FastAPI nu le aplică atunci când handler-ul întoarce un Response.
+    """
+    headers = dict(response.headers) if response is not None else None
+    if headers:
+        headers.pop('content-length', None)
+        headers.pop('content-type', None)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,70 @@
+"""
+Pornirea serverului API (unul sau mai mulți worker-i)
+
+Cu WEB_CONCURRENCY > 1, aplicația rulează sub gunicorn cu worker-i uvicorn:
+fiecare worker este un proces separat, cu propriul pool de conexiuni, creat
+în lifespan (aplicația nu este încărcată înainte de fork). Starea partajată
+(versiunile resurselor, job-urile de export, metricile) trece prin baza de
+date sau prin fișiere, nu prin memoria procesului.
+
+Semnale (gunicorn): HUP - reîncărcare grațioasă (worker-i noi, cei vechi
+termină cererile în curs), TERM - oprire grațioasă în GRACEFUL_TIMEOUT.
+Fără gunicorn instalat, serverul pornește un singur proces uvicorn.
+
+Fiecare worker deschide până la DB_POOL_MAX_SIZE conexiuni: păstrați
+WEB_CONCURRENCY × DB_POOL_MAX_SIZE sub max_connections din MySQL.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+HOST = os.getenv('HOST', '0.0.0.0')
+PORT = int(os.getenv('PORT', 8000))
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+
+
+def gunicorn_options(workers=WEB_CONCURRENCY):
+    return {
+        "bind": f"{HOST}:{PORT}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        # Fiecare worker își creează pool-ul și task-urile de fundal după fork
+        "preload_app": False,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "timeout": max(GRACEFUL_TIMEOUT, 60),
+        "accesslog": None,
+    }
+
+
+def run(app=None, workers=WEB_CONCURRENCY):
+    """Pornește serverul; app este folosit direct doar în modul cu un singur proces"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+
+    if workers <= 1 or BaseApplication is None:
+        if workers > 1:
+            logger.warning("gunicorn is not installed; starting a single uvicorn process")
+        import uvicorn
+        uvicorn.run(app or "main:app", host=HOST, port=PORT)
+        return
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options(workers).items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    logger.info(f"Starting {workers} workers on {HOST}:{PORT}")
+    Application().run()
+
+
+if __name__ == "__main__":
+    run()
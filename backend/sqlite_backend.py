@@ -0,0 +1,400 @@
+"""
+Backend SQLite embedded pentru KPI Time Tracker (DB_BACKEND=sqlite)
+
+Alternativă la MySQL pentru instalări mici și CI, fără server de baze de date.
+Expune aceeași interfață ca ConnectionPool din database.py (acquire, close,
+get_stats), iar conexiunile imită pymysql (cursor(DictCursor), begin, commit,
+rollback), deci repository și restul codului rulează neschimbate:
+
+- SQL-ul MySQL este tradus o singură dată per text (%s -> ?, INSERT IGNORE,
+  ON DUPLICATE KEY UPDATE -> ON CONFLICT, FOR UPDATE eliminat), iar textul
+  stabil permite cache-ului de statement-uri din sqlite3 să refolosească
+  interogările pregătite;
+- JSON_CONTAINS, UNIX_TIMESTAMP, GET_LOCK și RELEASE_LOCK sunt funcții
+  înregistrate pe fiecare conexiune;
+- fiecare fir are propria conexiune de citire (WAL: cititorii nu blochează
+  scrierea), iar toate scrierile trec printr-o singură conexiune de scriere,
+  ocupată pe rând (coada de scriere), ca tranzacțiile să nu concureze pe
+  lock-ul bazei de date.
+
+Necesită SQLite >= 3.35 (ON CONFLICT DO UPDATE fără țintă explicită).
+"""
+
+import datetime
+import fcntl
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+
+import pymysql.cursors
+
+from database import PoolExhaustedError
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kpi_tracker.sqlite3'))
+SQLITE_READERS = int(os.getenv('SQLITE_READERS', 8))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 5.0))
+SQLITE_WRITE_TIMEOUT = float(os.getenv('SQLITE_WRITE_TIMEOUT', 30.0))
+SQLITE_STATEMENT_CACHE = int(os.getenv('SQLITE_STATEMENT_CACHE', 512))
+
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+# Conversii de tipuri, ca rândurile să arate ca cele din pymysql (date, datetime, Decimal)
+
+def _convert_datetime(value):
+    text = value.decode()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _convert_date(value):
+    text = value.decode()
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATE", _convert_date)
+sqlite3.register_converter("TIMESTAMP", _convert_datetime)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+
+
+# Traducerea dialectului MySQL folosit în aplicație
+
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_REFERENCE = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE)
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql):
+    """SQL în dialectul MySQL al aplicației -> SQL SQLite (rezultat memorat per text)"""
+    sql = _NAMED_PARAM.sub(r":\1", sql)
+    sql = sql.replace("%s", "?").replace("%%", "%")
+    sql = _INSERT_IGNORE.sub("INSERT OR IGNORE", sql)
+    sql = _FOR_UPDATE.sub("", sql)
+    match = _ON_DUPLICATE.search(sql)
+    if match:
+        update = _VALUES_REFERENCE.sub(r"excluded.\1", sql[match.end():])
+        sql = sql[:match.start()] + "ON CONFLICT DO UPDATE SET" + update
+    return sql
+
+
+def _params(args):
+    if args is None:
+        return ()
+    if isinstance(args, (tuple, list, dict)):
+        return args
+    return (args,)
+
+
+def _json_contains(target, candidate):
+    if target is None or candidate is None:
+        return None
+    try:
+        target, candidate = json.loads(target), json.loads(candidate)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(target, list):
+        values = candidate if isinstance(candidate, list) else [candidate]
+        return int(all(value in target for value in values))
+    return int(target == candidate)
+
+
+class _NamedLocks:
+    """GET_LOCK / RELEASE_LOCK peste flock pe fișiere lângă baza de date
+
+    Lock-urile sunt vizibile pentru toate procesele care folosesc același
+    fișier SQLite, ca lock-urile MySQL pentru cei care folosesc același server.
+    """
+
+    def __init__(self, path):
+        self.prefix = path + ".lock-"
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return self.prefix + re.sub(r"[^\w.-]", "_", name)
+
+    def get_lock(self, name, timeout):
+        fd = os.open(self._path(name), os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + max(timeout or 0, 0)
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    return 0
+                time.sleep(0.05)
+        with self._lock:
+            self._held.setdefault(name, []).append(fd)
+        return 1
+
+    def release_lock(self, name):
+        with self._lock:
+            fds = self._held.get(name)
+            if not fds:
+                return None
+            fd = fds.pop()
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+        return 1
+
+
+# Cursoare și conexiuni compatibile cu pymysql
+
+class SQLiteCursor:
+    def __init__(self, cursor, as_dict):
+        self._cursor = cursor
+        self._as_dict = as_dict
+        self._columns = None
+
+    def _after_execute(self):
+        description = self._cursor.description
+        self._columns = [column[0] for column in description] if description else None
+
+    def execute(self, query, args=None):
+        self._cursor.execute(translate(query), _params(args))
+        self._after_execute()
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        args = list(args)
+        if not args:
+            return 0
+        self._cursor.executemany(translate(query), args)
+        self._after_execute()
+        return self._cursor.rowcount
+
+    def _row(self, row):
+        if row is None or not self._as_dict:
+            return row
+        return dict(zip(self._columns, row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size or self._cursor.arraysize)
+        return [self._row(row) for row in rows] if self._as_dict else rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        return [self._row(row) for row in rows] if self._as_dict else rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SQLiteConnection:
+    """Conexiune sqlite3 cu interfața folosită din pymysql"""
+
+    dialect = "sqlite"
+
+    def __init__(self, raw, on_close=None):
+        self._raw = raw
+        self._on_close = on_close
+
+    def cursor(self, cursorclass=None):
+        as_dict = cursorclass is not None and issubclass(cursorclass, pymysql.cursors.DictCursorMixin)
+        return SQLiteCursor(self._raw.cursor(), as_dict)
+
+    def begin(self):
+        # IMMEDIATE: lock-ul de scriere se ia la început, nu la prima scriere
+        if not self._raw.in_transaction:
+            self._raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        if self._raw.in_transaction:
+            self._raw.commit()
+
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.rollback()
+
+    def close(self):
+        if self._on_close is not None:
+            self._on_close(self)
+        else:
+            self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def connect(path, locks=None):
+    """Conexiune sqlite3 configurată (pragma-uri, funcții MySQL, statement cache)"""
+    raw = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, detect_types=sqlite3.PARSE_DECLTYPES,
+                          isolation_level=None, check_same_thread=False,
+                          cached_statements=SQLITE_STATEMENT_CACHE)
+    raw.execute("PRAGMA journal_mode = WAL")
+    raw.execute("PRAGMA synchronous = NORMAL")
+    raw.execute("PRAGMA foreign_keys = ON")
+    raw.execute("PRAGMA temp_store = MEMORY")
+    raw.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    raw.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+    raw.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT * 1000)}")
+    locks = locks or _NamedLocks(path)
+    raw.create_function("JSON_CONTAINS", 2, _json_contains, deterministic=True)
+    raw.create_function("UNIX_TIMESTAMP", 0, lambda: int(time.time()))
+    raw.create_function("GET_LOCK", 2, locks.get_lock)
+    raw.create_function("RELEASE_LOCK", 1, locks.release_lock)
+    return raw
+
+
+class SQLiteDatabase:
+    """Conexiuni de citire per fir și o singură conexiune de scriere, folosită pe rând"""
+
+    dialect = "sqlite"
+
+    def __init__(self, path, max_size=SQLITE_READERS, write_timeout=SQLITE_WRITE_TIMEOUT):
+        self.path = path
+        # Dimensionează executorul din repository, ca max_size din ConnectionPool
+        self.max_size = max_size
+        self.write_timeout = write_timeout
+        self._locks = _NamedLocks(path)
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "reads": 0, "writes": 0, "write_waits": 0, "write_wait_ms_total": 0.0, "exhausted": 0,
+        }
+
+    def open(self):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(f"SQLite {sqlite3.sqlite_version} is too old; "
+                               f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or newer is required")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = SQLiteConnection(connect(self.path, self._locks), on_close=self._release_writer)
+        logger.info(f"SQLite database opened at {self.path} (WAL, mmap {SQLITE_MMAP_SIZE // (1024 * 1024)} MB)")
+
+    def close(self):
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for raw in readers:
+            raw.close()
+        if self._writer is not None:
+            raw = self._writer._raw
+            try:
+                raw.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            raw.close()
+            self._writer = None
+
+    def acquire(self):
+        """Conexiunea de citire a firului curent (close() nu o închide)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            raw = connect(self.path, self._locks)
+            conn = SQLiteConnection(raw, on_close=self._release_reader)
+            conn.invalidate = functools.partial(self._invalidate_reader, conn)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(raw)
+        with self._stats_lock:
+            self._stats["reads"] += 1
+        return conn
+
+    def _release_reader(self, conn):
+        conn.rollback()
+
+    def _invalidate_reader(self, conn):
+        with self._readers_lock:
+            if conn._raw in self._readers:
+                self._readers.remove(conn._raw)
+        conn._raw.close()
+        if getattr(self._local, "conn", None) is conn:
+            self._local.conn = None
+
+    def acquire_writer(self):
+        """Conexiunea de scriere; așteaptă până o eliberează scrierea anterioară"""
+        started = time.perf_counter()
+        waited = not self._write_lock.acquire(blocking=False)
+        if waited and not self._write_lock.acquire(timeout=self.write_timeout):
+            with self._stats_lock:
+                self._stats["exhausted"] += 1
+            raise PoolExhaustedError(f"SQLite writer busy for more than {self.write_timeout}s")
+        with self._stats_lock:
+            self._stats["writes"] += 1
+            if waited:
+                self._stats["write_waits"] += 1
+                self._stats["write_wait_ms_total"] += (time.perf_counter() - started) * 1000
+        return self._writer
+
+    def _release_writer(self, conn):
+        try:
+            conn.rollback()
+        finally:
+            self._write_lock.release()
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._readers_lock:
+            stats["readers"] = len(self._readers)
+        stats["write_wait_ms_total"] = round(stats["write_wait_ms_total"], 2)
+        stats["writer_busy"] = int(self._write_lock.locked())
+        stats["backend"] = "sqlite"
+        return stats
+
+
+def open_connection(path=SQLITE_PATH):
+    """Conexiune independentă (scripturi, migrații); close() o închide"""
+    return SQLiteConnection(connect(path))
+
+
+def open_database(path=SQLITE_PATH):
+    database = SQLiteDatabase(path)
+    database.open()
+    return database
@@ -0,0 +1,158 @@
+"""
+Configurația testelor API (pytest + TestClient)
+
+Implicit testele rulează pe SQLite, într-un fișier temporar creat pentru sesiune.
+Cu DB_BACKEND=mysql rulează pe baza de date DB_NAME, care trebuie să fie o bază
+de test: tabelele sunt golite înaintea fiecărui test. Fără MySQL disponibil,
+testele sunt omise.
+
+Utilizare (din directorul backend):
+    python -m pytest -q
+    DB_BACKEND=mysql DB_NAME=kpi_test python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND_DIR)
+
+# Configurația este citită la importul modulelor, deci trebuie setată înainte de import main
+TEST_DIR = tempfile.mkdtemp(prefix='kpi_tests_')
+DB_BACKEND = os.environ.setdefault('DB_BACKEND', 'sqlite').lower()
+if DB_BACKEND == 'sqlite':
+    # Niciodată fișierul din SQLITE_PATH al mediului: testele golesc tabelele
+    os.environ['SQLITE_PATH'] = os.path.join(TEST_DIR, 'kpi_test.sqlite3')
+os.environ['LOG_FILE'] = os.path.join(TEST_DIR, 'app.log')
+os.environ['EXPORT_DIR'] = os.path.join(TEST_DIR, 'exports')
+# Reconcilierea și arhivarea sunt apelate explicit de teste
+os.environ['HOURS_RECONCILE_INTERVAL'] = '0'
+os.environ['AUDIT_ARCHIVE_INTERVAL'] = '0'
+os.environ.setdefault('AUDIT_FLUSH_INTERVAL', '0.05')
+
+API = '/time-monitoring/api'
+
+
+def connect():
+    """Conexiune directă la baza de date de test (în afara aplicației)"""
+    from benchmarks.seed import connect as seed_connect
+
+    conn, _ = seed_connect()
+    return conn
+
+
+def query(sql, params=None):
+    """Rândurile unei interogări, ca dicționare"""
+    import pymysql
+
+    conn = connect()
+    try:
+        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def wait_for_audit(timeout=5.0):
+    """Așteaptă ca pipeline-ul de audit să scrie toate evenimentele din coadă"""
+    from audit import audit_pipeline
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = audit_pipeline.get_stats()
+        if (stats['queue_depth'] == 0 and stats['pending_retry'] == 0
+                and stats['written'] + stats['dead_letters'] + stats['overflow'] >= stats['enqueued']):
+            return
+        time.sleep(0.02)
+    raise AssertionError(f"Audit pipeline not drained: {audit_pipeline.get_stats()}")
+
+
+def reset_database():
+    """Golește tabelele și invalidează versiunile resurselor (ETag-uri și cache)"""
+    from benchmarks.seed import reset
+    from conditional import RESOURCES, resource_versions
+    import events
+
+    wait_for_audit()
+    conn = connect()
+    try:
+        reset(conn)
+        with conn.cursor() as cursor:
+            conn.begin()
+            resource_versions.bump(cursor, *RESOURCES)
+            conn.commit()
+    finally:
+        conn.close()
+    resource_versions.invalidate(*RESOURCES)
+    # change_events a fost golit; bus-ul recitește ultimul id
+    events.event_bus.last_id = None
+
+
+@pytest.fixture(scope='session')
+def app_client():
+    if DB_BACKEND == 'mysql':
+        if not os.getenv('DB_NAME'):
+            pytest.skip("DB_NAME must name a test database when DB_BACKEND=mysql")
+        try:
+            conn = connect()
+        except Exception as e:
+            pytest.skip(f"MySQL not available: {e}")
+        from migrations import apply_migrations
+        try:
+            apply_migrations(conn)
+        finally:
+            conn.close()
+
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(app_client):
+    reset_database()
+    yield app_client
+    wait_for_audit()
+
+
+class Api:
+    """Creează entitățile de test prin API"""
+
+    def __init__(self, client):
+        self.client = client
+        self._emails = 0
+
+    def user(self, name='Test User', department='IT', role='User'):
+        self._emails += 1
+        response = self.client.post(f"{API}/users", json={
+            'name': name, 'email': f"user{self._emails}@example.com", 'role': role, 'department': department
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def project(self, name='Proiect', module_type='proiecte'):
+        response = self.client.post(f"{API}/projects", json={
+            'name': name, 'description': f"Descriere {name}", 'module_type': module_type
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def task(self, user, project, date='2024-03-01', hours=2.0, description='Task'):
+        response = self.client.post(f"{API}/tasks", json={
+            'user_id': user['id'], 'project_id': project['id'], 'description': description,
+            'hours': hours, 'date': date
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+
+@pytest.fixture
+def api(client):
+    return Api(client)
@@ -0,0 +1,92 @@
+"""Fluxurile CRUD de bază, identice pe SQLite și MySQL"""
+
+from conftest import API
+
+
+def test_empty_lists(client):
+    assert client.get(f"{API}/users").json() == []
+    assert client.get(f"{API}/projects").json() == []
+    assert client.get(f"{API}/tasks").json() == []
+
+
+def test_create_and_list_users(api, client):
+    api.user(name='Ana', department='HR')
+    api.user(name='Bogdan', department='IT')
+
+    users = client.get(f"{API}/users").json()
+    assert [u['name'] for u in users] == ['Ana', 'Bogdan']
+    assert client.get(f"{API}/departments").json() == ['HR', 'IT']
+    assert client.get(f"{API}/users/email/user1@example.com").json()['name'] == 'Ana'
+
+
+def test_duplicate_email_rejected(api, client):
+    api.user()
+    response = client.post(f"{API}/users", json={'name': 'Alt', 'email': 'user1@example.com'})
+    assert response.status_code == 400
+
+
+def test_update_and_delete_user(api, client):
+    user = api.user()
+    response = client.put(f"{API}/users/{user['id']}", json=dict(user, name='Redenumit'))
+    assert response.status_code == 200
+    assert client.get(f"{API}/users").json()[0]['name'] == 'Redenumit'
+
+    assert client.delete(f"{API}/users/{user['id']}").status_code == 200
+    assert client.get(f"{API}/users").json() == []
+    assert client.delete(f"{API}/users/{user['id']}").status_code == 404
+
+
+def test_task_lifecycle(api, client):
+    user = api.user()
+    project = api.project()
+    task = api.task(user, project, date='2024-03-01', hours=3.5)
+
+    tasks = client.get(f"{API}/tasks/user/{user['id']}").json()
+    assert [t['id'] for t in tasks] == [task['id']]
+    assert tasks[0]['project_name'] == project['name']
+    assert tasks[0]['date'] == '2024-03-01'
+
+    response = client.put(f"{API}/tasks/{task['id']}", json=dict(task, hours=1.5, description='Modificat'))
+    assert response.status_code == 200
+    assert response.json()['hours'] == 1.5
+
+    assert client.delete(f"{API}/tasks/{task['id']}").status_code == 200
+    assert client.get(f"{API}/tasks").json() == []
+
+
+def test_task_requires_existing_user_and_project(api, client):
+    user = api.user()
+    project = api.project()
+    response = client.post(f"{API}/tasks", json={
+        'user_id': user['id'] + 100, 'project_id': project['id'], 'description': 'x', 'hours': 1, 'date': '2024-03-01'
+    })
+    assert response.status_code == 404
+    response = client.post(f"{API}/tasks", json={
+        'user_id': user['id'], 'project_id': project['id'] + 100, 'description': 'x', 'hours': 1, 'date': '2024-03-01'
+    })
+    assert response.status_code == 404
+
+
+def test_not_modified_until_write(api, client):
+    api.user()
+    first = client.get(f"{API}/users")
+    etag = first.headers['etag']
+    assert client.get(f"{API}/users", headers={'If-None-Match': etag}).status_code == 304
+
+    api.user(name='Nou')
+    second = client.get(f"{API}/users", headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert len(second.json()) == 2
+
+
+def test_daily_stats_and_calendar(api, client):
+    user = api.user()
+    project = api.project()
+    api.task(user, project, date='2024-03-01', hours=2)
+    api.task(user, project, date='2024-03-01', hours=3)
+
+    stats = client.get(f"{API}/stats/daily/2024-03-01").json()
+    assert float(stats['total_hours']) == 5.0
+    response = client.get(f"{API}/calendar", params={'date_from': '2024-03-01', 'date_to': '2024-03-31'})
+    assert response.status_code == 200
+    assert client.get(f"{API}/calendar", params={'date_from': '2024-03-31', 'date_to': '2024-03-01'}).status_code == 400
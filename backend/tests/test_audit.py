@@ -0,0 +1,98 @@
+"""Jurnalul de audit: paginarea keyset și statisticile din contoare"""
+
+import base64
+import json
+
+import pytest
+
+import audit
+from conftest import API, connect, query, wait_for_audit
+
+
+def encode(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def test_audit_logs_page_through(api, client):
+    user = api.user()
+    project = api.project()
+    for day in range(1, 6):
+        api.task(user, project, date=f"2024-03-0{day}")
+    wait_for_audit()
+
+    ids, cursor = [], None
+    while True:
+        params = {'limit': 3}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get(f"{API}/audit-logs", params=params)
+        assert response.status_code == 200, response.text
+        ids.extend(log['id'] for log in response.json())
+        cursor = response.headers.get('x-next-cursor')
+        if cursor is None:
+            break
+    # Utilizatorul, proiectul și cele cinci task-uri, fiecare o singură dată
+    assert len(ids) == 7 and len(set(ids)) == 7
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor!',
+    encode(['a', 'b']),
+    encode([1, 2]),
+    encode(['2024-03-01 10:00:00', 'b']),
+    encode(['2024-03-01 10:00:00']),
+])
+def test_audit_logs_invalid_cursor(client, cursor):
+    assert client.get(f"{API}/audit-logs", params={'cursor': cursor}).status_code == 400
+
+
+def test_deleted_users_share_one_unknown_row(api, client):
+    kept = api.user(name='Ana')
+    removed = [api.user(name=f"Șters {i}") for i in range(3)]
+    project = api.project()
+    for user in [kept] + removed:
+        api.task(user, project)
+    wait_for_audit()
+
+    for user in removed:
+        assert client.delete(f"{API}/users/{user['id']}").status_code == 200
+    wait_for_audit()
+
+    stats = client.get(f"{API}/audit-logs/stats").json()
+    unknown = [row for row in stats['user_stats'] if row['user'] == 'Unknown']
+    # Proiectul (fără utilizator) și evenimentele celor trei utilizatori șterși
+    assert len(unknown) == 1
+    assert unknown[0]['count'] == 1 + 2 * len(removed)
+    assert {'user': 'Ana', 'count': 2} in stats['user_stats']
+    assert sum(row['count'] for row in stats['user_stats']) == stats['total_logs']
+
+    counters = query("SELECT user_id, count FROM audit_user_counts ORDER BY user_id")
+    assert [row['user_id'] for row in counters] == [0, kept['id']]
+
+
+def test_backfill_counts_archived_events_of_deleted_users(api, client):
+    user = api.user()
+    api.task(user, api.project())
+    wait_for_audit()
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            # Evenimentele arhivate păstrează id-ul utilizatorului
+            cursor.execute(f"INSERT INTO audit_logs_archive ({audit.AUDIT_COLUMNS}) "
+                           f"SELECT {audit.AUDIT_COLUMNS} FROM audit_logs")
+            cursor.execute("DELETE FROM audit_logs")
+        conn.commit()
+    finally:
+        conn.close()
+    assert client.delete(f"{API}/users/{user['id']}").status_code == 200
+
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            conn.begin()
+            audit.backfill_counters(cursor)
+            conn.commit()
+    finally:
+        conn.close()
+    counters = query("SELECT user_id, count FROM audit_user_counts")
+    assert [(row['user_id'], row['count']) for row in counters] == [(0, 3)]
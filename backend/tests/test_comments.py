@@ -0,0 +1,45 @@
+"""Comentariile și comment_count din listele de task-uri"""
+
+from conftest import API
+
+
+def test_comment_invalidates_task_listing(api, client):
+    user = api.user()
+    task = api.task(user, api.project())
+
+    listing = client.get(f"{API}/tasks/user/{user['id']}")
+    etag = listing.headers['etag']
+    assert listing.json()[0]['comment_count'] == 0
+
+    response = client.post(f"{API}/tasks/{task['id']}/comments",
+                           json={'task_id': task['id'], 'user_id': user['id'], 'comment': 'Primul'})
+    assert response.status_code == 200
+
+    listing = client.get(f"{API}/tasks/user/{user['id']}", headers={'If-None-Match': etag})
+    assert listing.status_code == 200
+    assert listing.json()[0]['comment_count'] == 1
+
+
+def test_comment_delete_invalidates_task_listing(api, client):
+    user = api.user()
+    task = api.task(user, api.project())
+    comment = client.post(f"{API}/tasks/{task['id']}/comments",
+                          json={'task_id': task['id'], 'user_id': user['id'], 'comment': 'Primul'}).json()
+
+    listing = client.get(f"{API}/tasks/user/{user['id']}")
+    etag = listing.headers['etag']
+    assert listing.json()[0]['comment_count'] == 1
+
+    assert client.delete(f"{API}/comments/{comment['id']}").status_code == 200
+
+    listing = client.get(f"{API}/tasks/user/{user['id']}", headers={'If-None-Match': etag})
+    assert listing.status_code == 200
+    assert listing.json()[0]['comment_count'] == 0
+    assert client.get(f"{API}/tasks/{task['id']}/comments").json() == []
+
+
+def test_comment_on_missing_task(api, client):
+    user = api.user()
+    response = client.post(f"{API}/tasks/999/comments", json={'task_id': 999, 'user_id': user['id'], 'comment': 'x'})
+    assert response.status_code == 404
+    assert client.delete(f"{API}/comments/999").status_code == 404
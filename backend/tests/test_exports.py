@@ -0,0 +1,70 @@
+"""Exportul Excel și curățarea job-urilor de export"""
+
+import io
+import json
+import os
+import time
+
+import pytest
+from openpyxl import load_workbook
+
+import exports
+from conftest import API
+
+
+def test_excel_export_keeps_headers_of_empty_sections(api, client):
+    api.user(name='Ana')
+    response = client.get(f"{API}/export/excel")
+    assert response.status_code == 200
+
+    workbook = load_workbook(io.BytesIO(response.content), read_only=True)
+    users = list(workbook['Users'].values)
+    assert users[0][:3] == ('id', 'name', 'email') and len(users) == 2
+    # Fără proiecte și task-uri, foile au doar antetul
+    projects = list(workbook['Projects'].values)
+    assert len(projects) == 1 and {'id', 'name', 'module_type'} <= set(projects[0])
+    tasks = list(workbook['Tasks'].values)
+    assert len(tasks) == 1 and {'id', 'user_name', 'project_name', 'hours'} <= set(tasks[0])
+    summary = dict(list(workbook['Summary'].values)[1:])
+    assert summary['Total Users'] == 1 and summary['Total Tasks'] == 0
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_DIR', str(tmp_path))
+    return tmp_path
+
+
+def write_job(export_dir, job_id, status, age, pid=None, result=True):
+    job = {"id": job_id, "type": "excel", "status": status, "pid": pid or os.getpid(), "created_at": time.time()}
+    paths = [export_dir / f"{job_id}.json"]
+    paths[0].write_text(json.dumps(job))
+    if result:
+        paths.append(export_dir / f"{job_id}.xlsx")
+        paths[1].write_bytes(b'xlsx')
+    for path in paths:
+        os.utime(path, (time.time() - age, time.time() - age))
+    return paths
+
+
+def test_cleanup_keeps_unfinished_jobs(export_dir):
+    running = write_job(export_dir, 'a' * 32, 'running', age=7200)
+    queued = write_job(export_dir, 'b' * 32, 'queued', age=7200, result=False)
+    completed = write_job(export_dir, 'c' * 32, 'completed', age=7200)
+    recent = write_job(export_dir, 'd' * 32, 'completed', age=10)
+    abandoned = export_dir / 'tmpabc.xlsx'
+    abandoned.write_bytes(b'xlsx')
+    os.utime(abandoned, (time.time() - 7200, time.time() - 7200))
+
+    assert exports.cleanup_expired_jobs(ttl=3600) == 3
+    assert all(path.exists() for path in running + queued + recent)
+    assert not any(path.exists() for path in completed) and not abandoned.exists()
+
+
+def test_cleanup_removes_jobs_of_exited_workers(export_dir):
+    # pid inexistent: job-ul este marcat eșuat, apoi șters ca orice job terminat
+    orphaned = write_job(export_dir, 'e' * 32, 'running', age=7200, pid=2 ** 22 + 1)
+    exports.cleanup_expired_jobs(ttl=3600)
+    assert not orphaned[1].exists()
+    job = exports.get_job('e' * 32)
+    assert job is None or job['status'] == 'failed'
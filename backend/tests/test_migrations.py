@@ -0,0 +1,94 @@
+"""Lista de migrații, pașii SQLite și verificările EXPLAIN (MySQL)"""
+
+import datetime
+import os
+import random
+import re
+
+import pytest
+
+import sqlite_backend
+from benchmarks import seed
+from conftest import DB_BACKEND, connect
+from migrations import MIGRATIONS, ExplainCheck, apply_migrations, applied_versions, explain_check, verify_migrations
+
+
+def test_versions_unique_and_increasing():
+    versions = [migration.version for migration in MIGRATIONS]
+    assert versions == list(range(1, len(MIGRATIONS) + 1))
+
+
+@pytest.mark.parametrize('migration', MIGRATIONS, ids=lambda m: f"v{m.version}")
+def test_migration_well_formed(migration):
+    assert migration.description
+    assert migration.steps
+    assert migration.sqlite_steps is None or migration.sqlite_steps
+    for check in migration.checks:
+        assert isinstance(check, ExplainCheck)
+        assert check.name and check.index
+        assert check.sql.count('%s') == len(check.params), check.name
+        # Tabelul verificat este un alias din interogare
+        assert re.search(rf"\b{check.table}\b", check.sql), check.name
+
+
+def test_check_names_unique():
+    names = [check.name for migration in MIGRATIONS for check in migration.checks]
+    assert len(names) == len(set(names))
+
+
+@pytest.fixture
+def sqlite_conn(tmp_path):
+    conn = sqlite_backend.open_connection(str(tmp_path / 'migrations.sqlite3'))
+    yield conn
+    conn.close()
+
+
+def test_sqlite_steps_apply_one_at_a_time(sqlite_conn):
+    for migration in MIGRATIONS:
+        assert apply_migrations(sqlite_conn, [migration]) == [migration.version]
+    assert applied_versions(sqlite_conn.cursor()) == {migration.version for migration in MIGRATIONS}
+    # A doua rulare nu mai aplică nimic
+    assert apply_migrations(sqlite_conn) == []
+
+
+def test_sqlite_schema_has_checked_indexes(sqlite_conn):
+    apply_migrations(sqlite_conn)
+    cursor = sqlite_conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    indexes = {row[0] for row in cursor.fetchall()}
+    for migration in MIGRATIONS:
+        for check in migration.checks:
+            # PRIMARY este cheia primară MySQL; în SQLite nu are nume
+            assert check.index == 'PRIMARY' or check.index in indexes, check.name
+            # Interogarea verificată este validă și după traducerea pentru SQLite
+            cursor.execute("EXPLAIN QUERY PLAN " + check.sql, check.params)
+            assert cursor.fetchall(), check.name
+
+
+@pytest.fixture(scope='module')
+def mysql_conn():
+    if DB_BACKEND != 'mysql' or not os.getenv('DB_NAME'):
+        pytest.skip("EXPLAIN checks need DB_BACKEND=mysql and DB_NAME set to a test database")
+    try:
+        conn = connect()
+    except Exception as e:
+        pytest.skip(f"MySQL not available: {e}")
+    # Pe tabele goale optimizatorul poate alege alt plan; planurile sunt verificate pe date populate
+    apply_migrations(conn)
+    seed.reset(conn)
+    seed.seed(conn, seed.SCALES['small'], random.Random(42), 365, datetime.date(2024, 12, 31))
+    seed.rebuild_derived(conn)
+    yield conn
+    seed.reset(conn)
+    conn.close()
+
+
+def test_verify_migrations_mysql(mysql_conn):
+    assert verify_migrations(mysql_conn) == []
+
+
+@pytest.mark.parametrize('check', [check for migration in MIGRATIONS for check in migration.checks],
+                         ids=lambda check: check.name)
+def test_explain_check_mysql(mysql_conn, check):
+    ok, key = explain_check(mysql_conn.cursor(), check)
+    assert ok, f"{check.name} uses {key} instead of {check.index}"
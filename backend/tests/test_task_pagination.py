@@ -0,0 +1,119 @@
+"""Paginarea keyset a listelor de task-uri (X-Next-Cursor)"""
+
+import base64
+import json
+
+import pytest
+
+from conftest import API, connect
+
+
+def page_through(client, url, limit, **params):
+    """Toate paginile unei liste; întoarce (id-urile în ordine, numărul de pagini)"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, limit=limit)
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get(url, params=query)
+        assert response.status_code == 200, response.text
+        rows = response.json()
+        assert len(rows) <= limit
+        ids.extend(row['id'] for row in rows)
+        pages += 1
+        cursor = response.headers.get('x-next-cursor')
+        if cursor is None:
+            return ids, pages
+        assert len(rows) == limit
+
+
+def set_created_at(created_at):
+    """Același created_at pentru toate task-urile: ordinea depinde doar de date și id"""
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE tasks SET created_at = %s", (created_at,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def tied_tasks(api):
+    user, other = api.user(name='Ana'), api.user(name='Bogdan', department='HR')
+    project, other_project = api.project(name='A'), api.project(name='B')
+    tasks = []
+    for i in range(12):
+        owner = user if i % 3 else other
+        tasks.append(api.task(owner, other_project if i % 4 == 0 else project,
+                              date='2024-03-01' if i < 7 else '2024-03-02', hours=1))
+    set_created_at('2024-03-02 09:00:00')
+    return user, project, tasks
+
+
+def test_pages_through_ties_without_gaps(client, tied_tasks):
+    _, _, tasks = tied_tasks
+    ids, pages = page_through(client, f"{API}/tasks", limit=5)
+
+    # Ordinea: date DESC, apoi (created_at egal) id DESC
+    expected = ([t['id'] for t in reversed(tasks) if t['date'] == '2024-03-02']
+                + [t['id'] for t in reversed(tasks) if t['date'] == '2024-03-01'])
+    assert ids == expected
+    assert pages == 3
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 7, 11])
+def test_every_page_size_returns_each_task_once(client, tied_tasks, limit):
+    _, _, tasks = tied_tasks
+    ids, _ = page_through(client, f"{API}/tasks", limit=limit)
+    assert sorted(ids) == sorted(t['id'] for t in tasks)
+    assert len(ids) == len(set(ids))
+
+
+def test_no_cursor_on_last_page(client, tied_tasks):
+    response = client.get(f"{API}/tasks", params={'limit': 12})
+    assert len(response.json()) == 12
+    assert 'x-next-cursor' not in response.headers
+
+    response = client.get(f"{API}/tasks", params={'limit': 11})
+    cursor = response.headers['x-next-cursor']
+    last = client.get(f"{API}/tasks", params={'limit': 11, 'cursor': cursor})
+    assert len(last.json()) == 1
+    assert 'x-next-cursor' not in last.headers
+
+
+def test_filters_with_cursor(client, tied_tasks):
+    user, project, tasks = tied_tasks
+    expected = {t['id'] for t in tasks if t['user_id'] == user['id'] and t['project_id'] == project['id']}
+    ids, _ = page_through(client, f"{API}/tasks/user/{user['id']}", limit=2, project_id=project['id'])
+    assert set(ids) == expected and len(ids) == len(expected)
+
+    expected = {t['id'] for t in tasks if t['date'] == '2024-03-01'}
+    ids, _ = page_through(client, f"{API}/tasks/date/2024-03-01", limit=3)
+    assert set(ids) == expected and len(ids) == len(expected)
+
+    expected = {t['id'] for t in tasks if t['user_id'] != user['id']}
+    ids, _ = page_through(client, f"{API}/tasks/department/HR", limit=2)
+    assert set(ids) == expected and len(ids) == len(expected)
+
+    expected = {t['id'] for t in tasks if t['date'] == '2024-03-02'}
+    ids, _ = page_through(client, f"{API}/tasks", limit=2, date_from='2024-03-02', date_to='2024-03-02')
+    assert set(ids) == expected and len(ids) == len(expected)
+
+
+def encode(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor!',
+    encode({'date': '2024-03-01'}),
+    encode(['2024-03-01', '2024-03-02 09:00:00']),
+    encode(['2024-03-01', '2024-03-02 09:00:00', 'abc']),
+    encode([1, 2, 3]),
+    encode(['a', 'b', '3']),
+    encode(['2024-03-01', 'b', '3']),
+])
+def test_malformed_cursor_rejected(client, cursor):
+    response = client.get(f"{API}/tasks", params={'cursor': cursor})
+    assert response.status_code == 400
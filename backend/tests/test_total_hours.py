@@ -0,0 +1,122 @@
+"""total_hours al utilizatorilor și proiectelor rămâne egal cu suma orelor task-urilor"""
+
+from conftest import API, connect, query
+
+
+def assert_totals_consistent(client):
+    for table, column in (("users", "user_id"), ("projects", "project_id")):
+        rows = query(f"""
+            SELECT e.id, e.total_hours AS stored, COALESCE(SUM(t.hours), 0) AS actual
+            FROM {table} e
+            LEFT JOIN tasks t ON t.{column} = e.id
+            GROUP BY e.id, e.total_hours
+        """)
+        for row in rows:
+            assert round(float(row['stored']), 2) == round(float(row['actual']), 2), (table, row)
+    # Agregările zilnice urmează aceleași scrieri
+    tasks_total = query("SELECT COALESCE(SUM(hours), 0) AS total FROM tasks")[0]['total']
+    rollups_total = query("SELECT COALESCE(SUM(hours), 0) AS total FROM daily_rollups")[0]['total']
+    assert round(float(tasks_total), 2) == round(float(rollups_total), 2)
+
+    # Reconcilierea nu găsește nicio abatere de reparat
+    report = client.post(f"{API}/system/reconcile-hours").json()
+    assert report['users'] == [] and report['projects'] == [] and report['comment_counts'] == []
+
+
+def total_hours(client, kind, entity_id):
+    return next(e['total_hours'] for e in client.get(f"{API}/{kind}").json() if e['id'] == entity_id)
+
+
+def test_create_task(api, client):
+    user = api.user()
+    project = api.project()
+    api.task(user, project, hours=2.5)
+    api.task(user, project, hours=1.25)
+
+    assert total_hours(client, 'users', user['id']) == 3.75
+    assert total_hours(client, 'projects', project['id']) == 3.75
+    assert_totals_consistent(client)
+
+
+def test_update_task_hours(api, client):
+    user = api.user()
+    project = api.project()
+    task = api.task(user, project, hours=2)
+
+    assert client.put(f"{API}/tasks/{task['id']}", json=dict(task, hours=5)).status_code == 200
+    assert total_hours(client, 'users', user['id']) == 5
+    assert_totals_consistent(client)
+
+
+def test_move_task_to_another_user_and_project(api, client):
+    first_user, second_user = api.user(name='Ana'), api.user(name='Bogdan')
+    first_project, second_project = api.project(name='A'), api.project(name='B')
+    task = api.task(first_user, first_project, hours=4)
+    api.task(first_user, first_project, hours=1)
+
+    response = client.put(f"{API}/tasks/{task['id']}", json=dict(task, user_id=second_user['id'], hours=3))
+    assert response.status_code == 200
+    assert total_hours(client, 'users', first_user['id']) == 1
+    assert total_hours(client, 'users', second_user['id']) == 3
+    assert_totals_consistent(client)
+
+    response = client.put(f"{API}/tasks/{task['id']}", json=dict(task, user_id=second_user['id'],
+                                                                  project_id=second_project['id'], hours=3,
+                                                                  date='2024-03-02'))
+    assert response.status_code == 200
+    assert total_hours(client, 'projects', first_project['id']) == 1
+    assert total_hours(client, 'projects', second_project['id']) == 3
+    assert_totals_consistent(client)
+
+
+def test_delete_task(api, client):
+    user = api.user()
+    project = api.project()
+    task = api.task(user, project, hours=2)
+    api.task(user, project, hours=3)
+
+    assert client.delete(f"{API}/tasks/{task['id']}").status_code == 200
+    assert total_hours(client, 'users', user['id']) == 3
+    assert total_hours(client, 'projects', project['id']) == 3
+    assert_totals_consistent(client)
+
+
+def test_delete_user_discounts_project_hours(api, client):
+    kept, removed = api.user(name='Ana'), api.user(name='Bogdan')
+    project = api.project()
+    api.task(kept, project, hours=2)
+    api.task(removed, project, hours=5)
+
+    assert client.delete(f"{API}/users/{removed['id']}").status_code == 200
+    assert total_hours(client, 'projects', project['id']) == 2
+    assert_totals_consistent(client)
+
+
+def test_delete_project_discounts_user_hours(api, client):
+    user = api.user()
+    kept, removed = api.project(name='A'), api.project(name='B')
+    api.task(user, kept, hours=2)
+    api.task(user, removed, hours=5)
+    api.task(user, removed, date='2024-03-02', hours=1)
+
+    assert client.delete(f"{API}/projects/{removed['id']}").status_code == 200
+    assert total_hours(client, 'users', user['id']) == 2
+    assert_totals_consistent(client)
+
+
+def test_reconcile_repairs_drift(api, client):
+    user = api.user()
+    project = api.project()
+    api.task(user, project, hours=2)
+
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE users SET total_hours = 7 WHERE id = %s", (user['id'],))
+        conn.commit()
+    finally:
+        conn.close()
+
+    report = client.post(f"{API}/system/reconcile-hours").json()
+    assert report['users'] == [{'id': user['id'], 'stored': 7.0, 'actual': 2.0}]
+    assert_totals_consistent(client)
@@ -0,0 +1,181 @@
+"""
+Trasarea interogărilor SQL per cerere și jurnalul interogărilor lente
+
+Fiecare execute/executemany din repository este înregistrat în trace-ul
+cererii curente: textul SQL (parametrii sunt înlocuiți cu numărul lor, nu
+cu valorile), durata și numărul de rânduri. Trace-urile recente și
+interogările peste SLOW_QUERY_MS sunt păstrate în buffere circulare
+expuse prin endpoint-urile /system. Cu QUERY_TRACE_HEADER=1, răspunsurile
+primesc Server-Timing și X-Query-Trace-Id. Bufferele sunt per proces; fiecare
+intrare poartă pid-ul worker-ului care a servit cererea.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+
+logger = logging.getLogger('slow_query')
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+QUERY_TRACE_BUFFER = int(os.getenv('QUERY_TRACE_BUFFER', 200))
+QUERY_TRACE_HEADER = os.getenv('QUERY_TRACE_HEADER', '').lower() in ('1', 'true', 'yes')
+QUERY_TRACE_MAX_QUERIES = 500
+SQL_MAX_LENGTH = 2000
+
+_WHITESPACE = re.compile(r'\s+')
+
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+_lock = threading.Lock()
+recent_traces = deque(maxlen=QUERY_TRACE_BUFFER)
+slow_queries = deque(maxlen=QUERY_TRACE_BUFFER)
+
+
+def normalize_sql(sql):
+    sql = _WHITESPACE.sub(' ', sql if isinstance(sql, str) else sql.decode('utf-8', 'replace')).strip()
+    return sql if len(sql) <= SQL_MAX_LENGTH else sql[:SQL_MAX_LENGTH] + '…'
+
+
+def redact(params, many=False):
+    """Descrierea parametrilor fără valori: număr de parametri sau de rânduri"""
+    if params is None:
+        return None
+    if many:
+        return f"<{len(params)} rows>" if hasattr(params, '__len__') else "<rows>"
+    if isinstance(params, dict):
+        return "<" + ", ".join(sorted(str(key) for key in params)) + ">"
+    if isinstance(params, (list, tuple)):
+        return f"<{len(params)} params>"
+    return "<1 param>"
+
+
+class RequestTrace:
+    """Interogările executate pentru o cerere HTTP"""
+
+    def __init__(self, method, path):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.status = None
+        self.duration_ms = None
+        self.queries = []
+        self.dropped = 0
+
+    def add(self, entry):
+        if len(self.queries) < QUERY_TRACE_MAX_QUERIES:
+            self.queries.append(entry)
+        else:
+            self.dropped += 1
+
+    @property
+    def db_ms(self):
+        return round(sum(query['duration_ms'] for query in self.queries), 2)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "pid": os.getpid(),
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "query_count": len(self.queries) + self.dropped,
+            "db_ms": self.db_ms,
+            "queries": list(self.queries),
+        }
+
+
+def record_query(sql, params, seconds, rowcount=None, many=False):
+    """Înregistrează o interogare în trace-ul cererii curente și, dacă e lentă, în jurnal"""
+    duration_ms = round(seconds * 1000, 3)
+    if rowcount is not None and (rowcount < 0 or rowcount >= 2 ** 63):
+        rowcount = None
+    entry = {
+        "sql": normalize_sql(sql),
+        "params": redact(params, many),
+        "duration_ms": duration_ms,
+        "rows": rowcount,
+    }
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(entry)
+    if duration_ms >= SLOW_QUERY_MS:
+        slow = dict(entry, at=time.time(), pid=os.getpid(),
+                    request=f"{trace.method} {trace.path}" if trace is not None else None,
+                    trace_id=trace.id if trace is not None else None)
+        with _lock:
+            slow_queries.append(slow)
+        logger.warning(f"Slow query ({duration_ms} ms, rows={rowcount}) "
+                       f"[{slow['request'] or 'background'}]: {entry['sql']} {entry['params'] or ''}")
+
+
+def get_recent_traces(limit=50, min_queries=0, path=None):
+    with _lock:
+        traces = list(recent_traces)
+    traces.reverse()
+    result = []
+    for trace in traces:
+        if trace['query_count'] < min_queries or (path and path not in trace['path']):
+            continue
+        result.append(trace)
+        if len(result) >= limit:
+            break
+    return result
+
+
+def get_trace(trace_id):
+    with _lock:
+        for trace in recent_traces:
+            if trace['id'] == trace_id:
+                return trace
+    return None
+
+
+def get_slow_queries(limit=50):
+    with _lock:
+        queries = list(slow_queries)
+    queries.reverse()
+    return queries[:limit]
+
+
+class QueryTraceMiddleware:
+    """Middleware ASGI: deschide un trace per cerere și îl salvează în bufferul circular"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope.get("path", ""))
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                if QUERY_TRACE_HEADER:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing",
+                                    f'db;dur={trace.db_ms};desc="{len(trace.queries)} queries"'.encode()))
+                    headers.append((b"x-query-trace-id", trace.id.encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            trace.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            if trace.queries:
+                with _lock:
+                    recent_traces.append(trace.to_dict())
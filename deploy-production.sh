@@ -59,7 +59,9 @@ Environment=DB_USER=time_management
 Environment=DB_PASSWORD=your_secure_password
 Environment=DB_NAME=kpi_tracker_prod
 Environment=LOG_FILE=/var/log/time-management/backend.log
-ExecStart=/usr/bin/python3 main.py
+Environment=WEB_CONCURRENCY=4
+ExecStart=/usr/bin/python3 server.py
+ExecReload=/bin/kill -HUP \$MAINPID
 Restart=always
 RestartSec=10
 
@@ -33,6 +33,7 @@ export interface Task {
 	user_name?: string;
 	project_name?: string;
 	module_type?: string;
+	comment_count?: number;
 }
 
 export interface TaskComment {
@@ -72,18 +73,46 @@ export interface TaskCreate {
 	date: string;
 }
 
+// Validatori ETag: răspunsurile GET sunt păstrate împreună cu ETag-ul și retrimise ca If-None-Match;
+// la 304 se refolosește corpul păstrat, fără ca serverul să mai interogheze baza de date
+const ETAG_CACHE_MAX_ENTRIES = 200;
+const etagCache = new Map<string, { etag: string; body: string; headers: [string, string][] }>();
+
+async function conditionalFetch(url: string): Promise<Response> {
+	const cached = etagCache.get(url);
+	const response = await fetch(url, {
+		cache: 'no-store',
+		headers: cached ? { 'If-None-Match': cached.etag } : {}
+	});
+	if (response.status === 304 && cached) {
+		return new Response(cached.body, { status: 200, headers: cached.headers });
+	}
+
+	const etag = response.headers.get('ETag');
+	if (response.ok && etag) {
+		const body = await response.clone().text();
+		etagCache.delete(url);
+		etagCache.set(url, { etag, body, headers: [...response.headers.entries()] });
+		if (etagCache.size > ETAG_CACHE_MAX_ENTRIES) {
+			const oldest = etagCache.keys().next().value;
+			if (oldest !== undefined) etagCache.delete(oldest);
+		}
+	}
+	return response;
+}
+
 // Servicii API
 
 // Utilizatori
 export const userService = {
 	async getAll(): Promise<User[]> {
-		const response = await fetch(`${API_URL}/api/users`);
+		const response = await conditionalFetch(`${API_URL}/api/users`);
 		if (!response.ok) throw new Error('Failed to fetch users');
 		return response.json();
 	},
 
 	async getByEmail(email: string): Promise<User> {
-		const response = await fetch(`${API_URL}/api/users/email/${encodeURIComponent(email)}`);
+		const response = await conditionalFetch(`${API_URL}/api/users/email/${encodeURIComponent(email)}`);
 		if (!response.ok) {
 			if (response.status === 404) {
 				throw new Error('User not found');
@@ -124,19 +153,19 @@ export const userService = {
 // Proiecte
 export const projectService = {
 	async getAll(): Promise<Project[]> {
-		const response = await fetch(`${API_URL}/api/projects`);
+		const response = await conditionalFetch(`${API_URL}/api/projects`);
 		if (!response.ok) throw new Error('Failed to fetch projects');
 		return response.json();
 	},
 
 	async getByModule(moduleType: string): Promise<Project[]> {
-		const response = await fetch(`${API_URL}/api/projects/module/${moduleType}`);
+		const response = await conditionalFetch(`${API_URL}/api/projects/module/${moduleType}`);
 		if (!response.ok) throw new Error('Failed to fetch projects by module');
 		return response.json();
 	},
 
 	async getByDepartment(department: string): Promise<Project[]> {
-		const response = await fetch(`${API_URL}/api/projects/department/${encodeURIComponent(department)}`);
+		const response = await conditionalFetch(`${API_URL}/api/projects/department/${encodeURIComponent(department)}`);
 		if (!response.ok) throw new Error('Failed to fetch projects by department');
 		return response.json();
 	},
@@ -172,36 +201,79 @@ export const projectService = {
 // Departamente
 export const departmentService = {
 	async getAll(): Promise<string[]> {
-		const response = await fetch(`${API_URL}/api/departments`);
+		const response = await conditionalFetch(`${API_URL}/api/departments`);
 		if (!response.ok) throw new Error('Failed to fetch departments');
 		return response.json();
 	}
 };
 
 // Task-uri
+// Dimensiunea paginii pentru listele de task-uri (restul se încarcă la cerere, cu cursorul următor)
+export const TASK_PAGE_SIZE = 100;
+
+export interface TaskFilters {
+	date_from?: string;
+	date_to?: string;
+	project_id?: number;
+	module_type?: string;
+	limit?: number;
+}
+
+export interface TaskPage {
+	items: Task[];
+	nextCursor: string | null;
+}
+
+function taskQuery(filters: TaskFilters = {}, cursor?: string | null): string {
+	const params = new URLSearchParams();
+	for (const [key, value] of Object.entries(filters)) {
+		if (value !== undefined && value !== null && value !== '') params.append(key, String(value));
+	}
+	if (cursor) params.append('cursor', cursor);
+	const query = params.toString();
+	return query ? `?${query}` : '';
+}
+
+async function fetchTaskPage(path: string, filters: TaskFilters = {}, cursor?: string | null): Promise<TaskPage> {
+	const response = await conditionalFetch(`${API_URL}${path}${taskQuery(filters, cursor)}`);
+	if (!response.ok) throw new Error('Failed to fetch tasks');
+	return {
+		items: await response.json(),
+		nextCursor: response.headers.get('X-Next-Cursor')
+	};
+}
+
+export interface BulkImportReport {
+	total: number;
+	inserted: number;
+	failed: number;
+	errors: { row: number; error: string }[];
+	errors_truncated: boolean;
+}
+
+export type BulkImportFormat = 'json' | 'ndjson' | 'csv';
+
+const BULK_IMPORT_CONTENT_TYPES: Record<BulkImportFormat, string> = {
+	json: 'application/json',
+	ndjson: 'application/x-ndjson',
+	csv: 'text/csv'
+};
+
 export const taskService = {
-	async getAll(): Promise<Task[]> {
-		const response = await fetch(`${API_URL}/api/tasks`);
-		if (!response.ok) throw new Error('Failed to fetch tasks');
-		return response.json();
+	async getPage(filters: TaskFilters = {}, cursor?: string | null): Promise<TaskPage> {
+		return fetchTaskPage('/api/tasks', filters, cursor);
 	},
 
-	async getByUser(userId: number): Promise<Task[]> {
-		const response = await fetch(`${API_URL}/api/tasks/user/${userId}`);
-		if (!response.ok) throw new Error('Failed to fetch user tasks');
-		return response.json();
+	async getByUser(userId: number, filters: TaskFilters = {}, cursor?: string | null): Promise<TaskPage> {
+		return fetchTaskPage(`/api/tasks/user/${userId}`, filters, cursor);
 	},
 
-	async getByDepartment(department: string): Promise<Task[]> {
-		const response = await fetch(`${API_URL}/api/tasks/department/${encodeURIComponent(department)}`);
-		if (!response.ok) throw new Error('Failed to fetch department tasks');
-		return response.json();
+	async getByDepartment(department: string, filters: TaskFilters = {}, cursor?: string | null): Promise<TaskPage> {
+		return fetchTaskPage(`/api/tasks/department/${encodeURIComponent(department)}`, filters, cursor);
 	},
 
-	async getByDate(date: string): Promise<Task[]> {
-		const response = await fetch(`${API_URL}/api/tasks/date/${date}`);
-		if (!response.ok) throw new Error('Failed to fetch tasks by date');
-		return response.json();
+	async getByDate(date: string, filters: TaskFilters = {}, cursor?: string | null): Promise<TaskPage> {
+		return fetchTaskPage(`/api/tasks/date/${date}`, filters, cursor);
 	},
 
 	async create(task: TaskCreate): Promise<Task> {
@@ -214,6 +286,18 @@ export const taskService = {
 		return response.json();
 	},
 
+	// Import în masă: array de task-uri sau conținutul unui fișier NDJSON/CSV
+	async bulkImport(data: TaskCreate[] | Blob | string, format: BulkImportFormat = 'json'): Promise<BulkImportReport> {
+		const body = Array.isArray(data) ? JSON.stringify(data) : data;
+		const response = await fetch(`${API_URL}/api/tasks/bulk?format=${format}`, {
+			method: 'POST',
+			headers: { 'Content-Type': BULK_IMPORT_CONTENT_TYPES[format] },
+			body
+		});
+		if (!response.ok) throw new Error('Failed to import tasks');
+		return response.json();
+	},
+
 	async update(id: number, task: Task): Promise<Task> {
 		const response = await fetch(`${API_URL}/api/tasks/${id}`, {
 			method: 'PUT',
@@ -235,34 +319,236 @@ export const taskService = {
 // Statistici
 export const statsService = {
 	async getOverview(): Promise<any> {
-		const response = await fetch(`${API_URL}/api/stats/overview`);
+		const response = await conditionalFetch(`${API_URL}/api/stats/overview`);
 		if (!response.ok) throw new Error('Failed to fetch overview stats');
 		return response.json();
 	},
 
 	async getDaily(date: string): Promise<any> {
-		const response = await fetch(`${API_URL}/api/stats/daily/${date}`);
+		const response = await conditionalFetch(`${API_URL}/api/stats/daily/${date}`);
 		if (!response.ok) throw new Error('Failed to fetch daily stats');
 		return response.json();
 	}
 };
 
+// Calendar: ore pe utilizator × zi (× proiect) pentru un interval, într-o singură cerere
+export interface CalendarQuery {
+	date_from: string;
+	date_to: string;
+	user_id?: number;
+	department?: string;
+	project_id?: number;
+	by_project?: boolean;
+}
+
+export interface CalendarUserRow {
+	user_id: number;
+	hours: number[];
+	task_count: number[];
+	projects?: Record<string, number[]>;
+}
+
+export interface CalendarMatrix {
+	date_from: string;
+	date_to: string;
+	version: number;
+	full: true;
+	format: 'matrix';
+	days: string[];
+	users: CalendarUserRow[];
+}
+
+export interface CalendarColumns {
+	user_id: number[];
+	date: string[];
+	project_id?: number[];
+	hours: number[];
+	task_count: number[];
+}
+
+export interface CalendarDelta {
+	date_from: string;
+	date_to: string;
+	version: number;
+	full: false;
+	format: 'columnar';
+	changed: { user_id: number[]; date: string[] };
+	columns: CalendarColumns;
+}
+
+function calendarQuery(query: CalendarQuery, extra: Record<string, string> = {}): string {
+	const params = new URLSearchParams(extra);
+	for (const [key, value] of Object.entries(query)) {
+		if (value !== undefined && value !== null && value !== '') params.append(key, String(value));
+	}
+	return params.toString();
+}
+
+// Înlocuiește în matrice celulele (utilizator, zi) modificate; întoarce o matrice nouă
+function applyCalendarDelta(matrix: CalendarMatrix, delta: CalendarDelta): CalendarMatrix {
+	const dayIndex = new Map(matrix.days.map((day, index) => [day, index]));
+	const users = new Map(
+		matrix.users.map((row) => [
+			row.user_id,
+			{
+				...row,
+				hours: [...row.hours],
+				task_count: [...row.task_count],
+				projects: row.projects
+					? Object.fromEntries(Object.entries(row.projects).map(([id, hours]) => [id, [...hours]]))
+					: undefined
+			}
+		])
+	);
+	const rowFor = (userId: number): CalendarUserRow => {
+		let row = users.get(userId);
+		if (!row) {
+			row = {
+				user_id: userId,
+				hours: matrix.days.map(() => 0),
+				task_count: matrix.days.map(() => 0),
+				projects: matrix.users.some((existing) => existing.projects) ? {} : undefined
+			};
+			users.set(userId, row);
+		}
+		return row;
+	};
+
+	delta.changed.user_id.forEach((userId, i) => {
+		const row = users.get(userId);
+		const position = dayIndex.get(delta.changed.date[i]);
+		if (!row || position === undefined) return;
+		row.hours[position] = 0;
+		row.task_count[position] = 0;
+		for (const hours of Object.values(row.projects ?? {})) hours[position] = 0;
+	});
+
+	const { columns } = delta;
+	columns.user_id.forEach((userId, i) => {
+		const position = dayIndex.get(columns.date[i]);
+		if (position === undefined) return;
+		const row = rowFor(userId);
+		row.hours[position] = Math.round((row.hours[position] + columns.hours[i]) * 100) / 100;
+		row.task_count[position] += columns.task_count[i];
+		if (row.projects && columns.project_id) {
+			const projectId = String(columns.project_id[i]);
+			row.projects[projectId] ??= matrix.days.map(() => 0);
+			row.projects[projectId][position] = columns.hours[i];
+		}
+	});
+
+	return { ...matrix, version: delta.version, users: [...users.values()] };
+}
+
+// Evenimente de modificare (Server-Sent Events) în locul reîncărcărilor periodice
+export interface ChangeEvent {
+	resources: string[];
+	action: string;
+	id: number | null;
+	user_id: number | null;
+	department: string | null;
+}
+
+export interface ChangeSubscription {
+	department?: string;
+	user_id?: number;
+	// La "resync" (evenimente pierdute) clientul reîncarcă toate datele
+	onResync?: () => void;
+}
+
+export const eventService = {
+	subscribe(onChange: (event: ChangeEvent) => void, options: ChangeSubscription = {}): () => void {
+		const params = new URLSearchParams();
+		if (options.department) params.append('department', options.department);
+		if (options.user_id !== undefined) params.append('user_id', String(options.user_id));
+		// EventSource se reconectează singur și trimite Last-Event-ID
+		const source = new EventSource(`${API_URL}/api/events?${params}`);
+		source.addEventListener('change', (message) => onChange(JSON.parse((message as MessageEvent).data)));
+		source.addEventListener('resync', () => options.onResync?.());
+		return () => source.close();
+	}
+};
+
+export const calendarService = {
+	async getMatrix(query: CalendarQuery): Promise<CalendarMatrix> {
+		const response = await conditionalFetch(`${API_URL}/api/calendar?${calendarQuery(query)}`);
+		if (!response.ok) throw new Error('Failed to fetch calendar');
+		return response.json();
+	},
+
+	async getColumns(query: CalendarQuery): Promise<CalendarColumns> {
+		const response = await conditionalFetch(
+			`${API_URL}/api/calendar?${calendarQuery(query, { format: 'columnar' })}`
+		);
+		if (!response.ok) throw new Error('Failed to fetch calendar');
+		return (await response.json()).columns;
+	},
+
+	// Reîmprospătare incrementală: cere doar celulele modificate de la versiunea matricei
+	async refresh(matrix: CalendarMatrix, query: CalendarQuery): Promise<CalendarMatrix> {
+		const response = await fetch(
+			`${API_URL}/api/calendar?${calendarQuery(query, { since: String(matrix.version) })}`,
+			{ cache: 'no-store' }
+		);
+		if (!response.ok) throw new Error('Failed to refresh calendar');
+		const body: CalendarMatrix | CalendarDelta = await response.json();
+		return body.full ? body : applyCalendarDelta(matrix, body);
+	}
+};
+
+export interface ExportFilters {
+	date_from?: string;
+	date_to?: string;
+	department?: string;
+}
+
+export interface ExportJob {
+	id: string;
+	status: 'queued' | 'running' | 'completed' | 'failed';
+	error?: string;
+	summary?: { rows: Record<string, number>; total_hours: number };
+}
+
+function exportQuery(filters: ExportFilters = {}): string {
+	const params = new URLSearchParams();
+	for (const [key, value] of Object.entries(filters)) {
+		if (value) params.append(key, value);
+	}
+	const query = params.toString();
+	return query ? `?${query}` : '';
+}
+
 export const exportService = {
-	async exportJSON(): Promise<any> {
-		const response = await fetch(`${API_URL}/api/export/json`);
+	async exportJSON(filters: ExportFilters = {}): Promise<any> {
+		const response = await fetch(`${API_URL}/api/export/json${exportQuery(filters)}`);
 		if (!response.ok) throw new Error('Failed to export JSON');
 		return response.json();
 	},
 
-	async exportXML(): Promise<any> {
-		const response = await fetch(`${API_URL}/api/export/xml`);
+	async exportXML(filters: ExportFilters = {}): Promise<Blob> {
+		const response = await fetch(`${API_URL}/api/export/xml${exportQuery(filters)}`);
 		if (!response.ok) throw new Error('Failed to export XML');
-		return response.json();
+		return response.blob();
 	},
 
-	async exportExcel(): Promise<Blob> {
-		const response = await fetch(`${API_URL}/api/export/excel`);
-		if (!response.ok) throw new Error('Failed to export Excel');
+	// Exportul Excel rulează ca job în fundal: pornire, verificare status, descărcare
+	async exportExcel(filters: ExportFilters = {}, pollIntervalMs: number = 1000): Promise<Blob> {
+		const start = await fetch(`${API_URL}/api/export/excel/jobs${exportQuery(filters)}`, {
+			method: 'POST'
+		});
+		if (!start.ok) throw new Error('Failed to start Excel export');
+		let job: ExportJob = await start.json();
+
+		while (job.status === 'queued' || job.status === 'running') {
+			await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+			const status = await fetch(`${API_URL}/api/export/excel/jobs/${job.id}`);
+			if (!status.ok) throw new Error('Failed to fetch Excel export status');
+			job = await status.json();
+		}
+		if (job.status !== 'completed') throw new Error(job.error || 'Excel export failed');
+
+		const response = await fetch(`${API_URL}/api/export/excel/jobs/${job.id}/download`);
+		if (!response.ok) throw new Error('Failed to download Excel export');
 		return response.blob();
 	}
 };
@@ -270,11 +556,31 @@ export const exportService = {
 // Comentarii Task-uri
 export const commentService = {
 	async getTaskComments(taskId: number): Promise<TaskComment[]> {
-		const response = await fetch(`${API_URL}/api/tasks/${taskId}/comments`);
+		const response = await conditionalFetch(`${API_URL}/api/tasks/${taskId}/comments`);
 		if (!response.ok) throw new Error('Failed to fetch task comments');
 		return response.json();
 	},
 
+	// Comentariile mai multor task-uri într-o singură cerere, grupate pe task
+	async getForTasks(taskIds: number[], preview?: number): Promise<Record<number, TaskComment[]>> {
+		if (taskIds.length === 0) return {};
+		const params = new URLSearchParams(taskIds.map((id) => ['task_ids', String(id)]));
+		if (preview) params.append('preview', String(preview));
+		const response = await conditionalFetch(`${API_URL}/api/comments?${params}`);
+		if (!response.ok) throw new Error('Failed to fetch comments');
+		return response.json();
+	},
+
+	// Doar numărul de comentarii (tasks.comment_count); listele de task-uri îl includ deja
+	async getCounts(taskIds: number[]): Promise<Record<number, number>> {
+		if (taskIds.length === 0) return {};
+		const params = new URLSearchParams(taskIds.map((id) => ['task_ids', String(id)]));
+		params.append('counts_only', 'true');
+		const response = await conditionalFetch(`${API_URL}/api/comments?${params}`);
+		if (!response.ok) throw new Error('Failed to fetch comment counts');
+		return response.json();
+	},
+
 	async createComment(comment: TaskCommentCreate): Promise<TaskComment> {
 		const response = await fetch(`${API_URL}/api/tasks/${comment.task_id}/comments`, {
 			method: 'POST',
@@ -294,21 +600,28 @@ export const commentService = {
 };
 
 // Audit Logs
+export interface AuditLogPage {
+	items: AuditLog[];
+	nextCursor: string | null;
+}
+
 export const auditService = {
-	async getAuditLogs(skip: number = 0, limit: number = 100, userId?: number): Promise<AuditLog[]> {
-		const params = new URLSearchParams({
-			skip: skip.toString(),
-			limit: limit.toString()
-		});
+	// Paginare keyset: cursorul paginii următoare vine în X-Next-Cursor
+	async getAuditLogs(limit: number = 100, userId?: number, cursor?: string | null): Promise<AuditLogPage> {
+		const params = new URLSearchParams({ limit: limit.toString() });
 		if (userId) params.append('user_id', userId.toString());
+		if (cursor) params.append('cursor', cursor);
 		
-		const response = await fetch(`${API_URL}/api/audit-logs?${params}`);
+		const response = await conditionalFetch(`${API_URL}/api/audit-logs?${params}`);
 		if (!response.ok) throw new Error('Failed to fetch audit logs');
-		return response.json();
+		return {
+			items: await response.json(),
+			nextCursor: response.headers.get('X-Next-Cursor')
+		};
 	},
 
 	async getAuditStats(): Promise<any> {
-		const response = await fetch(`${API_URL}/api/audit-logs/stats`);
+		const response = await conditionalFetch(`${API_URL}/api/audit-logs/stats`);
 		if (!response.ok) throw new Error('Failed to fetch audit stats');
 		return response.json();
 	}